@@ -0,0 +1,137 @@
+import os
+import json
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Callable
+from mcp.types import Tool
+
+logger = logging.getLogger(__name__)
+
+BATCH_TOOL_NAME = 'batch_call'
+BATCH_MAX_CALLS = int(os.environ.get('BATCH_MAX_CALLS', '50'))
+BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY', '8'))
+
+# Kept within the flat subset produced by utils2.jsonConv (no nested objects) so Gemini accepts it.
+BATCH_TOOL = Tool(
+    name=BATCH_TOOL_NAME,
+    description=(
+        'Execute many GitLab tool calls in one round trip (eg: get_file_contents for several files). '
+        'Calls run concurrently, results are returned in input order as a JSON list of '
+        '{"index", "name", "ok", "result" | "error"}.'
+    ),
+    inputSchema={
+        'type': 'object',
+        'properties': {
+            'calls': {
+                'type': 'array',
+                'description': (
+                    f'Up to {BATCH_MAX_CALLS} calls, each a JSON encoded object: '
+                    '{"name": "<tool name>", "arguments": {<tool arguments>}}'
+                ),
+                'items': {'type': 'string'},
+            },
+            'fail_fast': {
+                'type': 'boolean',
+                'description': 'Stop scheduling & cancel remaining calls after the first error',
+                'default': False,
+            },
+            'max_concurrency': {
+                'type': 'integer',
+                'description': f'Max calls running at once (at most {BATCH_MAX_CONCURRENCY})',
+                'minimum': 1,
+                'maximum': BATCH_MAX_CONCURRENCY,
+            },
+        },
+        'required': ['calls'],
+    },
+)
+
+
+def parse_call(call: Any) -> Dict[str, Any]:
+    """A batch item is a JSON string (as advertised) or, leniently, an already decoded object."""
+    if isinstance(call, str):
+        call = json.loads(call)
+    if not isinstance(call, dict) or not isinstance(call.get('name'), str):
+        raise ValueError('each call must be an object with a "name" and optional "arguments"')
+    args = call.get('arguments') or {}
+    if isinstance(args, str):
+        args = json.loads(args)
+    if not isinstance(args, dict):
+        raise ValueError('"arguments" must be an object')
+    if call['name'] == BATCH_TOOL_NAME:
+        raise ValueError(f'{BATCH_TOOL_NAME} can not be nested')
+    return {'name': call['name'], 'arguments': args}
+
+
+def parse_bool(value: Any, name: str) -> bool:
+    """A boolean argument, also accepted as 'true' / 'false' (any case): `bool('false')` would be True."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    raise ValueError(f'"{name}" must be a boolean, got {value!r}')
+
+
+def result_text(res: Any) -> str:
+    if isinstance(res, str):
+        return res
+    return '\n'.join(getattr(block, 'text', '') or '' for block in res.content)
+
+
+async def batch_call(gitlabMCP: Any, arguments: Dict[str, Any], allows: Optional[Callable[[str], bool]] = None) -> List[Dict[str, Any]]:
+    """Fan `arguments['calls']` out over `gitlabMCP.call_tool` with bounded concurrency (only tools `allows`, if given)."""
+    calls = arguments.get('calls') or []
+    if len(calls) > BATCH_MAX_CALLS:
+        raise ValueError(f'{BATCH_TOOL_NAME} accepts at most {BATCH_MAX_CALLS} calls, got {len(calls)}')
+    fail_fast = parse_bool(arguments.get('fail_fast', False), 'fail_fast')
+    limit = asyncio.Semaphore(max(1, min(int(arguments.get('max_concurrency') or BATCH_MAX_CONCURRENCY), BATCH_MAX_CONCURRENCY)))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+    failed = asyncio.Event()
+
+    async def run(i: int, call: Any):
+        item: Dict[str, Any] = {'index': i, 'name': call.get('name') if isinstance(call, dict) else None}
+        try:
+            parsed = parse_call(call)
+            item['name'] = parsed['name']
+            if allows is not None and not allows(parsed['name']):
+                item.update(ok=False, error=f'tool {parsed["name"]!r} is not available to this client')
+                return
+            async with limit:
+                if fail_fast and failed.is_set():
+                    item.update(ok=False, error='skipped (fail_fast)')
+                    return
+                res = await gitlabMCP.call_tool(parsed['name'], parsed['arguments'])
+            if res is None or isinstance(res, str) or getattr(res, 'isError', False):
+                item.update(ok=False, error=result_text(res) if res is not None else 'Not connected')
+            else:
+                item.update(ok=True, result=result_text(res))
+        except asyncio.CancelledError:
+            item.update(ok=False, error='cancelled (fail_fast)')
+        except Exception as e:
+            item.update(ok=False, error=f'{type(e).__name__}: {e}')
+        finally:
+            results[i] = item
+            # also for the items returned early (refused tool, skipped)
+            if not item['ok']:
+                failed.set()
+
+    tasks = [asyncio.create_task(run(i, call)) for i, call in enumerate(calls)]
+    try:
+        if fail_fast:
+            waiter = asyncio.create_task(failed.wait())
+            pending = set(tasks)
+            while pending and not failed.is_set():
+                _, pending = await asyncio.wait(pending | {waiter}, return_when=asyncio.FIRST_COMPLETED)
+                pending.discard(waiter)
+            waiter.cancel()
+            for t in tasks:
+                t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    except asyncio.CancelledError:
+        for t in tasks:
+            t.cancel()
+        raise
+    logger.info(f'{BATCH_TOOL_NAME}: {len(calls)} calls, {sum(not r["ok"] for r in results)} failed')
+    return results
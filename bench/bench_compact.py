@@ -0,0 +1,55 @@
+"""
+Benchmark: result size before / after compaction for the fixtures of the top 20 tools.
+Tokens are estimated (~4 chars per token).
+
+Usage: python bench/bench_compact.py [--config compaction.json]
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+from mcp.types import TextContent, CallToolResult  # noqa: E402
+from compact import Compactor, estimate_tokens  # noqa: E402
+from results import ResultPager  # noqa: E402
+from fixtures import FIXTURES, fixture_text  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help='COMPACTION_CONFIG style JSON file')
+    args = parser.parse_args()
+    config = {}
+    if args.config:
+        with open(args.config, 'r') as f:
+            config = json.load(f)
+    compactor = Compactor(config)
+    pager = ResultPager()
+    rows = []
+    for name in FIXTURES:
+        before = fixture_text(name)
+        res = asyncio.run(compactor.compact(name, CallToolResult(content=[TextContent(type='text', text=before)]), pager))
+        after = ''.join(block.text for block in res.content)
+        rows.append({
+            'tool': name,
+            'bytes_before': len(before.encode()),
+            'bytes_after': len(after.encode()),
+            'tokens_before': estimate_tokens(before),
+            'tokens_after': estimate_tokens(after),
+        })
+    total_before = sum(r['tokens_before'] for r in rows)
+    total_after = sum(r['tokens_after'] for r in rows)
+    print(json.dumps({
+        'tools': rows,
+        'tokens_before': total_before,
+        'tokens_after': total_after,
+        'reduction': 1 - total_after / total_before,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
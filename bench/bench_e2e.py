@@ -0,0 +1,205 @@
+"""
+End to end load test of server2_stdio.py or server2_http.py (the /mcp endpoint) in front of the fake upstream
+(bench/fake_gitlab_mcp.py --tools full: the upstream's whole tool listing, per tool latencies & payload sizes).
+A mix of the hottest read tools is called at --concurrency requests in flight; reports the time to the first
+tools/list, tools/list & tools/call latency percentiles, throughput & the peak RSS of the server process tree,
+as JSON lines (see bench/harness.py) to compare commits.
+
+Usage: python bench/bench_e2e.py [--transport stdio|http] [--concurrency 1,8,32] [--calls 500] [--keys 200]
+                                 [--latency-scale 0.1] [--tools full|listing.json] [--env KEY=VALUE ...] [--output results.jsonl]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import List, Dict, Any, Tuple, Callable, Awaitable
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH)
+sys.path.insert(0, BENCH)
+import httpx  # noqa: E402
+from mcp import ClientSession, StdioServerParameters  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
+from harness import RSSSampler, free_port, latency_summary, emit, add_output_argument  # noqa: E402
+
+HEADERS = {'Accept': 'application/json, text/event-stream', 'Content-Type': 'application/json'}
+
+# (tool, arguments for key k): the read tools agents call the most
+MIX: List[Tuple[str, Callable[[int], Dict[str, Any]]]] = [
+    ('get_merge_request', lambda k: {'project_id': '1', 'merge_request_iid': str(k)}),
+    ('get_merge_request_diffs', lambda k: {'project_id': '1', 'merge_request_iid': str(k)}),
+    ('list_merge_requests', lambda k: {'project_id': '1', 'state': 'opened', 'page': k % 5 + 1}),
+    ('get_issue', lambda k: {'project_id': '1', 'issue_iid': str(k)}),
+    ('list_issues', lambda k: {'project_id': '1', 'scope': 'all', 'page': k % 5 + 1}),
+    ('get_file_contents', lambda k: {'project_id': '1', 'file_path': f'src/module_{k}.py', 'ref': 'main'}),
+    ('list_pipelines', lambda k: {'project_id': '1', 'page': k % 5 + 1}),
+]
+
+
+def workload(calls: int, keys: int, seed: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+    rng = random.Random(seed)
+    return [(name, args(rng.randrange(keys) + 1)) for name, args in (rng.choice(MIX) for _ in range(calls))]
+
+
+def server_env(args: argparse.Namespace, tmp: str) -> Dict[str, str]:
+    fake = [os.path.join(BENCH, 'fake_gitlab_mcp.py'), '--tools', args.tools, '--latency-scale', str(args.latency_scale), '--blocking-ms', '0']
+    env = {
+        **os.environ,
+        'GITLAB_ACCESS_TOKEN': 'fake-token',
+        'GITLAB_PROJECT_ID': '1',
+        'GITLAB_MCP_COMMAND': sys.executable,
+        'GITLAB_MCP_ARGS': subprocess.list2cmdline(fake),
+        'TOOL_CATALOG_PATH': os.path.join(tmp, 'tool_catalog.json'),
+        'RATE_LIMIT': 'false',
+    }
+    env.update(item.split('=', 1) for item in args.env)
+    return env
+
+
+async def load(call: Callable[[str, Dict[str, Any]], Awaitable[bool]], jobs: List[Tuple[str, Dict[str, Any]]],
+               concurrency: int, sampler: RSSSampler) -> Dict[str, Any]:
+    """Run `jobs` through `call` (True when the call succeeded) with `concurrency` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    queue = list(reversed(jobs))
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            name, arguments = queue.pop()
+            t0 = time.perf_counter()
+            try:
+                ok = await call(name, arguments)
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - t0) * 1e3)
+            errors += not ok
+
+    async def sample():
+        while True:
+            sampler.sample()
+            await asyncio.sleep(0.1)
+
+    sampling = asyncio.create_task(sample())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    sampling.cancel()
+    sampler.sample()
+    return {'calls': len(latencies), 'errors': errors, 'calls_per_s': round(len(latencies) / elapsed, 1), **latency_summary(latencies)}
+
+
+async def timed_list(list_tools: Callable[[], Awaitable[int]], repeat: int) -> Tuple[int, Dict[str, float]]:
+    latencies = []
+    n_tools = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n_tools = await list_tools()
+        latencies.append((time.perf_counter() - t0) * 1e3)
+    return n_tools, {f'tools_list_{k}': v for k, v in latency_summary(latencies).items()}
+
+
+async def run_stdio(args: argparse.Namespace, concurrencies: List[int]) -> List[Dict[str, Any]]:
+    tmp = tempfile.mkdtemp(prefix='bench-e2e-')
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(ROOT, 'server2_stdio.py')], env=server_env(args, tmp), cwd=tmp)
+    sampler = RSSSampler(os.getpid(), include_self=False)
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        t0 = time.perf_counter()
+        async with stdio_client(params, errlog=devnull) as (read, write), ClientSession(read, write) as session:
+            await session.initialize()
+
+            async def list_tools() -> int:
+                return len((await session.list_tools()).tools)
+
+            # until the upstream child is connected tools/list only has the server's own tools
+            while await list_tools() <= 3:
+                await asyncio.sleep(0.05)
+            first_list_ms = (time.perf_counter() - t0) * 1e3
+            idle_kb = sampler.sample()
+
+            async def call(name: str, arguments: Dict[str, Any]) -> bool:
+                return not (await session.call_tool(name, arguments)).isError
+
+            n_tools, list_stats = await timed_list(list_tools, args.list_repeat)
+            for seed, concurrency in enumerate(concurrencies):
+                stats = await load(call, workload(args.calls, args.keys, seed), concurrency, sampler)
+                results.append({'transport': 'stdio', 'concurrency': concurrency, 'tools': n_tools, 'first_tools_list_ms': round(first_list_ms, 1),
+                                **list_stats, **stats, 'rss_idle_kb': idle_kb, 'rss_peak_kb': sampler.peak_kb})
+    return results
+
+
+async def run_http(args: argparse.Namespace, concurrencies: List[int]) -> List[Dict[str, Any]]:
+    tmp = tempfile.mkdtemp(prefix='bench-e2e-')
+    port = free_port()
+    env = {**server_env(args, tmp), 'HTTP_PORT': str(port)}
+    url = f'http://127.0.0.1:{port}/mcp/'
+    t0 = time.perf_counter()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server2_http.py')], env=env, cwd=tmp,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    sampler = RSSSampler(server.pid)
+    results = []
+    try:
+        async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=max(concurrencies))) as http:
+            request_id = 0
+
+            async def rpc(method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+                nonlocal request_id
+                request_id += 1
+                r = await http.post(url, json={'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}, headers=HEADERS)
+                r.raise_for_status()
+                return r.json().get('result') or {}
+
+            async def list_tools() -> int:
+                return len((await rpc('tools/list', {})).get('tools', []))
+
+            async def call(name: str, arguments: Dict[str, Any]) -> bool:
+                return not (await rpc('tools/call', {'name': name, 'arguments': arguments})).get('isError', True)
+
+            while True:
+                try:
+                    if await list_tools() > 3:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if server.poll() is not None or time.perf_counter() - t0 > 120:
+                    raise RuntimeError('server2_http.py did not start')
+                await asyncio.sleep(0.05)
+            first_list_ms = (time.perf_counter() - t0) * 1e3
+            idle_kb = sampler.sample()
+            n_tools, list_stats = await timed_list(list_tools, args.list_repeat)
+            for seed, concurrency in enumerate(concurrencies):
+                stats = await load(call, workload(args.calls, args.keys, seed), concurrency, sampler)
+                results.append({'transport': 'http', 'concurrency': concurrency, 'tools': n_tools, 'first_tools_list_ms': round(first_list_ms, 1),
+                                **list_stats, **stats, 'rss_idle_kb': idle_kb, 'rss_peak_kb': sampler.peak_kb})
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transport', choices=['stdio', 'http'], default='stdio')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma separated requests in flight, one run each')
+    parser.add_argument('--calls', type=int, default=500, help='tools/call requests per run')
+    parser.add_argument('--keys', type=int, default=200, help='distinct arguments per tool (cache hit rate)')
+    parser.add_argument('--list-repeat', type=int, default=20, help='tools/list requests timed')
+    parser.add_argument('--tools', default='full', help='fake upstream listing: full or the path of a recorded listing')
+    parser.add_argument('--latency-scale', type=float, default=0.1, help='multiplies the recorded per tool latencies')
+    parser.add_argument('--env', action='append', default=[], help='KEY=VALUE for the server, e.g. RESPONSE_CACHE_TTL=0')
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    concurrencies = [int(c) for c in args.concurrency.split(',')]
+    run = run_stdio if args.transport == 'stdio' else run_http
+    for result in await run(args, concurrencies):
+        emit('e2e', {**result, 'latency_scale': args.latency_scale, 'keys': args.keys, 'env': args.env}, args.output)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""
+Microbenchmark: per call overhead of the metrics instrumentation on the call_tool hot path.
+
+Usage: python bench/bench_metrics.py [--calls 200000]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp.types import TextContent, CallToolResult  # noqa: E402
+import metrics  # noqa: E402
+
+RESULT = CallToolResult(content=[TextContent(type='text', text='{"id": 1}')])
+
+
+async def handler(name, arguments):
+    metrics.observe_upstream(name, 0.001)
+    return RESULT
+
+
+async def bare(name, arguments):
+    return RESULT
+
+
+async def run(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        await fn('get_project', {'project_id': '1'})
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+    base = await run(bare, args.calls)
+    instrumented = await run(metrics.instrument_call_tool(handler), args.calls)
+    start = time.perf_counter()
+    text = metrics.render()
+    render_ms = (time.perf_counter() - start) * 1e3
+    print(json.dumps({
+        'bare_ns_per_call': base,
+        'instrumented_ns_per_call': instrumented,
+        'overhead_ns_per_call': instrumented - base,
+        'render_ms': render_ms,
+        'render_bytes': len(text),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
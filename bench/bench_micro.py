@@ -0,0 +1,145 @@
+"""
+Microbenchmarks of the tools/list path over the upstream's full tool listing (bench/upstream_tools.py):
+- fix_schema & jsonConv over every tool schema,
+- SchemaCatalog.build: cold (every schema converted), warm (same list) & relisted (new list, unchanged schemas),
+- catalog.list_tools against an in-process upstream & the size of the serialized tools/list result,
+- the tools/list size (bytes & estimated tokens) of each tool profile mode (surface.py): full, compact, lazy, read only,
+- argument validation (validate.py) of typical agent calls, against a per call jsonschema.validate of the flattened schema
+  (what the mcp server does by default), with the calls coerced & rejected (upstream failures avoided).
+One JSON line per measurement (see bench/harness.py), to compare commits.
+
+Usage: python bench/bench_micro.py [--repeat 20] [--tools full|listing.json] [--output results.jsonl]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import List, Dict, Any, Callable, Tuple
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH))
+sys.path.insert(0, BENCH)
+import jsonschema  # noqa: E402
+from mcp.types import Tool, ListToolsResult  # noqa: E402
+from utils import fix_schema  # noqa: E402
+from utils2 import jsonConv  # noqa: E402
+from catalog import SchemaCatalog  # noqa: E402
+from compact import estimate_tokens  # noqa: E402
+from surface import ToolProfile, ToolSurface  # noqa: E402
+from validate import ArgumentValidator  # noqa: E402
+from harness import latency_summary, emit, add_output_argument  # noqa: E402
+from upstream_tools import tool_listing, load_listing  # noqa: E402
+
+# calls as agents send them from the flattened schemas: valid, coercible (stringified numbers / booleans / arrays,
+# enum case, null optionals, numeric ids) & invalid (missing required, wrong enum, unknown nested value)
+CALLS: List[Tuple[str, Dict[str, Any]]] = [
+    ('get_merge_request', {'project_id': '1', 'merge_request_iid': '7'}),
+    ('list_merge_requests', {'project_id': '1', 'state': 'opened', 'page': 2}),
+    ('get_issue', {'project_id': 1, 'issue_iid': 5}),
+    ('list_issues', {'project_id': '1', 'scope': 'ALL', 'page': '2', 'per_page': '20', 'labels': 'bug,ui', 'milestone': None}),
+    ('push_files', {'project_id': '1', 'branch': 'b', 'commit_message': 'm', 'files': '[{"file_path": "a", "content": "x"}]'}),
+    ('get_branch_diffs', {'project_id': '1', 'from': 'main', 'to': 'dev', 'straight': 'true', 'excluded_file_patterns': 'lock$'}),
+    ('get_issue', {'project_id': '1'}),
+    ('update_issue', {'project_id': '1', 'issue_iid': '3', 'state_event': 'closed'}),
+]
+
+
+class InProcessUpstream:
+    """Connected upstream answering tools/list with fresh Tool objects, like every `GitlabMCP.get_tools` refresh."""
+    is_conn: bool = True
+
+    def __init__(self, tools: List[Dict[str, Any]]):
+        self._tools = tools
+        self.ready = asyncio.Event()
+        self.ready.set()
+
+    async def get_tools(self) -> List[Tool]:
+        return [Tool(**tool) for tool in self._tools]
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - t0) * 1e3)
+    return latencies
+
+
+def over_schemas(fn: Callable[[Dict[str, Any]], Any], schemas: List[Dict[str, Any]]) -> Callable[[], None]:
+    def run():
+        for schema in schemas:
+            fn(schema)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--tools', default='full', help='full or the path of a listing recorded by bench/record_upstream.py')
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    listing = tool_listing() if args.tools == 'full' else load_listing(args.tools)
+    tools = listing['tools']
+    schemas = [tool['inputSchema'] for tool in tools]
+    upstream_tools = [Tool(**tool) for tool in tools]
+    common = {'tools': len(tools), 'upstream_schema_bytes': len(json.dumps(schemas)), 'repeat': args.repeat}
+
+    def report(name: str, latencies: List[float], **extra: Any):
+        emit('micro', {'case': name, **common, **latency_summary(latencies), **extra}, args.output)
+
+    report('fix_schema', timed(over_schemas(fix_schema, schemas), args.repeat))
+    report('jsonConv', timed(over_schemas(jsonConv, schemas), args.repeat))
+
+    report('catalog_build_cold', timed(lambda: SchemaCatalog().build(upstream_tools), args.repeat))
+    catalog = SchemaCatalog()
+    catalog.build(upstream_tools)
+    report('catalog_build_warm', timed(lambda: catalog.build(upstream_tools), args.repeat))
+    report('catalog_build_relisted', timed(lambda: catalog.build([Tool(**tool) for tool in tools]), args.repeat))
+
+    upstream = InProcessUpstream(tools)
+
+    async def list_tools() -> List[float]:
+        latencies = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            await catalog.list_tools(upstream)
+            latencies.append((time.perf_counter() - t0) * 1e3)
+        return latencies
+
+    latencies = asyncio.run(list_tools())
+    listed = ListToolsResult(tools=catalog.tools)
+    report('list_tools', latencies, tools_list_bytes=len(listed.model_dump_json(by_alias=True, exclude_none=True)))
+
+    def serialize():
+        ListToolsResult(tools=catalog.tools).model_dump_json(by_alias=True, exclude_none=True)
+    report('tools_list_serialize', timed(serialize, args.repeat))
+
+    profiles = [ToolProfile(mode, mode=mode) for mode in ('full', 'compact', 'lazy')] + [ToolProfile('read_only_compact', read_only=True, mode='compact')]
+    for profile in profiles:
+        surface = ToolSurface({profile.name: profile}, profile.name)
+        listed = ListToolsResult(tools=surface.list_tools(catalog.tools)).model_dump_json(by_alias=True, exclude_none=True)
+        report(f'tools_list_{profile.name}', timed(lambda: ToolSurface({profile.name: profile}, profile.name).list_tools(catalog.tools), args.repeat),
+               listed_tools=len(surface.list_tools(catalog.tools)), tools_list_bytes=len(listed), tools_list_tokens=estimate_tokens(listed))
+
+    calls = [(name, arguments) for name, arguments in CALLS if name in catalog.upstream_schemas]
+    validator = ArgumentValidator(catalog)
+    report('validate_args', timed(lambda: [validator.check(name, arguments) for name, arguments in calls], args.repeat), calls=len(calls),
+           coerced=sum(bool(validator.check(name, arguments)[0] != arguments) for name, arguments in calls),
+           rejected=sum(validator.check(name, arguments)[1] is not None for name, arguments in calls))
+    flattened = {tool.name: tool.inputSchema for tool in catalog.tools}
+
+    def validate_flattened():
+        for name, arguments in calls:
+            try:
+                jsonschema.validate(arguments, flattened[name])
+            except jsonschema.ValidationError:
+                pass
+    report('validate_args_flattened_uncompiled', timed(validate_flattened, args.repeat), calls=len(calls))
+
+
+if __name__ == '__main__':
+    main()
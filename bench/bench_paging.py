@@ -0,0 +1,105 @@
+"""
+Benchmark: reading every item of a list tool, page by page vs the Paginator (prefetching pages).
+Runs against the fake GitLab API (bench/fake_gitlab_http.py) through both backends:
+- rest:  in-process REST backend, the total pages are known from page 1 (X-Total-Pages)
+- child: upstream child (bench/fake_gitlab_mcp.py --gitlab-url), next pages are prefetched speculatively
+Also reports the peak of pages buffered ahead against --max-buffer-bytes with a slow consumer.
+
+Usage: python bench/bench_paging.py [--items 500] [--per-page 20] [--prefetch 4] [--latency-ms 20] [--max-buffer-bytes 262144]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+from server import GitlabMCP  # noqa: E402
+from rest import GitlabREST  # noqa: E402
+from paging import Paginator, Page  # noqa: E402
+from bench_rest import free_port, wait_port  # noqa: E402
+
+TOOL = 'list_merge_requests'
+
+
+async def sequential(gitlabMCP: GitlabMCP, args: argparse.Namespace) -> int:
+    items, page = 0, 1
+    while True:
+        res = Page(page, await gitlabMCP.call_tool(TOOL, {'project_id': '1', 'per_page': args.per_page, 'page': page}), args.per_page)
+        items += len(res.items or [])
+        if res.last:
+            return items
+        page += 1
+
+
+async def prefetched(gitlabMCP: GitlabMCP, args: argparse.Namespace, paginator: Paginator, consume_ms: float = 0) -> Dict[str, Any]:
+    items, peak = 0, 0
+    async for _ in paginator.iterate(gitlabMCP, TOOL, {'project_id': '1', 'per_page': args.per_page}):
+        items += 1
+        peak = max(peak, paginator.buffered)
+        if consume_ms and items % args.per_page == 0:
+            await asyncio.sleep(consume_ms / 1000)
+    return {'items': items, 'peak_buffered_bytes': peak}
+
+
+async def run(name: str, gitlabMCP: GitlabMCP, args: argparse.Namespace) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    n_seq = await sequential(gitlabMCP, args)
+    t_seq = time.perf_counter() - t0
+
+    paginator = Paginator(prefetch=args.prefetch)
+    t0 = time.perf_counter()
+    pre = await prefetched(gitlabMCP, args, paginator)
+    t_pre = time.perf_counter() - t0
+
+    capped = Paginator(prefetch=args.prefetch, max_buffer_bytes=args.max_buffer_bytes)
+    slow = await prefetched(gitlabMCP, args, capped, consume_ms=args.latency_ms * 2)
+    return {
+        'backend': name,
+        'items': [n_seq, pre['items']],
+        'sequential_s': round(t_seq, 3),
+        'prefetch_s': round(t_pre, 3),
+        'speedup': round(t_seq / max(t_pre, 1e-9), 1),
+        'pages_prefetched': paginator.prefetched,
+        'capped_peak_buffered_bytes': slow['peak_buffered_bytes'],
+        'max_buffer_bytes': args.max_buffer_bytes,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--prefetch', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--max-buffer-bytes', type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    port = free_port()
+    api_url = f'http://127.0.0.1:{port}/api/v4'
+    http = subprocess.Popen([sys.executable, os.path.join(ROOT, 'bench', 'fake_gitlab_http.py'), '--port', str(port),
+                             '--latency-ms', str(args.latency_ms), '--items', str(args.items)])
+    child = GitlabMCP('fake-token', command=sys.executable, args=[
+        os.path.join(ROOT, 'bench', 'fake_gitlab_mcp.py'), '--gitlab-url', api_url, '--latency-ms', '0', '--blocking-ms', '0',
+    ])
+    rest = GitlabMCP(rest=GitlabREST('fake-token', api_url=api_url))
+    try:
+        await wait_port(port)
+        child.start()
+        await child.wait_ready()
+        for name, gitlabMCP in (('rest', rest), ('child', child)):
+            print(json.dumps(await run(name, gitlabMCP, args)))
+    finally:
+        await rest.close()
+        await child.close()
+        http.terminate()
+        http.wait()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Load test: GitlabMCPPool of N fake upstream children under concurrent call_tool.
+
+Usage: python bench/bench_pool.py [--sizes 1,2,4] [--concurrency 32] [--calls 400] [--blocking-ms 5] [--latency-ms 20]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import List, Dict, Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from server import GitlabMCP  # noqa: E402
+from pool import GitlabMCPPool  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    idx = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[idx]
+
+
+async def run(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    fake_args = [
+        os.path.join(ROOT, 'bench', 'fake_gitlab_mcp.py'),
+        '--latency-ms', str(args.latency_ms),
+        '--blocking-ms', str(args.blocking_ms),
+    ]
+    pool = GitlabMCPPool(lambda: GitlabMCP(command=sys.executable, args=fake_args), size=size, max_inflight=args.max_inflight)
+    pool.start()
+    await pool.wait_ready()
+    # let every child finish starting so the first calls don't pile up on one
+    await asyncio.gather(*(m.gitlabMCP.ready.wait() for m in pool.members))
+
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.calls):
+        queue.put_nowait(i)
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            res = await pool.call_tool('get_project', {'project_id': str(i)})
+            latencies.append((time.perf_counter() - t0) * 1e3)
+            if isinstance(res, str) or getattr(res, 'isError', False):
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+    await pool.close()
+    return {
+        'pool_size': size,
+        'calls': args.calls,
+        'errors': errors,
+        'throughput_rps': args.calls / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,2,4')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--calls', type=int, default=400)
+    parser.add_argument('--max-inflight', type=int, default=16)
+    parser.add_argument('--blocking-ms', type=float, default=5)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    args = parser.parse_args()
+    results = [await run(int(n), args) for n in args.sizes.split(',')]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Benchmark: a burst of calls against a rate limited GitLab (bench/fake_gitlab_http.py --rate-limit), through
+the in-process REST backend:
+- naive:   calls retried right away on any error, like a client on 'Error! Try Again'
+- limited: RateLimitedGitlabMCP, callers retry after the `retry_after` of the structured error
+Reports goodput (successful calls per second), the 429s GitLab sent and the wall time.
+The fake answers 429s for free, a real GitLab counts them against the limit (and may ban hammering clients).
+
+Usage: python bench/bench_ratelimit.py [--calls 600] [--concurrency 32] [--rate-limit 50:10] [--latency-ms 10]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, Any
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+from server import GitlabMCP  # noqa: E402
+from rest import GitlabREST  # noqa: E402
+from ratelimit import RateLimiter, RateLimitedGitlabMCP, AdaptiveConcurrency  # noqa: E402
+from bench_rest import free_port, wait_port  # noqa: E402
+
+MAX_ATTEMPTS = 50
+
+
+async def run(name: str, gitlabMCP: Any, args: argparse.Namespace, stats_url: str, honor_retry_after: bool) -> Dict[str, Any]:
+    async with httpx.AsyncClient() as client:
+        before = (await client.get(stats_url)).json()
+    ok = failed = attempts = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.calls):
+        queue.put_nowait(i)
+
+    async def worker():
+        nonlocal ok, failed, attempts
+        while not queue.empty():
+            i = queue.get_nowait()
+            for _ in range(MAX_ATTEMPTS):
+                attempts += 1
+                res = await gitlabMCP.call_tool('get_merge_request', {'project_id': '1', 'merge_request_iid': i % 20 + 1})
+                if not res.isError:
+                    ok += 1
+                    break
+                if honor_retry_after:
+                    await asyncio.sleep((res.meta or {}).get('retry_after', 1.0))
+            else:
+                failed += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+    async with httpx.AsyncClient() as client:
+        after = (await client.get(stats_url)).json()
+    return {
+        'mode': name,
+        'calls': args.calls,
+        'ok': ok,
+        'failed': failed,
+        'attempts': attempts,
+        'gitlab_requests': after['requests'] - before['requests'],
+        'gitlab_429': after['rejected'] - before['rejected'],
+        'wall_s': round(elapsed, 2),
+        'goodput_per_s': round(ok / elapsed, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=600)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--rate-limit', default='50:10')
+    parser.add_argument('--latency-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    port = free_port()
+    api_url = f'http://127.0.0.1:{port}/api/v4'
+    http = subprocess.Popen([sys.executable, os.path.join(ROOT, 'bench', 'fake_gitlab_http.py'), '--port', str(port),
+                             '--latency-ms', str(args.latency_ms), '--rate-limit', args.rate_limit])
+    # each mode gets its own token, so it starts with a full bucket on the fake GitLab
+    naive = GitlabMCP(rest=GitlabREST('naive-token', api_url=api_url))
+    limited = RateLimitedGitlabMCP(GitlabMCP(rest=GitlabREST('limited-token', api_url=api_url)), RateLimiter(), 'limited-token',
+                                   AdaptiveConcurrency(initial=args.concurrency, max_limit=args.concurrency))
+    try:
+        await wait_port(port)
+        print(json.dumps(await run('naive', naive, args, f'http://127.0.0.1:{port}/stats', honor_retry_after=False)))
+        result = await run('limited', limited, args, f'http://127.0.0.1:{port}/stats', honor_retry_after=True)
+        print(json.dumps({**result, **limited.stats()}))
+    finally:
+        await naive.close()
+        await limited.close()
+        http.terminate()
+        http.wait()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+Benchmark: hot read tools through the upstream child vs the in-process REST backend,
+both against the local fake GitLab API (bench/fake_gitlab_http.py).
+- child: Python -> stdio JSON-RPC -> child (bench/fake_gitlab_mcp.py --gitlab-url) -> HTTP -> fake GitLab
+- rest:  Python -> HTTP (pooled keep-alive httpx client) -> fake GitLab
+Also checks both paths return the same text for every tool.
+
+Usage: python bench/bench_rest.py [--calls 300] [--concurrency 16] [--latency-ms 5] [--blocking-ms 2]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+from typing import List, Dict, Any, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from server import GitlabMCP  # noqa: E402
+from rest import GitlabREST  # noqa: E402
+
+CALLS: List[Tuple[str, Dict[str, Any]]] = [
+    ('get_project', {'project_id': '75000001'}),
+    ('get_file_contents', {'project_id': '75000001', 'file_path': 'docs/README.md', 'ref': 'main'}),
+    ('list_merge_requests', {'project_id': '75000001', 'state': 'opened'}),
+    ('get_merge_request', {'project_id': '75000001', 'merge_request_iid': '3'}),
+    ('list_issues', {'project_id': '75000001', 'state': 'opened'}),
+    ('list_pipelines', {'project_id': '75000001'}),
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    idx = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[idx]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def wait_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def text_of(res: Any) -> str:
+    return '\n'.join(getattr(block, 'text', '') for block in getattr(res, 'content', None) or [])
+
+
+async def run(name: str, gitlabMCP: GitlabMCP, args: argparse.Namespace) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.calls):
+        queue.put_nowait(CALLS[i % len(CALLS)])
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                tool_name, tool_args = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            res = await gitlabMCP.call_tool(tool_name, tool_args)
+            latencies.append((time.perf_counter() - t0) * 1e3)
+            if isinstance(res, str) or getattr(res, 'isError', False):
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+    return {
+        'path': name,
+        'calls': args.calls,
+        'errors': errors,
+        'calls_per_s': round(args.calls / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=5, help='fake GitLab API latency')
+    parser.add_argument('--blocking-ms', type=float, default=2, help='busy time per call in the child (node JSON handling)')
+    args = parser.parse_args()
+
+    port = free_port()
+    api_url = f'http://127.0.0.1:{port}/api/v4'
+    http = subprocess.Popen([sys.executable, os.path.join(ROOT, 'bench', 'fake_gitlab_http.py'), '--port', str(port), '--latency-ms', str(args.latency_ms)])
+    child = GitlabMCP('fake-token', command=sys.executable, args=[
+        os.path.join(ROOT, 'bench', 'fake_gitlab_mcp.py'), '--gitlab-url', api_url, '--latency-ms', '0', '--blocking-ms', str(args.blocking_ms),
+    ])
+    rest = GitlabMCP(rest=GitlabREST('fake-token', api_url=api_url))
+    try:
+        await wait_port(port)
+        child.start()
+        await child.wait_ready()
+
+        for tool_name, tool_args in CALLS:
+            a, b = await child.call_tool(tool_name, tool_args), await rest.call_tool(tool_name, tool_args)
+            same = text_of(a) == text_of(b)
+            print(f'{tool_name:22s} same output: {same} ({len(text_of(b))} chars)')
+
+        results = []
+        for name, gitlabMCP in (('child', child), ('rest', rest)):
+            await run(name, gitlabMCP, argparse.Namespace(**{**vars(args), 'calls': len(CALLS) * 5}))  # warm up
+            results.append(await run(name, gitlabMCP, args))
+        for r in results:
+            print(json.dumps(r))
+        print(f"rest speedup: p50 x{results[0]['p50_ms'] / max(results[1]['p50_ms'], 1e-9):.1f}, "
+              f"throughput x{results[1]['calls_per_s'] / max(results[0]['calls_per_s'], 1e-9):.1f}")
+    finally:
+        await rest.close()
+        await child.close()
+        http.terminate()
+        http.wait()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
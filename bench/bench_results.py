@@ -0,0 +1,76 @@
+"""
+Benchmark: serving a multi-megabyte tool result (eg: get_merge_request_diffs).
+- legacy: TextContent(text=str(res.content)) + logging the whole result (previous call_tool path)
+- pager: upstream blocks passed through, paginated by ResultPager, only a summary logged
+
+Each mode runs in a fresh subprocess so peak RSS is comparable.
+Usage: python bench/bench_results.py [--mbytes 8] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import resource
+import argparse
+import subprocess
+from typing import Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_result(mbytes: float):
+    from mcp.types import CallToolResult, TextContent
+    hunk = '@@ -1,3 +1,4 @@\n-old line with "quotes" and \\backslashes\\\n+new line\n context\n'
+    diffs = [{'old_path': f'src/file_{i}.py', 'new_path': f'src/file_{i}.py', 'diff': hunk * 40} for i in range(int(mbytes * 1024 * 1024 / (len(hunk) * 40)))]
+    return CallToolResult(content=[TextContent(type='text', text=json.dumps(diffs))])
+
+
+def legacy(res: Any, logger: logging.Logger):
+    from mcp.types import TextContent
+    logger.info(f'call_tool res: \n{res}')
+    return [TextContent(type='text', text=str(res.content))]
+
+
+def pager(res: Any, logger: logging.Logger):
+    from results import ResultPager, summarize
+    logger.info(f'call_tool res: {summarize(res)}')
+    return asyncio.run(ResultPager().paginate(res))
+
+
+def run_mode(mode: str, mbytes: float, repeat: int) -> Dict[str, Any]:
+    logging.basicConfig(stream=open(os.devnull, 'w'), level=logging.INFO)
+    logger = logging.getLogger('bench')
+    fn = legacy if mode == 'legacy' else pager
+    res = make_result(mbytes)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(res, logger)
+        json.dumps(out.model_dump() if hasattr(out, 'model_dump') else [b.model_dump() for b in out])
+        times.append((time.perf_counter() - t0) * 1e3)
+        del out
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'mode': mode, 'best_ms': min(times), 'mean_ms': sum(times) / len(times), 'extra_peak_rss_kib': peak_rss - base_rss}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mbytes', type=float, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--mode', choices=['legacy', 'pager'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.mbytes, args.repeat)))
+        return
+    results = []
+    for mode in ('legacy', 'pager'):
+        out = subprocess.check_output([sys.executable, __file__, '--mode', mode, '--mbytes', str(args.mbytes), '--repeat', str(args.repeat)])
+        results.append(json.loads(out))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: copy-free `jsonConv` (SchemaResolver) vs the previous `fix_schema` + filter.
+
+Usage: python bench/bench_schema.py [--defs 120] [--depth 5] [--props 40] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from typing import Any, Dict, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import fix_schema, SchemaResolver  # noqa: E402
+from utils2 import jsonConv, jsonConv_legacy  # noqa: E402
+
+
+def make_schema(n_defs: int, depth: int, n_props: int, seed: int = 0) -> Dict[str, Any]:
+    """Synthetic GitLab-like schema: many shared $defs, each referring to deeper ones."""
+    rnd = random.Random(seed)
+    defs: Dict[str, Any] = {}
+    for i in range(n_defs):
+        level = i % depth
+        props: Dict[str, Any] = {
+            'id': {'type': ['string', 'null'], 'description': f'id of def {i}'},
+            'state': {'type': 'string', 'enum': ['opened', 'closed', 'merged']},
+            'labels': {'type': 'array', 'items': {'type': 'string'}},
+        }
+        # refs only point to defs of a deeper level -> acyclic
+        deeper = [j for j in range(n_defs) if j % depth == level + 1]
+        for k in range(min(4, len(deeper))):
+            props[f'child_{k}'] = {'$ref': f'#/$defs/D{rnd.choice(deeper)}', 'description': 'override'}
+        defs[f'D{i}'] = {'type': 'object', 'description': f'def {i}', 'properties': props}
+    properties: Dict[str, Any] = {}
+    for p in range(n_props):
+        target = f'#/$defs/D{rnd.randrange(n_defs)}'
+        if p % 3 == 0:
+            properties[f'p{p}'] = {'$ref': target}
+        elif p % 3 == 1:
+            properties[f'p{p}'] = {'type': 'array', 'items': {'$ref': target}}
+        else:
+            properties[f'p{p}'] = {'type': ['integer', 'string'], 'default': [1], 'description': f'p{p}'}
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': [f'p{p}' for p in range(0, n_props, 5)],
+        '$defs': defs,
+    }
+
+
+def measure(fn: Callable[[Dict[str, Any]], Any], schema: Dict[str, Any], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(schema)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(schema)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'best_ms': min(times) * 1e3, 'mean_ms': sum(times) / len(times) * 1e3, 'peak_kib': peak / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--defs', type=int, default=120)
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--props', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    schema = make_schema(args.defs, args.depth, args.props)
+    if jsonConv(schema) != jsonConv_legacy(schema):
+        raise SystemExit('jsonConv output differs from fix_schema + filter !')
+    if SchemaResolver(schema).resolve(schema) != fix_schema(schema):
+        raise SystemExit('SchemaResolver output differs from fix_schema !')
+    results = {
+        'params': vars(args),
+        'legacy': measure(jsonConv_legacy, schema, args.repeat),
+        'resolver': measure(jsonConv, schema, args.repeat),
+    }
+    results['speedup'] = results['legacy']['best_ms'] / max(results['resolver']['best_ms'], 1e-9)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Cold start of the server entry points, what an agent framework spawning `server2_stdio.py` waits for:
+- import time of server2_stdio / server2_http: median wall clock of `python -c "import ..."` in a fresh interpreter,
+  the cumulative `-X importtime` of the module, its slowest direct imports & what loaded the optional heavy modules,
+- time from spawning server2_stdio.py (in front of bench/fake_gitlab_mcp.py) to its initialize response, first
+  tools/list response & first full listing (upstream connected): cold, then warm (tool catalog snapshot on disk).
+One JSON line per measurement (see bench/harness.py), to compare commits.
+
+Usage: python bench/bench_startup.py [--repeat 5] [--top 10] [--tools full|listing.json] [--latency-scale 0.1]
+                                     [--env KEY=VALUE ...] [--output results.jsonl]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import List, Dict, Any, Optional, Tuple
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH)
+sys.path.insert(0, BENCH)
+from mcp import ClientSession, StdioServerParameters  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
+from harness import percentile, emit, add_output_argument  # noqa: E402
+from bench_e2e import server_env  # noqa: E402
+
+# modules the servers must not pay for at startup (python-dotenv still comes with mcp, through pydantic-settings)
+HEAVY = ('pydantic_ai', 'google.genai', 'dotenv', 'logfire')
+
+
+def importtime(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """(depth, self us, cumulative us, module) of each `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((depth, int(own), int(cumulative), name.strip()))
+    return rows
+
+
+def importer(rows: List[Tuple[int, int, int, str]], module: str) -> Optional[str]:
+    """Module that first imported `module` (children are listed before their parent), None if it was not imported."""
+    for i, (depth, _, _, name) in enumerate(rows):
+        if name == module:
+            return next((parent for d, _, _, parent in rows[i + 1:] if d < depth), '')
+    return None
+
+
+def import_bench(module: str, repeat: int, top: int, env: Dict[str, str], cwd: str) -> Dict[str, Any]:
+    command = [sys.executable, '-c', f'import {module}']
+    walls = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(command, env=env, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        walls.append((time.perf_counter() - t0) * 1e3)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *command[1:]], env=env, cwd=cwd, check=True, capture_output=True, text=True)
+    rows = importtime(proc.stderr)
+    heavy = {m: importer(rows, m) for m in HEAVY}
+    total = next(cumulative for depth, _, cumulative, name in rows if depth == 0 and name == module)
+    direct = sorted((row for row in rows if row[0] == 1), key=lambda row: -row[2])[:top]
+    return {
+        'module': module,
+        'wall_p50_ms': round(percentile(walls, 50), 1),
+        'import_ms': round(total / 1e3, 1),
+        'slowest_imports_ms': {name: round(cumulative / 1e3, 1) for _, _, cumulative, name in direct},
+        'heavy_imported_by': {m: parent for m, parent in heavy.items() if parent is not None},
+        'modules': len(rows),
+    }
+
+
+async def first_tools_list(args: argparse.Namespace, tmp: str) -> Dict[str, Any]:
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(ROOT, 'server2_stdio.py')], env=server_env(args, tmp), cwd=tmp)
+    with open(os.devnull, 'w') as devnull:
+        t0 = time.perf_counter()
+        async with stdio_client(params, errlog=devnull) as (read, write), ClientSession(read, write) as session:
+            await session.initialize()
+            initialize_ms = (time.perf_counter() - t0) * 1e3
+            first = len((await session.list_tools()).tools)
+            first_ms = (time.perf_counter() - t0) * 1e3
+            n_tools = first
+            # until the upstream child is connected (or the catalog snapshot is loaded) only the server's own tools are listed
+            while n_tools <= 3:
+                await asyncio.sleep(0.01)
+                n_tools = len((await session.list_tools()).tools)
+            full_ms = (time.perf_counter() - t0) * 1e3
+    return {'initialize_ms': round(initialize_ms, 1), 'first_tools_list_ms': round(first_ms, 1), 'first_tools_list_tools': first,
+            'full_tools_list_ms': round(full_ms, 1), 'tools': n_tools}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='interpreter launches per import timing & server starts per state')
+    parser.add_argument('--top', type=int, default=10, help='slowest direct imports reported')
+    parser.add_argument('--tools', default='full', help='fake upstream listing: full or the path of a recorded listing')
+    parser.add_argument('--latency-scale', type=float, default=0.1, help='multiplies the recorded per tool latencies')
+    parser.add_argument('--env', action='append', default=[], help='KEY=VALUE for the server')
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    # an empty working directory: no .env, no tool catalog snapshot
+    tmp = tempfile.mkdtemp(prefix='bench-startup-')
+    env = {**server_env(args, tmp), 'PYTHONPATH': os.pathsep.join(p for p in (ROOT, os.environ.get('PYTHONPATH')) if p)}
+    for module in ('server2_stdio', 'server2_http'):
+        emit('startup_import', import_bench(module, args.repeat, args.top, env, tmp), args.output)
+
+    # writes the catalog snapshot of the warm runs
+    await first_tools_list(args, tmp)
+    for state in ('cold', 'warm'):
+        runs = []
+        for _ in range(args.repeat):
+            run_dir = tempfile.mkdtemp(prefix='bench-startup-') if state == 'cold' else tmp
+            runs.append(await first_tools_list(args, run_dir))
+        result = {key: round(percentile([run[key] for run in runs], 50), 1) for key in runs[0]}
+        emit('startup_tools_list', {'state': state, 'runs': len(runs), **result, 'env': args.env}, args.output)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Load test: many tenants served by one TenantRouter, live upstream children capped at --max-children.
+Each tenant is a fake upstream child (bench/fake_gitlab_mcp.py), requests pick tenants with a skew
+(a few busy teams, a long tail) like a consolidated deployment would see.
+
+Usage: python bench/bench_tenants.py [--tenants 30] [--max-children 8] [--calls 600] [--concurrency 16]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from server import GitlabMCP  # noqa: E402
+from tenants import Tenant, TenantRouter  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    idx = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[idx]
+
+
+def children_rss_kb() -> int:
+    """RSS of this process' direct children, from /proc (Linux only, 0 elsewhere)."""
+    total = 0
+    try:
+        pids = [p for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            if ppid != os.getpid():
+                continue
+            with open(f'/proc/{pid}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration, ValueError, IndexError):
+            continue
+    return total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenants', type=int, default=30)
+    parser.add_argument('--max-children', type=int, default=8)
+    parser.add_argument('--calls', type=int, default=600)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    fake_args = [os.path.join(ROOT, 'bench', 'fake_gitlab_mcp.py'), '--latency-ms', str(args.latency_ms), '--blocking-ms', '0']
+    router = TenantRouter(lambda t: GitlabMCP(t.token, t.project_id, command=sys.executable, args=fake_args), max_children=args.max_children)
+    router.start()
+    tenants = [Tenant(f't{i}', f'team-{i}', f'token-{i}', str(i)) for i in range(args.tenants)]
+    # zipf-like: tenant i is picked with weight 1 / (i + 1)
+    picks = random.Random(0).choices(tenants, weights=[1 / (i + 1) for i in range(len(tenants))], k=args.calls)
+
+    latencies: List[float] = []
+    errors = 0
+    peak_children = 0
+    peak_rss = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for tenant in picks:
+        queue.put_nowait(tenant)
+
+    async def worker():
+        nonlocal errors, peak_children
+        while not queue.empty():
+            tenant = queue.get_nowait()
+            t0 = time.perf_counter()
+            try:
+                async with router.use(tenant) as gitlabMCP:
+                    res = await gitlabMCP.call_tool('get_project', {'project_id': tenant.project_id})
+                if res is None or isinstance(res, str) or res.isError:
+                    errors += 1
+            except RuntimeError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1e3)
+            peak_children = max(peak_children, router.children)
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, children_rss_kb())
+            await asyncio.sleep(0.2)
+
+    sampler = asyncio.create_task(sample_rss())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+    sampler.cancel()
+    stats = router.stats()
+    await router.close()
+    print(json.dumps({
+        'tenants': args.tenants,
+        'max_children': args.max_children,
+        'peak_children': peak_children,
+        'peak_children_rss_mb': round(peak_rss / 1024, 1),
+        'calls': args.calls,
+        'errors': errors,
+        'calls_per_s': round(args.calls / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'created': stats['created'],
+        'evicted': stats['evicted'],
+    }))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
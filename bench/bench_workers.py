@@ -0,0 +1,161 @@
+"""
+Load test: the streamable HTTP server (server2_http.py) with 1..N worker processes (HTTP_WORKERS).
+Every worker runs its own upstream child (bench/fake_gitlab_mcp.py, forwarding to the fake GitLab API of
+bench/fake_gitlab_http.py); the response cache is shared through SHARED_STATE_PATH.
+Calls pick one of --keys distinct merge requests at random, so the GitLab requests show the cache hit rate
+over all workers (--no-shared gives each worker its own cache, for comparison).
+Load is generated by --clients processes, so the load generator is not the bottleneck.
+
+Usage: python bench/bench_workers.py [--workers 1,2,4] [--calls 2000] [--clients 4] [--concurrency 16] [--keys 200] [--no-shared]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from typing import List, Dict, Any, Tuple
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+from bench_rest import percentile, free_port, wait_port  # noqa: E402
+
+# bench_rest imports server, which logs at INFO level
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+HEADERS = {'Accept': 'application/json, text/event-stream', 'Content-Type': 'application/json'}
+
+
+async def client(url: str, calls: int, concurrency: int, keys: int, seed: int) -> Tuple[List[float], int]:
+    """Latencies (ms) of `calls` tools/call requests & the number of failed ones."""
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    remaining = calls
+
+    async def worker(http: httpx.AsyncClient):
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            body = {'jsonrpc': '2.0', 'id': remaining, 'method': 'tools/call', 'params': {
+                'name': 'get_merge_request', 'arguments': {'project_id': '1', 'merge_request_iid': str(rng.randrange(keys) + 1)}}}
+            t0 = time.perf_counter()
+            try:
+                r = await http.post(url, json=body, headers=HEADERS)
+                if r.status_code != 200 or r.json().get('result', {}).get('isError', True):
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1e3)
+
+    async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=concurrency)) as http:
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def run_client(args: Tuple[str, int, int, int, int]) -> Tuple[List[float], int]:
+    return asyncio.run(client(*args))
+
+
+async def wait_ready(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as http:
+        while True:
+            try:
+                if (await http.get(f'http://127.0.0.1:{port}/readyz')).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError('server not ready')
+            await asyncio.sleep(0.2)
+
+
+async def run(workers: int, args: argparse.Namespace, gitlab_port: int) -> Dict[str, Any]:
+    port = free_port()
+    tmp = tempfile.mkdtemp(prefix='bench-workers-')
+    env = {
+        **os.environ,
+        'HTTP_WORKERS': str(workers),
+        'HTTP_PORT': str(port),
+        'GITLAB_ACCESS_TOKEN': 'fake-token',
+        'GITLAB_PROJECT_ID': '1',
+        'GITLAB_MCP_COMMAND': sys.executable,
+        'GITLAB_MCP_ARGS': f'{os.path.join(ROOT, "bench", "fake_gitlab_mcp.py")} --gitlab-url http://127.0.0.1:{gitlab_port}/api/v4',
+        'TOOL_CATALOG_PATH': os.path.join(tmp, 'tool_catalog.json'),
+        'SHARED_STATE_PATH': '' if args.no_shared else os.path.join(tmp, 'shared.sqlite'),
+        'RATE_LIMIT': 'false',
+    }
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server2_http.py')], env=env, cwd=tmp,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await wait_port(port, timeout=60)
+        await wait_ready(port)
+        # every worker's upstream child has to be up, not just the one that answered /readyz
+        await asyncio.sleep(workers)
+        async with httpx.AsyncClient() as http:
+            before = (await http.get(f'http://127.0.0.1:{gitlab_port}/stats')).json()
+        url = f'http://127.0.0.1:{port}/mcp/'
+        per_client = args.calls // args.clients
+        jobs = [(url, per_client, args.concurrency, args.keys, seed) for seed in range(args.clients)]
+        t0 = time.perf_counter()
+        with multiprocessing.Pool(args.clients) as pool:
+            results = await asyncio.get_running_loop().run_in_executor(None, pool.map, run_client, jobs)
+        elapsed = time.perf_counter() - t0
+        async with httpx.AsyncClient() as http:
+            after = (await http.get(f'http://127.0.0.1:{gitlab_port}/stats')).json()
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = [ms for result in results for ms in result[0]]
+    calls = len(latencies)
+    gitlab_requests = after['requests'] - before['requests']
+    return {
+        'workers': workers,
+        'shared_state': not args.no_shared,
+        'calls': calls,
+        'errors': sum(result[1] for result in results),
+        'calls_per_s': round(calls / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'gitlab_requests': gitlab_requests,
+        'cache_hit_rate': round(1 - gitlab_requests / max(calls, 1), 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts')
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=4, help='load generator processes')
+    parser.add_argument('--concurrency', type=int, default=16, help='requests in flight per load generator process')
+    parser.add_argument('--keys', type=int, default=200, help='distinct merge requests called')
+    parser.add_argument('--latency-ms', type=float, default=5, help='fake GitLab API latency')
+    parser.add_argument('--no-shared', action='store_true', help='one response cache per worker')
+    args = parser.parse_args()
+
+    gitlab_port = free_port()
+    gitlab = subprocess.Popen([sys.executable, os.path.join(ROOT, 'bench', 'fake_gitlab_http.py'), '--port', str(gitlab_port),
+                               '--latency-ms', str(args.latency_ms), '--items', str(args.keys)])
+    try:
+        await wait_port(gitlab_port)
+        baseline = None
+        for workers in [int(w) for w in args.workers.split(',')]:
+            result = await run(workers, args, gitlab_port)
+            baseline = baseline or result['calls_per_s']
+            result['scaling'] = round(result['calls_per_s'] / baseline, 2)
+            print(json.dumps(result), flush=True)
+    finally:
+        gitlab.terminate()
+        gitlab.wait()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Fake GitLab REST API (v4) serving bench/fixtures.py, for the REST backend benchmark.
+
+Usage: python bench/fake_gitlab_http.py [--port 8929] [--latency-ms 20] [--items 20] [--rate-limit 50:10]
+Serves under /api/v4: projects/:id, repository/files/:path, merge_requests(/:iid), issues, pipelines.
+List endpoints have `--items` items, paginated with page/per_page & the X-Total(-Pages) headers like GitLab.
+--rate-limit 'rate[:burst]' enforces requests per second per token: over it, 429 with Retry-After.
+GET /stats returns the requests served & rejected so far.
+"""
+import os
+import sys
+import json
+import math
+import time
+import base64
+import asyncio
+import argparse
+from typing import List, Dict, Any, Tuple
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, JSONResponse
+from starlette.routing import Route
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import FIXTURES, many, merge_request, issue, pipeline  # noqa: E402
+
+
+def paginated(request: Request, items: List[Any]) -> Tuple[List[Any], Dict[str, str]]:
+    page = max(1, int(request.query_params.get('page', 1)))
+    per_page = min(100, max(1, int(request.query_params.get('per_page', 20))))
+    total_pages = max(1, -(-len(items) // per_page))
+    headers = {'X-Page': str(page), 'X-Per-Page': str(per_page), 'X-Total': str(len(items)), 'X-Total-Pages': str(total_pages),
+               'X-Next-Page': str(page + 1) if page < total_pages else ''}
+    return items[(page - 1) * per_page:page * per_page], headers
+
+
+class RateLimit:
+    """Per token bucket, like GitLab's per user request limits."""
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+
+    def retry_after(self, token: str) -> float:
+        """0 if the request is allowed, else the seconds until it would be."""
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(token, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.buckets[token] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self.buckets[token] = (tokens - 1, now)
+        return 0.0
+
+
+def build_app(latency_ms: float, n_items: int = 20, rate_limit: str = '') -> Starlette:
+    stats = {'requests': 0, 'rejected': 0}
+    limit = None
+    if rate_limit:
+        rate, _, burst = rate_limit.partition(':')
+        limit = RateLimit(float(rate), float(burst or rate))
+
+    def handler(make: Any):
+        async def endpoint(request: Request) -> Response:
+            token = request.headers.get('PRIVATE-TOKEN')
+            if token is None:
+                return Response('{"message":"401 Unauthorized"}', status_code=401, media_type='application/json')
+            stats['requests'] += 1
+            if limit is not None:
+                retry_after = limit.retry_after(token)
+                if retry_after:
+                    stats['rejected'] += 1
+                    return Response('{"message":"429 Too Many Requests"}', status_code=429, media_type='application/json',
+                                    headers={'Retry-After': str(math.ceil(retry_after))})
+            if latency_ms:
+                await asyncio.sleep(latency_ms / 1000)
+            data = make(request)
+            if data is None:
+                return Response('{"message":"404 Not Found"}', status_code=404, media_type='application/json')
+            headers = {}
+            if isinstance(data, list):
+                data, headers = paginated(request, data)
+            return Response(json.dumps(data), media_type='application/json', headers=headers)
+        return endpoint
+
+    def file_contents(request: Request) -> Any:
+        data = FIXTURES['get_file_contents']()
+        data['file_path'] = data['file_name'] = request.path_params['path']
+        data['content'] = base64.b64encode(data['content'].encode()).decode()
+        data['encoding'] = 'base64'
+        return data
+
+    def merge_requests(request: Request) -> Any:
+        branch = request.query_params.get('source_branch')
+        mrs = many(merge_request, n_items)
+        return [m for m in mrs if m['source_branch'] == branch] if branch else mrs
+
+    async def stats_endpoint(request: Request) -> Response:
+        return JSONResponse(stats)
+
+    routes = [
+        Route('/stats', stats_endpoint),
+        Route('/api/v4/projects/{id}', handler(lambda r: FIXTURES['get_project']())),
+        Route('/api/v4/projects/{id}/repository/files/{path:path}', handler(file_contents)),
+        Route('/api/v4/projects/{id}/merge_requests', handler(merge_requests)),
+        Route('/api/v4/projects/{id}/merge_requests/{iid:int}', handler(lambda r: merge_request(r.path_params['iid']))),
+        Route('/api/v4/projects/{id}/issues', handler(lambda r: many(issue, n_items))),
+        Route('/api/v4/issues', handler(lambda r: many(issue, n_items))),
+        Route('/api/v4/projects/{id}/pipelines', handler(lambda r: many(pipeline, n_items))),
+    ]
+    return Starlette(routes=routes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8929)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--items', type=int, default=20, help='items of each list endpoint')
+    parser.add_argument('--rate-limit', default='', help="'rate[:burst]' requests per second per token")
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.latency_ms, args.items, args.rate_limit), host='127.0.0.1', port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Deterministic fake of the @zereight/mcp-gitlab stdio server, for benchmarks & load tests.
+
+Usage: python bench/fake_gitlab_mcp.py [--latency-ms 20] [--blocking-ms 5] [--payload-bytes 2048] [--gitlab-url URL]
+                                       [--tools basic|full|listing.json] [--latency-scale 1.0] [--change-tools-every 0]
+- latency-ms: async (non blocking) delay per call, like waiting on the GitLab API.
+- blocking-ms: busy time per call that blocks the child's event loop, like node JSON handling.
+  This is what makes a single child a bottleneck under concurrency.
+- gitlab-url: forward the calls to a (fake) GitLab REST API instead, like the real child does
+  (see bench/fake_gitlab_http.py), results are pretty printed JSON like the upstream's.
+- tools: `basic` lists the 6 tools below, `full` the upstream's whole listing (bench/upstream_tools.py) & each call
+  answers with that tool's recorded latency (times latency-scale) & payload size (bench/fixtures.py payloads where
+  there is one), a path loads a listing recorded by bench/record_upstream.py the same way.
+- change-tools-every: every N seconds one tool's description changes & a `fake_tool_v<n>` tool replaces the
+  previous one, then notifications/tools/list_changed is sent (like an upgraded upstream package).
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import List, Dict, Any, Tuple
+import mcp
+import mcp.server.stdio
+from mcp.server.lowlevel import NotificationOptions
+from mcp.types import Tool, TextContent
+
+PROJECT_SCHEMA = {
+    'type': 'object',
+    'properties': {'project_id': {'type': 'string', 'description': 'Project ID or URL-encoded path'}},
+    'required': ['project_id'],
+}
+
+TOOLS = [
+    Tool(name='get_project', description='Get details of a specific project', inputSchema=PROJECT_SCHEMA),
+    Tool(name='get_file_contents', description='Get the contents of a file or directory from a GitLab project', inputSchema={
+        'type': 'object',
+        'properties': {
+            'project_id': {'type': 'string'},
+            'file_path': {'type': 'string'},
+            'ref': {'type': 'string'},
+        },
+        'required': ['project_id', 'file_path'],
+    }),
+    Tool(name='list_merge_requests', description='List merge requests in a GitLab project with filtering options', inputSchema={
+        'type': 'object',
+        'properties': {
+            'project_id': {'type': 'string'},
+            'state': {'type': 'string', 'enum': ['opened', 'closed', 'locked', 'merged', 'all']},
+            'page': {'type': 'number'},
+            'per_page': {'type': 'number'},
+        },
+        'required': ['project_id'],
+    }),
+    Tool(name='get_merge_request', description='Get details of a merge request', inputSchema={
+        'type': 'object',
+        'properties': {'project_id': {'type': 'string'}, 'merge_request_iid': {'type': 'string'}, 'source_branch': {'type': 'string'}},
+        'required': ['project_id'],
+    }),
+    Tool(name='list_issues', description='List issues in a GitLab project with filtering options', inputSchema=PROJECT_SCHEMA),
+    Tool(name='list_pipelines', description='List pipelines in a GitLab project with filtering options', inputSchema=PROJECT_SCHEMA),
+]
+
+
+def make_payload(name: str, arguments: Dict[str, Any], size: int) -> str:
+    body = {'tool': name, 'arguments': arguments, 'id': 1, 'name': 'fake-project', 'web_url': 'https://gitlab.example.com/fake'}
+    pad = max(0, size - len(json.dumps(body)))
+    body['description'] = 'x' * pad
+    return json.dumps(body)
+
+
+def load_tools(spec: str) -> Tuple[List[Tool], Dict[str, Dict[str, float]]]:
+    """Tools & per tool profiles ({} for `basic`, every call then uses the --latency-ms / --payload-bytes flags)."""
+    if spec == 'basic':
+        return TOOLS, {}
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from upstream_tools import tool_listing, load_listing
+    listing = tool_listing() if spec == 'full' else load_listing(spec)
+    return [Tool(**tool) for tool in listing['tools']], listing['profiles']
+
+
+def profiled_payload(name: str, arguments: Dict[str, Any], size: int) -> str:
+    from fixtures import FIXTURES, fixture_text
+    return fixture_text(name) if name in FIXTURES else make_payload(name, arguments, size)
+
+
+def changed_tools(tools: List[Tool], version: int) -> List[Tool]:
+    """Listing `version` of an upgraded upstream: one description changed & one tool added."""
+    changed = list(tools)
+    i = version % len(changed)
+    changed[i] = Tool(name=changed[i].name, description=f'{changed[i].description} (v{version})', inputSchema=changed[i].inputSchema)
+    changed.append(Tool(name=f'fake_tool_v{version}', description=f'Tool added by version {version}', inputSchema=PROJECT_SCHEMA))
+    return changed
+
+
+def build_server(latency_ms: float, blocking_ms: float, payload_bytes: int, gitlab_url: str = '',
+                 tools: str = 'basic', latency_scale: float = 1.0, change_tools_every: float = 0) -> mcp.server.Server:
+    server = mcp.server.Server('fake-gitlab-mcp')
+    original, profiles = load_tools(tools)
+    listed = original
+    sessions: List[Any] = []
+    tasks: List[asyncio.Task] = []
+    rest = None
+    if gitlab_url:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from rest import GitlabREST
+        rest = GitlabREST(os.environ.get('GITLAB_PERSONAL_ACCESS_TOKEN', 'fake'), api_url=gitlab_url)
+
+    async def change_tools():
+        nonlocal listed
+        version = 0
+        while True:
+            await asyncio.sleep(change_tools_every)
+            version += 1
+            listed = changed_tools(original, version)
+            for session in sessions:
+                await session.send_tool_list_changed()
+
+    @server.list_tools()
+    async def list_tools() -> List[Tool]:
+        session = server.request_context.session
+        if change_tools_every and session not in sessions:
+            sessions.append(session)
+            if len(sessions) == 1:
+                tasks.append(asyncio.create_task(change_tools()))
+        return listed
+
+    @server.call_tool(validate_input=False)
+    async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+        if blocking_ms:
+            end = time.perf_counter() + blocking_ms / 1000
+            while time.perf_counter() < end:
+                pass
+        if rest is not None:
+            return (await rest.call_tool(name, arguments)).content
+        profile = profiles.get(name)
+        if profile is not None:
+            await asyncio.sleep(profile['latency_ms'] * latency_scale / 1000)
+            return [TextContent(type='text', text=profiled_payload(name, arguments, int(profile['payload_bytes'])))]
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return [TextContent(type='text', text=make_payload(name, arguments, payload_bytes))]
+
+    return server
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--blocking-ms', type=float, default=5)
+    parser.add_argument('--payload-bytes', type=int, default=2048)
+    parser.add_argument('--gitlab-url', default='')
+    parser.add_argument('--tools', default='basic', help='basic, full or the path of a recorded listing')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='multiplies the per tool latencies of --tools full/<path>')
+    parser.add_argument('--change-tools-every', type=float, default=0, help='seconds between tool list changes (0: never)')
+    args = parser.parse_args()
+    server = build_server(args.latency_ms, args.blocking_ms, args.payload_bytes, args.gitlab_url, args.tools, args.latency_scale,
+                          args.change_tools_every)
+    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options(NotificationOptions(tools_changed=True)))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+"""
+GitLab REST shaped payloads for the 20 most used tools, as the upstream returns them
+(JSON.stringify(data, null, 2)). Field sets follow the GitLab API v4 docs; values are
+deterministic so runs are comparable across commits.
+"""
+import json
+from typing import Any, Dict, List, Callable
+
+TS = '2024-05-02T10:21:33.412Z'
+WEB = 'https://gitlab.example.com'
+
+
+def user(i: int) -> Dict[str, Any]:
+    return {
+        'id': 1000 + i, 'username': f'dev{i}', 'name': f'Developer {i}', 'state': 'active', 'locked': False,
+        'avatar_url': f'https://secure.gravatar.com/avatar/{i:032x}?s=80&d=identicon', 'web_url': f'{WEB}/dev{i}',
+    }
+
+
+def namespace(i: int) -> Dict[str, Any]:
+    return {'id': 10 + i, 'name': f'group{i}', 'path': f'group{i}', 'kind': 'group', 'full_path': f'group{i}',
+            'parent_id': None, 'avatar_url': None, 'web_url': f'{WEB}/groups/group{i}'}
+
+
+def project(i: int) -> Dict[str, Any]:
+    path = f'group{i % 3}/project-{i}'
+    return {
+        'id': 75000000 + i, 'description': f'Service number {i} of the platform', 'name': f'project-{i}',
+        'name_with_namespace': f'group{i % 3} / project-{i}', 'path': f'project-{i}', 'path_with_namespace': path,
+        'created_at': TS, 'default_branch': 'main', 'tag_list': [], 'topics': ['python', 'api'],
+        'ssh_url_to_repo': f'git@gitlab.example.com:{path}.git', 'http_url_to_repo': f'{WEB}/{path}.git',
+        'web_url': f'{WEB}/{path}', 'readme_url': f'{WEB}/{path}/-/blob/main/README.md', 'forks_count': i % 4,
+        'avatar_url': None, 'star_count': i % 7, 'last_activity_at': TS, 'namespace': namespace(i % 3),
+        'container_registry_image_prefix': f'registry.gitlab.example.com/{path}',
+        '_links': {k: f'{WEB}/api/v4/projects/{75000000 + i}/{k}' for k in ('self', 'issues', 'merge_requests', 'repo_branches', 'labels', 'events', 'members', 'cluster_agents')},
+        'packages_enabled': True, 'empty_repo': False, 'archived': False, 'visibility': 'private', 'owner': user(i),
+        'resolve_outdated_diff_discussions': False, 'container_expiration_policy': {
+            'cadence': '1d', 'enabled': False, 'keep_n': 10, 'older_than': '90d', 'name_regex': '.*', 'name_regex_keep': None, 'next_run_at': TS},
+        'issues_enabled': True, 'merge_requests_enabled': True, 'wiki_enabled': True, 'jobs_enabled': True,
+        'snippets_enabled': True, 'container_registry_enabled': True, 'service_desk_enabled': False,
+        'can_create_merge_request_in': True, 'issues_access_level': 'enabled', 'repository_access_level': 'enabled',
+        'merge_requests_access_level': 'enabled', 'forking_access_level': 'enabled', 'wiki_access_level': 'enabled',
+        'builds_access_level': 'enabled', 'snippets_access_level': 'enabled', 'pages_access_level': 'private',
+        'analytics_access_level': 'enabled', 'emails_disabled': False, 'shared_runners_enabled': True,
+        'lfs_enabled': True, 'creator_id': 1000 + i, 'import_status': 'none', 'open_issues_count': i * 3,
+        'ci_default_git_depth': 20, 'ci_config_path': None, 'public_jobs': True, 'shared_with_groups': [],
+        'only_allow_merge_if_pipeline_succeeds': False, 'request_access_enabled': True, 'merge_method': 'merge',
+        'squash_option': 'default_off', 'permissions': {'project_access': {'access_level': 40, 'notification_level': 3}, 'group_access': None},
+    }
+
+
+def merge_request(i: int) -> Dict[str, Any]:
+    return {
+        'id': 300000000 + i, 'iid': i, 'project_id': 75000001, 'title': f'Fix flaky test in module {i}',
+        'description': f'Closes #{i}. The retry logic in module {i} raced with the scheduler.\n\n- [x] tests\n- [ ] docs',
+        'state': 'opened', 'created_at': TS, 'updated_at': TS, 'merged_by': None, 'merge_user': None, 'merged_at': None,
+        'closed_by': None, 'closed_at': None, 'target_branch': 'main', 'source_branch': f'fix/flaky-{i}',
+        'user_notes_count': i % 5, 'upvotes': 0, 'downvotes': 0, 'author': user(i), 'assignees': [user(i + 1)],
+        'assignee': user(i + 1), 'reviewers': [user(i + 2), user(i + 3)], 'source_project_id': 75000001,
+        'target_project_id': 75000001, 'labels': ['bug', 'ci'], 'draft': False, 'work_in_progress': False,
+        'milestone': None, 'merge_when_pipeline_succeeds': False, 'merge_status': 'can_be_merged',
+        'detailed_merge_status': 'mergeable', 'sha': f'{i:040x}', 'merge_commit_sha': None, 'squash_commit_sha': None,
+        'discussion_locked': None, 'should_remove_source_branch': None, 'force_remove_source_branch': True,
+        'prepared_at': TS, 'reference': f'!{i}', 'references': {'short': f'!{i}', 'relative': f'!{i}', 'full': f'group0/project-1!{i}'},
+        'web_url': f'{WEB}/group0/project-1/-/merge_requests/{i}',
+        'time_stats': {'time_estimate': 0, 'total_time_spent': 0, 'human_time_estimate': None, 'human_total_time_spent': None},
+        'squash': False, 'squash_on_merge': False, 'task_completion_status': {'count': 2, 'completed_count': 1},
+        'has_conflicts': False, 'blocking_discussions_resolved': True, 'approvals_before_merge': None,
+    }
+
+
+def issue(i: int) -> Dict[str, Any]:
+    return {
+        'id': 140000000 + i, 'iid': i, 'project_id': 75000001, 'title': f'Crash when saving settings ({i})',
+        'description': f'Steps to reproduce:\n1. open settings\n2. save\n\nStack trace attached (#{i}).',
+        'state': 'opened', 'created_at': TS, 'updated_at': TS, 'closed_at': None, 'closed_by': None,
+        'labels': ['bug', 'priority::2'], 'milestone': None, 'assignees': [user(i)], 'author': user(i + 4),
+        'type': 'ISSUE', 'assignee': user(i), 'user_notes_count': 1, 'merge_requests_count': 0, 'upvotes': 0,
+        'downvotes': 0, 'due_date': None, 'confidential': False, 'discussion_locked': None, 'issue_type': 'issue',
+        'web_url': f'{WEB}/group0/project-1/-/issues/{i}',
+        'time_stats': {'time_estimate': 0, 'total_time_spent': 0, 'human_time_estimate': None, 'human_total_time_spent': None},
+        'task_completion_status': {'count': 0, 'completed_count': 0}, 'has_tasks': False,
+        '_links': {k: f'{WEB}/api/v4/projects/75000001/issues/{i}/{k}' for k in ('self', 'notes', 'award_emoji', 'project', 'closed_as_duplicate_of')},
+        'references': {'short': f'#{i}', 'relative': f'#{i}', 'full': f'group0/project-1#{i}'},
+        'severity': 'UNKNOWN', 'moved_to_id': None, 'service_desk_reply_to': None,
+    }
+
+
+def commit(i: int) -> Dict[str, Any]:
+    return {
+        'id': f'{i:040x}', 'short_id': f'{i:08x}', 'created_at': TS, 'parent_ids': [f'{i + 1:040x}'],
+        'title': f'Refactor handler {i}', 'message': f'Refactor handler {i}\n\nSplit the parser out of the handler.\n',
+        'author_name': f'Developer {i}', 'author_email': f'dev{i}@example.com', 'authored_date': TS,
+        'committer_name': f'Developer {i}', 'committer_email': f'dev{i}@example.com', 'committed_date': TS,
+        'trailers': {}, 'extended_trailers': {}, 'web_url': f'{WEB}/group0/project-1/-/commit/{i:040x}',
+    }
+
+
+def pipeline(i: int) -> Dict[str, Any]:
+    return {'id': 1200000000 + i, 'iid': i, 'project_id': 75000001, 'sha': f'{i:040x}', 'ref': 'main',
+            'status': 'success' if i % 4 else 'failed', 'source': 'push', 'created_at': TS, 'updated_at': TS,
+            'web_url': f'{WEB}/group0/project-1/-/pipelines/{1200000000 + i}', 'name': None}
+
+
+def job(i: int) -> Dict[str, Any]:
+    return {
+        'id': 6000000000 + i, 'status': 'success', 'stage': ['build', 'test', 'deploy'][i % 3], 'name': f'job-{i}',
+        'ref': 'main', 'tag': False, 'coverage': None, 'allow_failure': False, 'created_at': TS, 'started_at': TS,
+        'finished_at': TS, 'erased_at': None, 'duration': 61.2 + i, 'queued_duration': 1.5, 'user': user(i),
+        'commit': commit(i), 'pipeline': pipeline(i), 'web_url': f'{WEB}/group0/project-1/-/jobs/{6000000000 + i}',
+        'project': {'ci_job_token_scope_enabled': False}, 'artifacts': [], 'runner': {
+            'id': 12270859, 'description': '2-green.saas-linux-small-amd64', 'ip_address': None, 'active': True,
+            'paused': False, 'is_shared': True, 'runner_type': 'instance_type', 'name': 'gitlab-runner', 'online': True, 'status': 'online'},
+        'artifacts_expire_at': None, 'archived': False, 'tag_list': ['saas-linux-small-amd64'], 'failure_reason': None,
+    }
+
+
+def label(i: int) -> Dict[str, Any]:
+    return {'id': 3000 + i, 'name': f'label-{i}', 'description': f'Label {i}', 'description_html': f'<p>Label {i}</p>',
+            'text_color': '#FFFFFF', 'color': '#dc143c', 'open_issues_count': i, 'closed_issues_count': 2 * i,
+            'open_merge_requests_count': 1, 'subscribed': False, 'priority': None, 'is_project_label': True}
+
+
+def milestone(i: int) -> Dict[str, Any]:
+    return {'id': 4000 + i, 'iid': i, 'project_id': 75000001, 'title': f'v1.{i}', 'description': f'Release 1.{i}',
+            'state': 'active', 'created_at': TS, 'updated_at': TS, 'due_date': '2024-06-01', 'start_date': '2024-05-01',
+            'expired': False, 'web_url': f'{WEB}/group0/project-1/-/milestones/{i}'}
+
+
+def note(i: int) -> Dict[str, Any]:
+    return {'id': 1900000000 + i, 'type': 'DiffNote', 'body': f'Could this be a constant? ({i})', 'attachment': None,
+            'author': user(i), 'created_at': TS, 'updated_at': TS, 'system': False, 'noteable_id': 300000001,
+            'noteable_type': 'MergeRequest', 'project_id': 75000001, 'resolvable': True, 'resolved': False,
+            'resolved_by': None, 'resolved_at': None, 'confidential': False, 'internal': False, 'noteable_iid': 1,
+            'commands_changes': {}, 'position': {'base_sha': f'{i:040x}', 'start_sha': f'{i:040x}', 'head_sha': f'{i + 1:040x}',
+                                                 'old_path': 'app.py', 'new_path': 'app.py', 'position_type': 'text', 'old_line': None, 'new_line': 10 + i}}
+
+
+def diff(i: int) -> Dict[str, Any]:
+    hunk = ''.join(f'-    value_{n} = compute({n})\n+    value_{n} = compute({n}, cache=True)\n' for n in range(12))
+    return {'old_path': f'src/module_{i}.py', 'new_path': f'src/module_{i}.py', 'a_mode': '100644', 'b_mode': '100644',
+            'new_file': False, 'renamed_file': False, 'deleted_file': False, 'generated_file': False,
+            'diff': f'@@ -{i},12 +{i},12 @@ def handler():\n{hunk}'}
+
+
+def tree_entry(i: int) -> Dict[str, Any]:
+    return {'id': f'{i:040x}', 'name': f'file_{i}.py', 'type': 'blob', 'path': f'src/file_{i}.py', 'mode': '100644'}
+
+
+def event(i: int) -> Dict[str, Any]:
+    return {'id': 5000000 + i, 'project_id': 75000001, 'action_name': 'pushed to', 'target_id': None, 'target_iid': None,
+            'target_type': None, 'author_id': 1000 + i, 'target_title': None, 'created_at': TS, 'author': user(i),
+            'imported': False, 'imported_from': 'none', 'author_username': f'dev{i}',
+            'push_data': {'commit_count': 1, 'action': 'pushed', 'ref_type': 'branch', 'commit_from': f'{i:040x}',
+                          'commit_to': f'{i + 1:040x}', 'ref': 'main', 'commit_title': f'Refactor handler {i}', 'ref_count': None}}
+
+
+def file_contents() -> Dict[str, Any]:
+    content = '# project-1\n\n' + ''.join(f'## Section {n}\n\nSome documentation for section {n}.\n\n' for n in range(40))
+    return {'file_name': 'README.md', 'file_path': 'README.md', 'size': len(content), 'encoding': 'text',
+            'content_sha256': 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855', 'ref': 'main',
+            'blob_id': f'{1:040x}', 'commit_id': f'{2:040x}', 'last_commit_id': f'{3:040x}', 'execute_filemode': False,
+            'content': content}
+
+
+def many(fn: Callable[[int], Any], n: int) -> List[Any]:
+    return [fn(i) for i in range(1, n + 1)]
+
+
+FIXTURES: Dict[str, Callable[[], Any]] = {
+    'list_projects': lambda: many(project, 20),
+    'search_repositories': lambda: many(project, 20),
+    'get_project': lambda: project(1),
+    'list_merge_requests': lambda: many(merge_request, 20),
+    'get_merge_request': lambda: merge_request(1),
+    'get_merge_request_diffs': lambda: many(diff, 30),
+    'mr_discussions': lambda: [{'id': f'{i:040x}', 'individual_note': False, 'notes': [note(i), note(i + 100)]} for i in range(1, 16)],
+    'list_issues': lambda: many(issue, 20),
+    'my_issues': lambda: many(issue, 20),
+    'get_issue': lambda: issue(1),
+    'get_file_contents': file_contents,
+    'get_repository_tree': lambda: many(tree_entry, 100),
+    'list_commits': lambda: many(commit, 20),
+    'get_commit': lambda: commit(1),
+    'list_pipelines': lambda: many(pipeline, 20),
+    'list_pipeline_jobs': lambda: many(job, 20),
+    'list_labels': lambda: many(label, 20),
+    'list_milestones': lambda: many(milestone, 20),
+    'list_namespaces': lambda: many(namespace, 20),
+    'get_project_events': lambda: many(event, 20),
+}
+
+
+def fixture_text(tool_name: str) -> str:
+    """What the upstream sends back for `tool_name` (pretty printed JSON)."""
+    return json.dumps(FIXTURES[tool_name](), indent=2)
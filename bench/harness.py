@@ -0,0 +1,108 @@
+"""
+Shared helpers of the benchmark harness (bench/bench_micro.py, bench/bench_e2e.py): latency summaries, RSS of a
+process tree & JSON lines output tagged with the commit, so results of two commits can be diffed.
+"""
+import os
+import json
+import time
+import socket
+import platform
+import subprocess
+from typing import List, Dict, Any, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    idx = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[idx]
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/mean/max of `latencies_ms`, rounded to µs."""
+    return {
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p90_ms': round(percentile(latencies_ms, 90), 3),
+        'p99_ms': round(percentile(latencies_ms, 99), 3),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0,
+        'max_ms': round(max(latencies_ms), 3) if latencies_ms else 0.0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def tree_rss_kb(pid: int, include_self: bool = True) -> int:
+    """RSS of process `pid` & all its descendants, from /proc (Linux only, 0 elsewhere)."""
+    if not os.path.isdir('/proc'):
+        return 0
+    children = _children()
+    total = 0
+    todo = [pid] if include_self else list(children.get(pid, []))
+    while todo:
+        current = todo.pop()
+        todo.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration, ValueError, IndexError):
+            continue
+    return total
+
+
+class RSSSampler:
+    """Peak `tree_rss_kb(pid, include_self)` seen by `sample()` calls."""
+    pid: int
+    include_self: bool
+    peak_kb: int
+
+    def __init__(self, pid: int, include_self: bool = True):
+        self.pid = pid
+        self.include_self = include_self
+        self.peak_kb = 0
+
+    def sample(self) -> int:
+        rss = tree_rss_kb(self.pid, self.include_self)
+        self.peak_kb = max(self.peak_kb, rss)
+        return rss
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def emit(bench: str, result: Dict[str, Any], output: Optional[str] = None):
+    """Print `result` as one JSON line (tagged with bench name, commit, python & time), appended to `output` if given."""
+    line = json.dumps({'bench': bench, 'commit': git_commit(), 'python': platform.python_version(), 'time': round(time.time()), **result})
+    print(line, flush=True)
+    if output:
+        with open(output, 'a') as f:
+            f.write(line + '\n')
+
+
+def add_output_argument(parser: Any):
+    parser.add_argument('--output', default=None, help='append the JSON lines to this file as well')
@@ -0,0 +1,67 @@
+"""
+Record the real upstream's tools/list (and, for a few read only tools, call latency & payload size) into a listing
+file the fake upstream can replay: python bench/fake_gitlab_mcp.py --tools upstream_listing.json
+Tools that are not sampled get the default profile of their kind (bench/upstream_tools.py).
+
+Needs GITLAB_ACCESS_TOKEN & GITLAB_PROJECT_ID (the sampled calls read that project), spawns the upstream like
+server.GitlabMCP does (GITLAB_MCP_COMMAND / GITLAB_MCP_ARGS, npx @zereight/mcp-gitlab by default).
+
+Usage: python bench/record_upstream.py [--output upstream_listing.json] [--sample get_project,list_merge_requests,...] [--repeat 3]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp import ClientSession, StdioServerParameters  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
+from mcp.types import TextContent  # noqa: E402
+from server import UPSTREAM_COMMAND, UPSTREAM_ARGS  # noqa: E402
+
+DEFAULT_SAMPLE = 'get_project,list_merge_requests,list_issues,list_pipelines,list_commits,get_repository_tree,list_labels'
+
+
+async def record(sample: List[str], repeat: int) -> Dict[str, Any]:
+    token, project_id = os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJECT_ID']
+    env = {**os.environ, 'GITLAB_PERSONAL_ACCESS_TOKEN': token, 'GITLAB_READ_ONLY_MODE': 'true'}
+    params = StdioServerParameters(command=UPSTREAM_COMMAND, args=UPSTREAM_ARGS, env=env)
+    async with stdio_client(params) as (read, write), ClientSession(read, write) as session:
+        await session.initialize()
+        tools = (await session.list_tools()).tools
+        names = {tool.name for tool in tools}
+        profiles: Dict[str, Dict[str, float]] = {}
+        for name in sample:
+            if name not in names:
+                print(f'{name}: not listed by the upstream, skipped', file=sys.stderr)
+                continue
+            latencies, size = [], 0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                res = await session.call_tool(name, {'project_id': project_id})
+                latencies.append((time.perf_counter() - t0) * 1e3)
+                size = sum(len(block.text) for block in res.content if isinstance(block, TextContent))
+            profiles[name] = {'latency_ms': round(sorted(latencies)[len(latencies) // 2], 1), 'payload_bytes': size}
+    return {
+        'tools': [tool.model_dump(by_alias=True, exclude_none=True) for tool in tools],
+        'profiles': profiles,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='upstream_listing.json')
+    parser.add_argument('--sample', default=DEFAULT_SAMPLE, help='comma separated read only tools to time (called with project_id only)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    listing = asyncio.run(record([t for t in args.sample.split(',') if t], args.repeat))
+    with open(args.output, 'w') as f:
+        json.dump(listing, f, indent=1)
+    print(json.dumps({'tools': len(listing['tools']), 'profiled': listing['profiles']}))
+
+
+if __name__ == '__main__':
+    main()
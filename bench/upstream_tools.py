@@ -0,0 +1,239 @@
+"""
+Tool listing shaped like @zereight/mcp-gitlab's tools/list (zod-to-json-schema output: draft-07, additionalProperties
+false, nullable types, nested objects, `$ref`s to reused sub-schemas), with a per tool profile of the latency & payload
+size the fake upstream (bench/fake_gitlab_mcp.py --tools full) answers with. Deterministic, so runs compare across commits.
+
+A listing recorded from a real upstream (bench/record_upstream.py) has the same format and replaces this one with
+`--tools <file>`.
+"""
+import json
+from typing import List, Dict, Any, Optional
+
+DRAFT = 'http://json-schema.org/draft-07/schema#'
+
+PROJECT_ID = {'type': 'string', 'description': 'Project ID or complete URL-encoded path to project'}
+PAGINATION = {
+    'page': {'type': 'number', 'description': 'Page number for pagination (default: 1)'},
+    'per_page': {'type': 'number', 'description': 'Number of items per page (max: 100, default: 20)'},
+}
+MR_REF = {
+    'merge_request_iid': {'type': 'string', 'description': 'The IID of a merge request'},
+    'source_branch': {'type': 'string', 'description': 'Source branch name'},
+}
+ISSUE_REF = {'issue_iid': {'type': 'string', 'description': 'The internal ID of the project issue'}}
+STATE = {'type': 'string', 'enum': ['opened', 'closed', 'locked', 'merged', 'all']}
+LABELS = {'type': 'array', 'items': {'type': 'string'}, 'description': 'Array of label names'}
+ASSIGNEES = {'type': 'array', 'items': {'type': 'number'}, 'description': 'Array of user IDs to assign'}
+DATE = {'type': 'string', 'description': 'ISO 8601 date (YYYY-MM-DD)'}
+LINE_POSITION = {
+    'type': 'object',
+    'properties': {
+        'line_code': {'type': 'string', 'description': 'Line code identifier'},
+        'type': {'type': 'string', 'enum': ['new', 'old'], 'description': 'Line type'},
+        'old_line': {'type': ['number', 'null'], 'description': 'Line number in the old file'},
+        'new_line': {'type': ['number', 'null'], 'description': 'Line number in the new file'},
+    },
+    'required': ['line_code', 'type'],
+    'additionalProperties': False,
+}
+
+
+def position(name: str) -> Dict[str, Any]:
+    """Diff position object, its line range `end` reusing `start` through a $ref like zod-to-json-schema does."""
+    return {
+        'type': 'object',
+        'properties': {
+            'base_sha': {'type': 'string', 'description': 'Base commit SHA in the source branch'},
+            'start_sha': {'type': 'string', 'description': 'SHA referencing the commit in the target branch'},
+            'head_sha': {'type': 'string', 'description': 'SHA referencing the HEAD of this merge request'},
+            'position_type': {'type': 'string', 'enum': ['text', 'image', 'file'], 'description': 'Type of position reference'},
+            'new_path': {'type': ['string', 'null'], 'description': 'File path after change'},
+            'old_path': {'type': ['string', 'null'], 'description': 'File path before change'},
+            'new_line': {'type': ['number', 'null'], 'description': 'Line number after change'},
+            'old_line': {'type': ['number', 'null'], 'description': 'Line number before change'},
+            'line_range': {
+                'type': 'object',
+                'properties': {
+                    'start': LINE_POSITION,
+                    'end': {'$ref': f'#/properties/{name}/properties/line_range/properties/start'},
+                },
+                'required': ['start', 'end'],
+                'additionalProperties': False,
+                'description': 'Line range for multi-line comments',
+            },
+            'width': {'type': 'number'}, 'height': {'type': 'number'}, 'x': {'type': 'number'}, 'y': {'type': 'number'},
+        },
+        'required': ['base_sha', 'start_sha', 'head_sha', 'position_type'],
+        'additionalProperties': False,
+        'description': 'Position when creating a diff note',
+    }
+
+
+def schema(properties: Dict[str, Any], required: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {'type': 'object', 'properties': properties, 'required': required or [], 'additionalProperties': False, '$schema': DRAFT}
+
+
+def project(properties: Optional[Dict[str, Any]] = None, required: Optional[List[str]] = None) -> Dict[str, Any]:
+    return schema({'project_id': PROJECT_ID, **(properties or {})}, ['project_id', *(required or [])])
+
+
+def s(description: str) -> Dict[str, Any]:
+    return {'type': 'string', 'description': description}
+
+
+def n(description: str) -> Dict[str, Any]:
+    return {'type': 'number', 'description': description}
+
+
+def b(description: str) -> Dict[str, Any]:
+    return {'type': 'boolean', 'description': description}
+
+
+MR_FIELDS = {
+    'title': s('Merge request title'), 'description': s('Merge request description'),
+    'target_branch': s('Branch to merge into'), 'assignee_ids': ASSIGNEES, 'reviewer_ids': ASSIGNEES, 'labels': LABELS,
+    'remove_source_branch': {'type': ['boolean', 'null'], 'description': 'Flag indicating if a merge request should remove the source branch when merging'},
+    'squash': {'type': ['boolean', 'null'], 'description': 'If true, squash all commits into a single commit on merge'},
+}
+ISSUE_FIELDS = {
+    'title': s('Issue title'), 'description': s('Issue description'), 'assignee_ids': ASSIGNEES, 'labels': LABELS,
+    'milestone_id': n('Milestone ID to assign'), 'due_date': DATE, 'confidential': b('Whether the issue is confidential'),
+    'issue_type': {'type': 'string', 'enum': ['issue', 'incident', 'test_case', 'task']},
+}
+LIST_ISSUES = {
+    'assignee_id': {'type': ['string', 'number'], 'description': 'Return issues assigned to the given user ID'},
+    'author_id': {'type': ['string', 'number']}, 'labels': LABELS, 'milestone': s('Milestone title'),
+    'scope': {'type': 'string', 'enum': ['created_by_me', 'assigned_to_me', 'all']}, 'search': s('Search in title and description'),
+    'state': {'type': 'string', 'enum': ['opened', 'closed', 'all']}, 'order_by': {'type': 'string', 'enum': ['created_at', 'updated_at', 'priority', 'due_date', 'relative_position', 'label_priority', 'milestone_due', 'popularity', 'weight']},
+    'sort': {'type': 'string', 'enum': ['asc', 'desc']}, 'created_after': DATE, 'created_before': DATE,
+    'updated_after': DATE, 'updated_before': DATE, 'with_labels_details': b('Return more details for each label'), **PAGINATION,
+}
+WIKI = {'slug': s('URL-encoded slug of the wiki page'), 'title': s('Title of the wiki page'), 'content': s('Content of the wiki page'),
+        'format': {'type': 'string', 'enum': ['markdown', 'rdoc', 'asciidoc', 'org']}}
+MILESTONE = {'milestone_id': s('The ID of a project milestone')}
+LABEL = {'name': s('The name of the label'), 'color': s('The color of the label (#RRGGBB)'), 'description': s('The description of the label'),
+         'priority': {'type': ['number', 'null'], 'description': 'The priority of the label'}}
+PIPELINE = {'pipeline_id': s('The ID of the pipeline')}
+NOTE = {'body': s('The content of the note or reply')}
+
+# (name, description, inputSchema)
+TOOLS: List[Any] = [
+    ('merge_merge_request', 'Merge a merge request in a GitLab project', project({**MR_REF, 'auto_merge': b('Merge when pipeline succeeds'), 'merge_commit_message': s('Custom merge commit message'), 'should_remove_source_branch': b('Remove the source branch after merge'), 'squash': b('Squash commits'), 'squash_commit_message': s('Custom squash commit message')})),
+    ('create_or_update_file', 'Create or update a single file in a GitLab project', project({'file_path': s('Path where to create/update the file'), 'content': s('Content of the file'), 'commit_message': s('Commit message'), 'branch': s('Branch to create/update the file in'), 'previous_path': s('Path of the file to move/rename'), 'last_commit_id': s('Last known file commit ID'), 'commit_id': s('Current file commit ID (for update operations)')}, ['file_path', 'content', 'commit_message', 'branch'])),
+    ('search_repositories', 'Search for GitLab projects', schema({'search': s('Search query'), **PAGINATION}, ['search'])),
+    ('create_repository', 'Create a new GitLab project', schema({'name': s('Repository name'), 'description': s('Repository description'), 'visibility': {'type': 'string', 'enum': ['private', 'internal', 'public']}, 'initialize_with_readme': b('Initialize with README.md')}, ['name'])),
+    ('get_file_contents', 'Get the contents of a file or directory from a GitLab project', project({'file_path': s('Path to the file or directory'), 'ref': s('Branch/tag/commit to get contents from')}, ['file_path'])),
+    ('push_files', 'Push multiple files to a GitLab project in a single commit', project({'branch': s('Branch to push to'), 'files': {'type': 'array', 'items': {'type': 'object', 'properties': {'file_path': s('Path where to create the file'), 'content': s('Content of the file')}, 'required': ['file_path', 'content'], 'additionalProperties': False}, 'description': 'Array of files to push'}, 'commit_message': s('Commit message')}, ['branch', 'files', 'commit_message'])),
+    ('create_issue', 'Create a new issue in a GitLab project', project(ISSUE_FIELDS, ['title'])),
+    ('create_merge_request', 'Create a new merge request in a GitLab project', project({**MR_FIELDS, 'source_branch': s('Branch containing changes'), 'draft': b('Create as draft merge request'), 'allow_collaboration': b('Allow commits from upstream members')}, ['title', 'source_branch', 'target_branch'])),
+    ('fork_repository', 'Fork a GitLab project to your account or specified namespace', project({'namespace': s('Namespace to fork to (full path)')})),
+    ('create_branch', 'Create a new branch in a GitLab project', project({'branch': s('Name for the new branch'), 'ref': s('Source branch/commit for new branch')}, ['branch'])),
+    ('get_merge_request', 'Get details of a merge request (Either mergeRequestIid or branchName must be provided)', project(MR_REF)),
+    ('get_merge_request_diffs', 'Get the changes/diffs of a merge request (Either mergeRequestIid or branchName must be provided)', project({**MR_REF, 'view': {'type': 'string', 'enum': ['inline', 'parallel'], 'description': 'Diff view type'}})),
+    ('list_merge_request_diffs', 'List merge request diffs with pagination support (Either mergeRequestIid or branchName must be provided)', project({**MR_REF, **PAGINATION, 'unidiff': b('Present diffs in the unified diff format')})),
+    ('get_branch_diffs', 'Get the changes/diffs between two branches or commits in a GitLab project', project({'from': s('The base branch or commit SHA to compare from'), 'to': s('The target branch or commit SHA to compare to'), 'straight': b('Comparison method: false for merge-base (default), true for direct comparison'), 'excluded_file_patterns': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Array of regex patterns to exclude files from the diff results'}}, ['from', 'to'])),
+    ('update_merge_request', 'Update a merge request (Either mergeRequestIid or branchName must be provided)', project({**MR_REF, **MR_FIELDS, 'state_event': {'type': 'string', 'enum': ['close', 'reopen']}, 'discussion_locked': b('Lock discussions')})),
+    ('create_note', 'Create a new note (comment) to an issue or merge request', project({'noteable_type': {'type': 'string', 'enum': ['issue', 'merge_request'], 'description': "Type of noteable (issue or merge_request)"}, 'noteable_iid': s('IID of the issue or merge request'), **NOTE}, ['noteable_type', 'noteable_iid', 'body'])),
+    ('create_merge_request_thread', 'Create a new thread on a merge request', project({**MR_REF, **NOTE, 'position': position('position'), 'created_at': s('Date the thread was created at (ISO 8601 format)')}, ['merge_request_iid', 'body'])),
+    ('mr_discussions', 'List discussion items for a merge request', project({**MR_REF, **PAGINATION}, ['merge_request_iid'])),
+    ('update_merge_request_note', 'Modify an existing merge request thread note', project({**MR_REF, 'discussion_id': s('The ID of a thread'), 'note_id': s('The ID of a thread note'), **NOTE, 'resolved': b('Resolve or unresolve the note')}, ['merge_request_iid', 'discussion_id', 'note_id'])),
+    ('create_merge_request_note', 'Add a new note to an existing merge request thread', project({**MR_REF, 'discussion_id': s('The ID of a thread'), **NOTE, 'created_at': s('Date the note was created at (ISO 8601 format)')}, ['merge_request_iid', 'discussion_id', 'body'])),
+    ('get_draft_note', 'Get a single draft note from a merge request', project({**MR_REF, 'draft_note_id': s('The ID of the draft note')}, ['merge_request_iid', 'draft_note_id'])),
+    ('list_draft_notes', 'List draft notes for a merge request', project(MR_REF, ['merge_request_iid'])),
+    ('create_draft_note', 'Create a draft note for a merge request', project({**MR_REF, **NOTE, 'position': position('position'), 'resolve_discussion': b('Whether to resolve the discussion when publishing')}, ['merge_request_iid', 'body'])),
+    ('update_draft_note', 'Update an existing draft note', project({**MR_REF, 'draft_note_id': s('The ID of the draft note'), **NOTE, 'position': position('position'), 'resolve_discussion': b('Whether to resolve the discussion when publishing')}, ['merge_request_iid', 'draft_note_id'])),
+    ('delete_draft_note', 'Delete a draft note', project({**MR_REF, 'draft_note_id': s('The ID of the draft note')}, ['merge_request_iid', 'draft_note_id'])),
+    ('publish_draft_note', 'Publish a single draft note', project({**MR_REF, 'draft_note_id': s('The ID of the draft note')}, ['merge_request_iid', 'draft_note_id'])),
+    ('bulk_publish_draft_notes', 'Publish all draft notes for a merge request', project(MR_REF, ['merge_request_iid'])),
+    ('update_issue_note', 'Modify an existing issue thread note', project({**ISSUE_REF, 'discussion_id': s('The ID of a thread'), 'note_id': s('The ID of a thread note'), **NOTE}, ['issue_iid', 'discussion_id', 'note_id', 'body'])),
+    ('create_issue_note', 'Add a new note to an existing issue thread', project({**ISSUE_REF, 'discussion_id': s('The ID of a thread'), **NOTE, 'created_at': s('Date the note was created at (ISO 8601 format)')}, ['issue_iid', 'discussion_id', 'body'])),
+    ('list_issues', 'List issues (default: created by current user only; use scope=all for all accessible issues)', project(LIST_ISSUES)),
+    ('my_issues', 'List issues assigned to the authenticated user (defaults to open issues)', schema({'project_id': {'type': 'string', 'description': 'Project ID or URL-encoded path (optional when GITLAB_PROJECT_ID is set)'}, **LIST_ISSUES})),
+    ('get_issue', 'Get details of a specific issue in a GitLab project', project(ISSUE_REF, ['issue_iid'])),
+    ('update_issue', 'Update an issue in a GitLab project', project({**ISSUE_REF, **ISSUE_FIELDS, 'state_event': {'type': 'string', 'enum': ['close', 'reopen']}, 'discussion_locked': b('Lock discussions'), 'weight': n('Weight of the issue (0-9)')}, ['issue_iid'])),
+    ('delete_issue', 'Delete an issue from a GitLab project', project(ISSUE_REF, ['issue_iid'])),
+    ('list_issue_links', 'List all issue links for a specific issue', project(ISSUE_REF, ['issue_iid'])),
+    ('list_issue_discussions', 'List discussions for an issue in a GitLab project', project({**ISSUE_REF, **PAGINATION}, ['issue_iid'])),
+    ('get_issue_link', 'Get a specific issue link', project({**ISSUE_REF, 'issue_link_id': s('ID of an issue relationship')}, ['issue_iid', 'issue_link_id'])),
+    ('create_issue_link', 'Create an issue link between two issues', project({**ISSUE_REF, 'target_project_id': s('The ID or URL-encoded path of a target project'), 'target_issue_iid': s('The internal ID of a target project issue'), 'link_type': {'type': 'string', 'enum': ['relates_to', 'blocks', 'is_blocked_by']}}, ['issue_iid', 'target_project_id', 'target_issue_iid'])),
+    ('delete_issue_link', 'Delete an issue link', project({**ISSUE_REF, 'issue_link_id': s('The ID of an issue relationship')}, ['issue_iid', 'issue_link_id'])),
+    ('list_namespaces', 'List all namespaces available to the current user', schema({'search': s('Search term for namespaces'), 'owned': b('Filter for namespaces owned by current user'), **PAGINATION})),
+    ('get_namespace', 'Get details of a namespace by ID or path', schema({'namespace_id': s('Namespace ID or full path')}, ['namespace_id'])),
+    ('verify_namespace', 'Verify if a namespace path exists', schema({'path': s('Namespace path to verify')}, ['path'])),
+    ('get_project', 'Get details of a specific project', project()),
+    ('list_projects', 'List projects accessible by the current user', schema({'search': s('Search term for projects'), 'search_namespaces': b('Needs to be true if search is full path'), 'owned': b('Filter for projects owned by current user'), 'membership': b('Filter for projects where current user is a member'), 'simple': b('Return only limited fields'), 'archived': b('Filter for archived projects'), 'visibility': {'type': 'string', 'enum': ['public', 'internal', 'private']}, 'order_by': {'type': 'string', 'enum': ['id', 'name', 'path', 'created_at', 'updated_at', 'last_activity_at']}, 'sort': {'type': 'string', 'enum': ['asc', 'desc']}, 'with_issues_enabled': b('Filter projects with issues feature enabled'), 'with_merge_requests_enabled': b('Filter projects with merge requests feature enabled'), 'min_access_level': n('Filter by minimum access level'), **PAGINATION})),
+    ('list_project_members', 'List members of a GitLab project', project({'query': s('Search for members by name or username'), 'user_ids': {'type': 'array', 'items': {'type': 'number'}}, 'skip_users': {'type': 'array', 'items': {'type': 'number'}}, 'include_inheritance': b('Include inherited members'), **PAGINATION})),
+    ('list_labels', 'List labels for a project', project({'with_counts': b('Whether or not to include issue and merge request counts'), 'include_ancestor_groups': b('Include ancestor groups'), 'search': s('Keyword to filter labels by')})),
+    ('get_label', 'Get a single label from a project', project({'label_id': {'type': ['number', 'string'], 'description': 'The ID or title of a project label'}, 'include_ancestor_groups': b('Include ancestor groups')}, ['label_id'])),
+    ('create_label', 'Create a new label in a project', project(LABEL, ['name', 'color'])),
+    ('update_label', 'Update an existing label in a project', project({'label_id': {'type': ['number', 'string']}, 'new_name': s('The new name of the label'), **LABEL}, ['label_id'])),
+    ('delete_label', 'Delete a label from a project', project({'label_id': {'type': ['number', 'string']}}, ['label_id'])),
+    ('list_group_projects', 'List projects in a GitLab group with filtering options', schema({'group_id': s('Group ID or path'), 'include_subgroups': b('Include projects from subgroups'), 'search': s('Search term to filter projects'), 'order_by': {'type': 'string', 'enum': ['name', 'path', 'created_at', 'updated_at', 'last_activity_at']}, 'sort': {'type': 'string', 'enum': ['asc', 'desc']}, 'archived': b('Filter for archived projects'), 'visibility': {'type': 'string', 'enum': ['public', 'internal', 'private']}, 'with_issues_enabled': b('Filter projects with issues feature enabled'), 'with_merge_requests_enabled': b('Filter projects with merge requests feature enabled'), 'min_access_level': n('Filter by minimum access level'), 'with_programming_language': s('Filter by programming language'), 'starred': b('Filter by starred projects'), 'statistics': b('Include project statistics'), 'with_custom_attributes': b('Include custom attributes'), 'with_security_reports': b('Include security reports'), **PAGINATION}, ['group_id'])),
+    ('list_wiki_pages', 'List wiki pages in a GitLab project', project({'with_content': b('Include content of the wiki pages'), **PAGINATION})),
+    ('get_wiki_page', 'Get details of a specific wiki page', project({'slug': WIKI['slug']}, ['slug'])),
+    ('create_wiki_page', 'Create a new wiki page in a GitLab project', project({k: WIKI[k] for k in ('title', 'content', 'format')}, ['title', 'content'])),
+    ('update_wiki_page', 'Update an existing wiki page in a GitLab project', project(WIKI, ['slug'])),
+    ('delete_wiki_page', 'Delete a wiki page from a GitLab project', project({'slug': WIKI['slug']}, ['slug'])),
+    ('get_repository_tree', 'Get the repository tree for a GitLab project (list files and directories)', project({'path': s('The path inside the repository'), 'ref': s('The name of a repository branch or tag'), 'recursive': b('Boolean value used to get a recursive tree'), 'per_page': n('Number of results to show per page'), 'page_token': s('The tree record ID for pagination'), 'pagination': s('Pagination method (keyset)')})),
+    ('list_pipelines', 'List pipelines in a GitLab project with filtering options', project({'scope': {'type': 'string', 'enum': ['running', 'pending', 'finished', 'branches', 'tags']}, 'status': {'type': 'string', 'enum': ['created', 'waiting_for_resource', 'preparing', 'pending', 'running', 'success', 'failed', 'canceled', 'skipped', 'manual', 'scheduled']}, 'ref': s('The ref of pipelines'), 'sha': s('The SHA of pipelines'), 'yaml_errors': b('Returns pipelines with invalid configurations'), 'username': s('The username of the user who triggered pipelines'), 'updated_after': DATE, 'updated_before': DATE, 'order_by': {'type': 'string', 'enum': ['id', 'status', 'ref', 'updated_at', 'user_id']}, 'sort': {'type': 'string', 'enum': ['asc', 'desc']}, **PAGINATION})),
+    ('get_pipeline', 'Get details of a specific pipeline in a GitLab project', project(PIPELINE, ['pipeline_id'])),
+    ('list_pipeline_jobs', 'List all jobs in a specific pipeline', project({**PIPELINE, 'scope': {'type': 'string', 'enum': ['created', 'pending', 'running', 'failed', 'success', 'canceled', 'skipped', 'manual']}, 'include_retried': b('Whether to include retried jobs'), **PAGINATION}, ['pipeline_id'])),
+    ('list_pipeline_trigger_jobs', 'List all trigger jobs (bridges) in a specific pipeline that trigger downstream pipelines', project({**PIPELINE, 'scope': {'type': 'string', 'enum': ['created', 'pending', 'running', 'failed', 'success', 'canceled', 'skipped', 'manual']}, **PAGINATION}, ['pipeline_id'])),
+    ('get_pipeline_job', 'Get details of a GitLab pipeline job number', project({'job_id': s('The ID of the job')}, ['job_id'])),
+    ('get_pipeline_job_output', 'Get the output/trace of a GitLab pipeline job with optional pagination to limit context window usage', project({'job_id': s('The ID of the job'), 'limit': n('Maximum number of lines to return from the end of the log'), 'offset': n('Number of lines to skip from the end of the log')}, ['job_id'])),
+    ('create_pipeline', 'Create a new pipeline for a branch or tag', project({'ref': s('The branch or tag to run the pipeline on'), 'variables': {'type': 'array', 'items': {'type': 'object', 'properties': {'key': s('The key of the variable'), 'value': s('The value of the variable')}, 'required': ['key', 'value'], 'additionalProperties': False}, 'description': 'An array of variables to use for the pipeline'}}, ['ref'])),
+    ('retry_pipeline', 'Retry a failed or canceled pipeline', project(PIPELINE, ['pipeline_id'])),
+    ('cancel_pipeline', 'Cancel a running pipeline', project(PIPELINE, ['pipeline_id'])),
+    ('list_merge_requests', 'List merge requests in a GitLab project with filtering options', project({'assignee_id': {'type': ['string', 'number']}, 'assignee_username': s('Returns merge requests assigned to the given username'), 'author_id': {'type': ['string', 'number']}, 'author_username': s('Returns merge requests created by the given username'), 'reviewer_id': {'type': ['string', 'number']}, 'reviewer_username': s('Returns merge requests which have the user as a reviewer'), 'created_after': DATE, 'created_before': DATE, 'updated_after': DATE, 'updated_before': DATE, 'labels': LABELS, 'milestone': s('Returns merge requests for a specific milestone'), 'scope': {'type': 'string', 'enum': ['created_by_me', 'assigned_to_me', 'all']}, 'search': s('Search for specific terms'), 'state': STATE, 'order_by': {'type': 'string', 'enum': ['created_at', 'updated_at', 'priority', 'label_priority', 'milestone_due', 'popularity']}, 'sort': {'type': 'string', 'enum': ['asc', 'desc']}, 'target_branch': s('Return merge requests with a specific target branch'), 'source_branch': s('Return merge requests with a specific source branch'), 'wip': {'type': 'string', 'enum': ['yes', 'no']}, 'with_labels_details': b('Return more details for each label'), **PAGINATION})),
+    ('list_milestones', 'List milestones in a GitLab project with filtering options', project({'iids': {'type': 'array', 'items': {'type': 'number'}}, 'state': {'type': 'string', 'enum': ['active', 'closed']}, 'title': s('Return only the milestones having the given title'), 'search': s('Return only milestones with a title or description matching the provided string'), 'include_ancestors': b('Include ancestor groups'), 'updated_before': DATE, 'updated_after': DATE, **PAGINATION})),
+    ('get_milestone', 'Get details of a specific milestone', project(MILESTONE, ['milestone_id'])),
+    ('create_milestone', 'Create a new milestone in a GitLab project', project({'title': s('The title of the milestone'), 'description': s('The description of the milestone'), 'due_date': DATE, 'start_date': DATE}, ['title'])),
+    ('edit_milestone', 'Edit an existing milestone in a GitLab project', project({**MILESTONE, 'title': s('The title of the milestone'), 'description': s('The description of the milestone'), 'due_date': DATE, 'start_date': DATE, 'state_event': {'type': 'string', 'enum': ['close', 'activate']}}, ['milestone_id'])),
+    ('delete_milestone', 'Delete a milestone from a GitLab project', project(MILESTONE, ['milestone_id'])),
+    ('get_milestone_issue', 'Get issues associated with a specific milestone', project(MILESTONE, ['milestone_id'])),
+    ('get_milestone_merge_requests', 'Get merge requests associated with a specific milestone', project({**MILESTONE, **PAGINATION}, ['milestone_id'])),
+    ('promote_milestone', 'Promote a milestone to the next stage', project(MILESTONE, ['milestone_id'])),
+    ('get_milestone_burndown_events', 'Get burndown events for a specific milestone', project({**MILESTONE, **PAGINATION}, ['milestone_id'])),
+    ('get_users', 'Get GitLab user details by usernames', schema({'usernames': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Array of usernames to search for'}}, ['usernames'])),
+    ('list_commits', 'List repository commits with filtering options', project({'ref_name': s('The name of a repository branch, tag or revision range'), 'since': s('Only commits after or on this date (ISO 8601)'), 'until': s('Only commits before or on this date (ISO 8601)'), 'path': s('The file path'), 'author': s('Search commits by commit author'), 'all': b('Retrieve every commit from the repository'), 'with_stats': b('Stats about each commit are added to the response'), 'first_parent': b('Follow only the first parent commit upon seeing a merge commit'), 'order': {'type': 'string', 'enum': ['default', 'topo']}, 'trailers': b('Parse and include Git trailers for every commit'), **PAGINATION})),
+    ('get_commit', 'Get details of a specific commit', project({'sha': s('The commit hash or name of a repository branch or tag'), 'stats': b('Include commit stats')}, ['sha'])),
+    ('get_commit_diff', 'Get changes/diffs of a specific commit', project({'sha': s('The commit hash or name of a repository branch or tag')}, ['sha'])),
+    ('list_group_iterations', 'List group iterations with filtering options', schema({'group_id': s('The ID or URL-encoded path of the group'), 'state': {'type': 'string', 'enum': ['opened', 'upcoming', 'current', 'closed', 'all']}, 'search': s('Return only iterations with a title matching the provided string'), 'in': {'type': 'array', 'items': {'type': 'string', 'enum': ['title', 'cadence.title']}}, 'include_ancestors': b('Include iterations for group and its ancestors'), 'include_descendants': b('Include iterations for group and its descendants'), 'updated_before': DATE, 'updated_after': DATE, **PAGINATION}, ['group_id'])),
+    ('upload_markdown', 'Upload a file to a GitLab project for use in markdown content', project({'file_path': s('Path to the file to upload')}, ['file_path'])),
+    ('download_attachment', 'Download an uploaded file from a GitLab project by secret and filename', project({'secret': s('The 32-character secret of the upload'), 'filename': s('The filename of the upload'), 'local_path': s('Local path to save the file')}, ['secret', 'filename'])),
+    ('list_events', 'List all events for the currently authenticated user', schema({'action': s('If defined, returns events with the specified action type'), 'target_type': {'type': 'string', 'enum': ['epic', 'issue', 'merge_request', 'milestone', 'note', 'project', 'snippet', 'user']}, 'before': DATE, 'after': DATE, 'scope': s("Include all events across a user's projects"), 'sort': {'type': 'string', 'enum': ['asc', 'desc']}, **PAGINATION})),
+    ('get_project_events', 'List all visible events for a specified project', project({'action': s('If defined, returns events with the specified action type'), 'target_type': {'type': 'string', 'enum': ['epic', 'issue', 'merge_request', 'milestone', 'note', 'project', 'snippet', 'user']}, 'before': DATE, 'after': DATE, 'sort': {'type': 'string', 'enum': ['asc', 'desc']}, **PAGINATION})),
+]
+
+
+def profile(name: str) -> Dict[str, float]:
+    """Typical latency (ms) & payload size (bytes) of a tool call through the real upstream, by kind of tool."""
+    if name in ('get_merge_request_diffs', 'list_merge_request_diffs', 'get_branch_diffs', 'get_commit_diff'):
+        return {'latency_ms': 250, 'payload_bytes': 48 * 1024}
+    if name == 'get_pipeline_job_output':
+        return {'latency_ms': 300, 'payload_bytes': 32 * 1024}
+    if name.startswith('list_') or name in ('search_repositories', 'my_issues', 'mr_discussions', 'get_repository_tree', 'get_project_events'):
+        return {'latency_ms': 180, 'payload_bytes': 16 * 1024}
+    if name == 'get_file_contents':
+        return {'latency_ms': 120, 'payload_bytes': 8 * 1024}
+    if name.startswith(('get_', 'verify_')):
+        return {'latency_ms': 90, 'payload_bytes': 3 * 1024}
+    return {'latency_ms': 220, 'payload_bytes': 2 * 1024}
+
+
+def tool_listing() -> Dict[str, Any]:
+    """{'tools': [tools/list entries], 'profiles': {tool name: {'latency_ms', 'payload_bytes'}}}"""
+    return {
+        'tools': [{'name': name, 'description': description, 'inputSchema': input_schema} for name, description, input_schema in TOOLS],
+        'profiles': {name: profile(name) for name, _, _ in TOOLS},
+    }
+
+
+def load_listing(path: str) -> Dict[str, Any]:
+    """A recorded listing (bench/record_upstream.py), profiles default by kind of tool when not recorded."""
+    with open(path, 'r') as f:
+        listing = json.load(f)
+    profiles = listing.setdefault('profiles', {})
+    for tool in listing['tools']:
+        profiles.setdefault(tool['name'], profile(tool['name']))
+    return listing
@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from urllib.parse import unquote
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from mcp.types import CallToolResult
+
+logger = logging.getLogger(__name__)
+
+# Idempotent upstream tools whose results may be served from the cache.
+READ_ONLY_TOOLS = frozenset([
+    'search_repositories', 'get_file_contents', 'get_merge_request', 'get_merge_request_diffs',
+    'list_merge_request_diffs', 'get_branch_diffs', 'mr_discussions', 'get_draft_note', 'list_draft_notes',
+    'list_issues', 'my_issues', 'get_issue', 'list_issue_links', 'list_issue_discussions', 'get_issue_link',
+    'list_namespaces', 'get_namespace', 'verify_namespace', 'get_project', 'list_projects',
+    'list_project_members', 'list_labels', 'get_label', 'list_group_projects', 'list_wiki_pages',
+    'get_wiki_page', 'get_repository_tree', 'list_pipelines', 'get_pipeline', 'list_pipeline_jobs',
+    'list_pipeline_trigger_jobs', 'get_pipeline_job', 'get_pipeline_job_output', 'list_merge_requests',
+    'list_milestones', 'get_milestone', 'get_milestone_issue', 'get_milestone_merge_requests',
+    'get_milestone_burndown_events', 'get_users', 'list_commits', 'get_commit', 'get_commit_diff',
+    'list_group_iterations', 'list_events', 'get_project_events',
+])
+
+# results of the shared cache kept decoded per process
+DECODED_MAX_ENTRIES = 256
+
+BRANCH_ARGS = ('branch', 'ref', 'source_branch', 'target_branch', 'from', 'to', 'sha')
+MR_ARGS = ('merge_request_iid', 'mergeRequestIid')
+
+
+def canonical_args(args: Optional[Dict[str, Any]]) -> str:
+    """Stable JSON for `args`: sorted keys, no whitespace, None values dropped."""
+    args = {k: v for k, v in (args or {}).items() if v is not None}
+    return json.dumps(args, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def cache_key(tool_name: str, args: Optional[Dict[str, Any]]) -> str:
+    return f'{tool_name}:{canonical_args(args)}'
+
+
+def project_of(project_id: Any) -> Optional[str]:
+    """`project_id` in one form per project: URL-decoded, without surrounding slashes, lower case (GitLab paths are case-insensitive)."""
+    if project_id is None:
+        return None
+    return unquote(str(project_id)).strip().strip('/').lower()
+
+
+def scope_of(args: Optional[Dict[str, Any]]) -> Tuple[Optional[str], frozenset, frozenset]:
+    """(project, branches, merge requests) touched by a call, used for invalidation."""
+    args = args or {}
+    branches = frozenset(str(args[k]) for k in BRANCH_ARGS if args.get(k) is not None)
+    mrs = frozenset(str(args[k]) for k in MR_ARGS if args.get(k) is not None)
+    return project_of(args.get('project_id')), branches, mrs
+
+
+def is_stale(entry_scope: Tuple[Optional[str], frozenset, frozenset], scope: Tuple[Optional[str], frozenset, frozenset]) -> bool:
+    """
+    Whether a cached result in `entry_scope` may be stale after a mutation in `scope`.
+    A numeric project id & a project path may name the same project: such a mismatch counts as the same project.
+    """
+    project, branches, mrs = scope
+    e_project, e_branches, e_mrs = entry_scope
+    if e_project is not None and project is not None and e_project != project and e_project.isdigit() == project.isdigit():
+        return False
+    # same project (or a project-less listing): keep only entries pinned to another branch / MR
+    if e_project is not None and project is not None:
+        if e_branches and branches and not (e_branches & branches):
+            return False
+        if e_mrs and mrs and not (e_mrs & mrs):
+            return False
+    return True
+
+
+def project_filter(project: str) -> str:
+    """SQL condition (one `?` parameter: `project`) on a `project` column, the stored scopes `is_stale` may match."""
+    other_form = "project GLOB '*[^0-9]*'" if project.isdigit() else "project NOT GLOB '*[^0-9]*'"
+    return f'(project = ? OR project IS NULL OR {other_form})'
+
+
+def result_size(res: Any) -> int:
+    """Approximate memory held by a CallToolResult (text/blob payloads dominate)."""
+    size = 0
+    for block in getattr(res, 'content', None) or []:
+        size += len(getattr(block, 'text', '') or getattr(block, 'data', '') or '')
+    return size + 256
+
+
+def is_error(res: Any) -> bool:
+    return res is None or isinstance(res, str) or bool(getattr(res, 'isError', False))
+
+
+class _Entry:
+    __slots__ = ('value', 'expires', 'size', 'scope', 'namespace')
+
+    def __init__(self, value: Any, expires: float, size: int, scope: Tuple[Optional[str], frozenset, frozenset], namespace: str = ''):
+        self.value = value
+        self.expires = expires
+        self.size = size
+        self.scope = scope
+        self.namespace = namespace
+
+
+class ResponseCache:
+    """
+    TTL + LRU-by-bytes cache of upstream tool results.
+    - Only tools in `read_only` are cached; any other tool is treated as mutating and,
+      once it succeeds, invalidates the entries in its project / branch / MR scope.
+    - Errors are never cached.
+    - One cache can be shared by several tenants, each in its own `namespace`.
+    """
+    ttl: float
+    max_bytes: int
+    read_only: frozenset
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    bytes: int
+    _entries: 'OrderedDict[str, _Entry]'
+
+    def __init__(self, ttl: float = 60.0, max_bytes: int = 64 * 1024 * 1024, read_only: Optional[Iterable[str]] = None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.read_only = frozenset(read_only) if read_only is not None else READ_ONLY_TOOLS
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+    def cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.read_only
+
+    def get(self, tool_name: str, args: Optional[Dict[str, Any]], namespace: str = '') -> Any:
+        key = namespace + cache_key(tool_name, args)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires < time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, tool_name: str, args: Optional[Dict[str, Any]], res: Any, namespace: str = ''):
+        if is_error(res):
+            return
+        size = result_size(res)
+        if size > self.max_bytes:
+            return
+        key = namespace + cache_key(tool_name, args)
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = _Entry(res, time.monotonic() + self.ttl, size, scope_of(args), namespace)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            old_key, _ = next(iter(self._entries.items()))
+            self._drop(old_key)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    def invalidate(self, args: Optional[Dict[str, Any]], namespace: str = ''):
+        """Drop entries a mutation with `args` may have made stale."""
+        scope = scope_of(args)
+        stale = [key for key, entry in self._entries.items() if entry.namespace == namespace and is_stale(entry.scope, scope)]
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    # what `CachedGitlabMCP` calls from the event loop
+
+    async def aget(self, tool_name: str, args: Optional[Dict[str, Any]], namespace: str = '') -> Any:
+        return self.get(tool_name, args, namespace)
+
+    async def aput(self, tool_name: str, args: Optional[Dict[str, Any]], res: Any, namespace: str = ''):
+        self.put(tool_name, args, res, namespace)
+
+    async def ainvalidate(self, args: Optional[Dict[str, Any]], namespace: str = ''):
+        self.invalidate(args, namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+        }
+
+
+class SharedResponseCache(ResponseCache):
+    """
+    `ResponseCache` kept in a `shared.SharedStore`, shared by the worker processes of the HTTP server
+    (so N workers don't each have a 1/N hit rate). Same TTL / LRU-by-bytes / invalidation rules.
+    Hit & miss counts are per process, entries & bytes over the store.
+    The async methods do the store I/O in a worker thread, results are decoded / encoded on the event loop.
+    """
+    shared: Any
+    _decoded: 'OrderedDict[Tuple[str, float], CallToolResult]'
+
+    def __init__(self, store: Any, ttl: float = 60.0, max_bytes: int = 64 * 1024 * 1024, read_only: Optional[Iterable[str]] = None):
+        super().__init__(ttl, max_bytes, read_only)
+        self.shared = store
+        # recently decoded results, by (key, expires): a hit on an unchanged entry skips the JSON parsing
+        self._decoded = OrderedDict()
+
+    def get(self, tool_name: str, args: Optional[Dict[str, Any]], namespace: str = '') -> Any:
+        key = namespace + cache_key(tool_name, args)
+        return self._hit(key, self.shared.get_response(key))
+
+    async def aget(self, tool_name: str, args: Optional[Dict[str, Any]], namespace: str = '') -> Any:
+        key = namespace + cache_key(tool_name, args)
+        return self._hit(key, await asyncio.to_thread(self.shared.get_response, key))
+
+    def _hit(self, key: str, row: Optional[Tuple[str, float]]) -> Any:
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value, expires = row
+        res = self._decoded.get((key, expires))
+        if res is None:
+            res = CallToolResult.model_validate_json(value)
+        self._remember(key, expires, res)
+        return res
+
+    def _remember(self, key: str, expires: float, res: CallToolResult):
+        self._decoded[(key, expires)] = res
+        self._decoded.move_to_end((key, expires))
+        while len(self._decoded) > DECODED_MAX_ENTRIES:
+            self._decoded.popitem(last=False)
+
+    def _row(self, tool_name: str, args: Optional[Dict[str, Any]], res: Any, namespace: str) -> Optional[Tuple[Any, ...]]:
+        """`put_response` arguments for `res`, None if it is not cached."""
+        if is_error(res):
+            return None
+        size = result_size(res)
+        if size > self.max_bytes:
+            return None
+        key = namespace + cache_key(tool_name, args)
+        return (key, namespace, scope_of(args), res.model_dump_json(by_alias=True, exclude_none=True),
+                size, time.time() + self.ttl, self.max_bytes)
+
+    def put(self, tool_name: str, args: Optional[Dict[str, Any]], res: Any, namespace: str = ''):
+        row = self._row(tool_name, args, res, namespace)
+        if row is not None:
+            self.evictions += self.shared.put_response(*row)
+            self._remember(row[0], row[5], res)
+
+    async def aput(self, tool_name: str, args: Optional[Dict[str, Any]], res: Any, namespace: str = ''):
+        row = self._row(tool_name, args, res, namespace)
+        if row is not None:
+            self.evictions += await asyncio.to_thread(self.shared.put_response, *row)
+            self._remember(row[0], row[5], res)
+
+    def _drop_stale(self, args: Optional[Dict[str, Any]], namespace: str) -> int:
+        scope = scope_of(args)
+        stale = [key for key, entry_scope in self.shared.response_scopes(namespace, scope[0]) if is_stale(entry_scope, scope)]
+        if stale:
+            self.shared.drop_responses(stale)
+        return len(stale)
+
+    def invalidate(self, args: Optional[Dict[str, Any]], namespace: str = ''):
+        self.invalidations += self._drop_stale(args, namespace)
+
+    async def ainvalidate(self, args: Optional[Dict[str, Any]], namespace: str = ''):
+        self.invalidations += await asyncio.to_thread(self._drop_stale, args, namespace)
+
+    def clear(self):
+        self.shared.clear_responses()
+        self._decoded.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats['entries'], stats['bytes'] = self.shared.response_stats()
+        return stats
+
+
+class CachedGitlabMCP:
+    """Read-through cache in front of a `GitlabMCP` (or pool); everything else is delegated."""
+    upstream: Any
+    cache: ResponseCache
+    namespace: str
+
+    def __init__(self, upstream: Any, cache: ResponseCache, namespace: str = ''):
+        self.upstream = upstream
+        self.cache = cache
+        self.namespace = namespace
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.upstream, name)
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        if self.cache.cacheable(tool_name):
+            res = await self.cache.aget(tool_name, args, self.namespace)
+            if res is not None:
+                logger.debug(f'cache hit: {tool_name}')
+                return res
+            res = await self.upstream.call_tool(tool_name, args)
+            await self.cache.aput(tool_name, args, res, self.namespace)
+            return res
+        res = await self.upstream.call_tool(tool_name, args)
+        if not is_error(res):
+            await self.cache.ainvalidate(args, self.namespace)
+        return res
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+def response_cache_from_env(store: Any = None) -> Optional[ResponseCache]:
+    """A `ResponseCache` (kept in `store`, a `shared.SharedStore`, if given), None if RESPONSE_CACHE_TTL is 0."""
+    ttl = float(os.environ.get('RESPONSE_CACHE_TTL', '60'))
+    if ttl <= 0:
+        return None
+    tools = os.environ.get('RESPONSE_CACHE_TOOLS')
+    settings = dict(
+        ttl=ttl,
+        max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+        read_only=[t.strip() for t in tools.split(',') if t.strip()] if tools else None,
+    )
+    return SharedResponseCache(store, **settings) if store is not None else ResponseCache(**settings)
+
+
+def cache_from_env(upstream: Any, cache: Optional[ResponseCache] = None, namespace: str = '') -> Any:
+    """Wrap `upstream` in a `CachedGitlabMCP` (on `cache` if given) unless RESPONSE_CACHE_TTL is 0."""
+    cache = cache or response_cache_from_env()
+    if cache is None:
+        return upstream
+    return CachedGitlabMCP(upstream, cache, namespace)
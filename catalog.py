@@ -0,0 +1,214 @@
+import os
+import json
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Tuple, FrozenSet
+from mcp.types import Tool
+from utils2 import jsonConv
+from server import tools_signature
+
+logger = logging.getLogger(__name__)
+
+EMPTY_SCHEMA = {'type': 'object', 'properties': {}, 'required': []}
+
+# upstream tool lists (one per tenant / pool member) remembered as equal to the built one
+MAX_EQUAL_SOURCES = 64
+
+
+def schema_hash(schema: Optional[Dict[str, Any]]) -> str:
+    """Content hash of an upstream inputSchema (key order independent)."""
+    raw = json.dumps(schema or {}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def tools_diff(old: List[Tool], new: List[Tool]) -> Dict[str, List[str]]:
+    """Names of the tools added, removed & changed (description or schema) from `old` to `new`."""
+    before = {t.name: t for t in old}
+    after = {t.name: t for t in new}
+    return {
+        'added': [name for name in after if name not in before],
+        'removed': [name for name in before if name not in after],
+        'changed': [name for name, t in after.items() if name in before and (
+            t.description != before[name].description or t.inputSchema != before[name].inputSchema)],
+    }
+
+
+class SchemaCatalog:
+    """
+    Converts upstream tool schemas once and serves prebuilt mcp Tool objects.
+    - Converted schemas are memoized by the content hash of the upstream inputSchema,
+      so an unchanged schema is never run through jsonConv twice.
+    - The built listing is reused for any upstream list with the same content (`tools_signature`): the tenants
+      & pool members each have their own list object.
+    - The catalog can be snapshotted to disk so a restarted server can answer
+      tools/list before the upstream npx child is up.
+    - With a `shared.SharedStore`, converted schemas are shared by the HTTP worker processes.
+    - `refresh` rebuilds from a changed upstream list (notifications/tools/list_changed): only the
+      new / changed schemas are converted, the last change to the served listing is kept in `last_diff`.
+    - The upstream schemas are kept next to the converted ones (`upstream_schemas`, by tool name) to check
+      calls against (validate.py).
+    """
+    snapshot_path: Optional[str]
+    shared: Any
+    tools: List[Tool]
+    upstream_schemas: Dict[str, Dict[str, Any]]
+    last_diff: Dict[str, List[str]]
+    refreshes: int
+    _converted: Dict[str, Dict[str, Any]]
+    _source: Optional[List[Any]]
+    _signature: Optional[List[Any]]
+    _equal: List[List[Any]]
+    _names: Tuple[Optional[List[Tool]], FrozenSet[str]]
+
+    def __init__(self, snapshot_path: Optional[str] = None, shared: Any = None):
+        self.snapshot_path = snapshot_path
+        self.shared = shared
+        self.tools = []
+        self.upstream_schemas = {}
+        self.last_diff = {}
+        self.refreshes = 0
+        self._converted = {}
+        self._source = None
+        self._signature = None
+        self._equal = []
+        self._names = (None, frozenset())
+
+    def knows(self, tool_name: str) -> bool:
+        """Whether `tool_name` is one of the served upstream tools."""
+        tools, names = self._names
+        if tools is not self.tools:
+            names = frozenset(t.name for t in self.tools)
+            self._names = (self.tools, names)
+        return tool_name in names
+
+    def convert(self, schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not schema:
+            return EMPTY_SCHEMA
+        key = schema_hash(schema)
+        if key not in self._converted:
+            converted = self.shared.get_schema(key) if self.shared is not None else None
+            if converted is None:
+                converted = jsonConv(schema)
+                if self.shared is not None:
+                    self.shared.put_schema(key, converted)
+            self._converted[key] = converted
+        return self._converted[key]
+
+    def _built(self, upstream_tools: List[Any]) -> bool:
+        """Whether the current build is of `upstream_tools`: the same list, or another upstream's list with the same content."""
+        if not self.tools or self._signature is None:
+            return False
+        if upstream_tools is self._source or any(upstream_tools is source for source in self._equal):
+            return True
+        if tools_signature(upstream_tools) != self._signature:
+            return False
+        self._equal.append(upstream_tools)
+        del self._equal[:-MAX_EQUAL_SOURCES]
+        return True
+
+    def build(self, upstream_tools: List[Any]) -> List[Tool]:
+        """Return Tool objects for `upstream_tools`, reusing the previous build if the list (or its content) is unchanged."""
+        if self._built(upstream_tools):
+            return self.tools
+        n_converted = len(self._converted)
+        res = []
+        schemas = {}
+        for i, tool in enumerate(upstream_tools):
+            name = tool.name
+            if not name:
+                continue
+            if tool.inputSchema:
+                schemas[name] = tool.inputSchema
+            try:
+                ipS = self.convert(tool.inputSchema)
+            except Exception as e:
+                logger.warning(f'Oops {i} \n{tool}\n{"_"*40}: {e}')
+                ipS = EMPTY_SCHEMA
+            res.append(Tool(name=name, description=tool.description, inputSchema=ipS))
+        diff = tools_diff(self.tools, res)
+        changed = (len(self._converted) != n_converted or any(diff.values()) or [t.name for t in res] != [t.name for t in self.tools]
+                   or schemas.keys() != self.upstream_schemas.keys())
+        self.tools = res
+        self.upstream_schemas = schemas
+        self._source = upstream_tools
+        self._signature = tools_signature(upstream_tools)
+        self._equal = []
+        if any(diff.values()):
+            self.last_diff = diff
+        logger.info(f'catalog built: {len(res)} tools, {len(self._converted) - n_converted} converted, '
+                    f'{len(diff["added"])} added, {len(diff["removed"])} removed, {len(diff["changed"])} changed')
+        if changed:
+            self.save_snapshot()
+        return res
+
+    def refresh(self, upstream_tools: List[Any]) -> bool:
+        """Rebuild from a new upstream tool list, True if the served listing changed."""
+        if self._built(upstream_tools):
+            # already built (a tools/list got there first, or another tenant's upstream)
+            return False
+        served = self.tools
+        self.build(upstream_tools)
+        self.refreshes += 1
+        # forget the conversions of schemas no tool has anymore
+        used = {schema_hash(t.inputSchema) for t in upstream_tools if t.inputSchema}
+        self._converted = {k: v for k, v in self._converted.items() if k in used}
+        return any(tools_diff(served, self.tools).values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tools': len(self.tools),
+            'converted_schemas': len(self._converted),
+            'refreshes': self.refreshes,
+            'last_added': len(self.last_diff.get('added', [])),
+            'last_removed': len(self.last_diff.get('removed', [])),
+            'last_changed': len(self.last_diff.get('changed', [])),
+        }
+
+    def load_snapshot(self) -> bool:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                data = json.load(f)
+            self._converted = data.get('schemas', {})
+            self.tools = [Tool(**t) for t in data.get('tools', [])]
+            self.upstream_schemas = data.get('upstream_schemas', {})
+            logger.info(f'catalog snapshot loaded: {len(self.tools)} tools from {self.snapshot_path}')
+            return True
+        except Exception as e:
+            logger.warning(f'Could not load catalog snapshot {self.snapshot_path}: {e}')
+            self._converted = {}
+            self.tools = []
+            self.upstream_schemas = {}
+            return False
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        data = {
+            'tools': [t.model_dump(exclude_none=True) for t in self.tools],
+            'schemas': self._converted,
+            'upstream_schemas': self.upstream_schemas,
+        }
+        # per process: the HTTP workers may save at the same time
+        tmp = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f'Could not save catalog snapshot {self.snapshot_path}: {e}')
+
+    async def list_tools(self, gitlabMCP: Any) -> List[Tool]:
+        """Serve the snapshot while upstream is still starting, otherwise the (memoized) live build."""
+        if not gitlabMCP.is_conn and not gitlabMCP.ready.is_set() and self.tools:
+            logger.info(f'list_tools: serving {len(self.tools)} tools from snapshot')
+            return self.tools
+        tools = await gitlabMCP.get_tools()
+        if not tools:
+            return self.tools
+        return self.build(tools)
+
+
+def default_catalog(shared: Any = None) -> SchemaCatalog:
+    return SchemaCatalog(os.environ.get('TOOL_CATALOG_PATH', './tool_catalog.json') or None, shared)
@@ -0,0 +1,60 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Iterable
+from cache import READ_ONLY_TOOLS, cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingGitlabMCP:
+    """
+    Singleflight in front of a `GitlabMCP` (or pool): identical concurrent calls
+    (same tool & canonical args) share one upstream call, its result and its error.
+    - Only idempotent tools are coalesced, mutating calls always go upstream.
+    - The shared call runs in its own task, so a cancelled caller doesn't cancel the others.
+    """
+    upstream: Any
+    coalesced_tools: frozenset
+    calls: int
+    deduplicated: int
+    _inflight: Dict[str, asyncio.Task]
+
+    def __init__(self, upstream: Any, coalesced_tools: Optional[Iterable[str]] = None):
+        self.upstream = upstream
+        self.coalesced_tools = frozenset(coalesced_tools) if coalesced_tools is not None else READ_ONLY_TOOLS
+        self.calls = 0
+        self.deduplicated = 0
+        self._inflight = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.upstream, name)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        if tool_name not in self.coalesced_tools:
+            return await self.upstream.call_tool(tool_name, args)
+        self.calls += 1
+        key = cache_key(tool_name, args)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self.upstream.call_tool(tool_name, args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.deduplicated += 1
+            logger.debug(f'coalesced: {tool_name}')
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'calls': self.calls, 'deduplicated': self.deduplicated, 'inflight': len(self._inflight)}
+
+
+def coalesce_from_env(upstream: Any) -> Any:
+    """Wrap `upstream` in a `CoalescingGitlabMCP` unless COALESCE_CALLS is 'false'."""
+    if os.environ.get('COALESCE_CALLS', 'true').lower() == 'false':
+        return upstream
+    return CoalescingGitlabMCP(upstream)
@@ -0,0 +1,147 @@
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from mcp.types import TextContent, CallToolResult
+
+logger = logging.getLogger(__name__)
+
+# Purely cosmetic fields, dropped at any depth (COMPACTION_CONFIG `deny` adds more).
+DEFAULT_DENY = frozenset(['avatar_url', '_links'])
+
+# Nested user objects (author, assignees, ...) are reduced to these fields.
+USER_FIELDS = ('id', 'username', 'name')
+
+LIST_MAX_ITEMS = 50
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token for JSON), good enough to compare sizes."""
+    return (len(text) + 3) // 4
+
+
+def compact_dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def _is_user(value: Dict[str, Any]) -> bool:
+    return 'username' in value and ('avatar_url' in value or 'state' in value or 'web_url' in value)
+
+
+class CompactionRule:
+    """
+    How the JSON result of one tool is compacted.
+    - `allow`: fields kept on the result object / on each item of a result array (None = all).
+    - `deny`: fields dropped at any depth.
+    - `max_items`: result arrays are cut to this many items (0 = no limit), the rest stays
+      available through a "more_available" cursor.
+    - `compact_users`: user objects nested in the result (author, assignees, ...) are reduced to USER_FIELDS,
+      the result object / items themselves never are.
+    """
+    allow: Optional[frozenset]
+    deny: frozenset
+    max_items: int
+    compact_users: bool
+
+    def __init__(self, allow: Optional[Iterable[str]] = None, deny: Iterable[str] = DEFAULT_DENY, max_items: int = 0, compact_users: bool = True):
+        self.allow = frozenset(allow) if allow is not None else None
+        self.deny = frozenset(deny)
+        self.max_items = max_items
+        self.compact_users = compact_users
+
+    def merged(self, config: Dict[str, Any]) -> 'CompactionRule':
+        """This rule overridden by a config entry: allow/max_items/compact_users replace, deny/keep adjust."""
+        deny = (self.deny | frozenset(config.get('deny', []))) - frozenset(config.get('keep', []))
+        return CompactionRule(
+            allow=config.get('allow', self.allow),
+            deny=deny,
+            max_items=config.get('max_items', self.max_items),
+            compact_users=config.get('compact_users', self.compact_users),
+        )
+
+    def _value(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if self.compact_users and _is_user(value):
+                return {k: value[k] for k in USER_FIELDS if k in value}
+            return {k: self._value(v) for k, v in value.items() if k not in self.deny and v is not None}
+        if isinstance(value, list):
+            return [self._value(v) for v in value]
+        return value
+
+    def _item(self, value: Any) -> Any:
+        if not isinstance(value, dict):
+            return self._value(value)
+        if self.allow is not None:
+            value = {k: v for k, v in value.items() if k in self.allow}
+        return {k: self._value(v) for k, v in value.items() if k not in self.deny and v is not None}
+
+    def apply(self, value: Any) -> Tuple[Any, List[Any]]:
+        """Compacted `value` and the items cut off by `max_items`."""
+        if isinstance(value, list):
+            rest = value[self.max_items:] if self.max_items else []
+            kept = value[:self.max_items] if self.max_items else value
+            return [self._item(v) for v in kept], rest
+        return self._item(value), []
+
+
+class Compactor:
+    """Per tool compaction of upstream JSON results (non JSON / error results pass through)."""
+    default: CompactionRule
+    rules: Dict[str, CompactionRule]
+    disabled: frozenset
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.default = CompactionRule().merged(config.get('default', {}))
+        self.rules = {}
+        for name, tool_config in config.get('tools', {}).items():
+            self.rules[name] = self.default.merged(tool_config)
+        self.disabled = frozenset(config.get('disabled', []))
+
+    def rule(self, tool_name: str) -> CompactionRule:
+        if tool_name not in self.rules:
+            rule = self.default
+            if tool_name.startswith('list_') or tool_name in ('search_repositories', 'my_issues', 'mr_discussions'):
+                rule = rule.merged({'max_items': LIST_MAX_ITEMS})
+            if 'user' in tool_name or 'member' in tool_name:
+                # their results are the users: every field of them is the answer
+                rule = rule.merged({'compact_users': False})
+            self.rules[tool_name] = rule
+        return self.rules[tool_name]
+
+    async def compact(self, tool_name: str, res: Any, pager: Any = None) -> Any:
+        if tool_name in self.disabled or not isinstance(res, CallToolResult) or res.isError:
+            return res
+        rule = self.rule(tool_name)
+        content = []
+        for block in res.content:
+            if not isinstance(block, TextContent) or block.text[:1] not in ('{', '['):
+                content.append(block)
+                continue
+            try:
+                value = json.loads(block.text)
+            except ValueError:
+                content.append(block)
+                continue
+            value, rest = rule.apply(value)
+            if rest:
+                more: Dict[str, Any] = {'shown': len(value), 'total': len(value) + len(rest)}
+                cursor = await pager.store(compact_dumps([rule._item(v) for v in rest])) if pager is not None else None
+                if cursor is not None:
+                    more['cursor'] = cursor
+                    more['hint'] = 'call read_result_page with result_id=<cursor>, page=1 for the remaining items'
+                value = {'items': value, 'more_available': more}
+            content.append(TextContent(type='text', text=compact_dumps(value)))
+        return CallToolResult(content=content, isError=res.isError)
+
+
+def compactor_from_env() -> Optional[Compactor]:
+    """A `Compactor` configured by the JSON file at COMPACTION_CONFIG if COMPACTION is 'true', else None."""
+    if os.environ.get('COMPACTION', 'false').lower() != 'true':
+        return None
+    path = os.environ.get('COMPACTION_CONFIG')
+    config = {}
+    if path:
+        with open(path, 'r') as f:
+            config = json.load(f)
+    return Compactor(config)
@@ -0,0 +1,220 @@
+import time
+import logging
+import functools
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# upstream seconds spent for the downstream request being served (see `instrument_call_tool`)
+_upstream_seconds: ContextVar[Optional[List[float]]] = ContextVar('_upstream_seconds', default=None)
+
+# tool names clients send are arbitrary: only the known ones get their own `tool` label (see `known_tools`)
+OTHER_TOOL = 'other'
+_known_tool: Optional[Callable[[str], bool]] = None
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[Any, ...]) -> str:
+    if not names:
+        return ''
+    inner = ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return '{' + inner + '}'
+
+
+def known_tools(known: Callable[[str], bool]):
+    """Set which tool names are labelled as is (the catalog's & the server's own tools), the others are counted as 'other'."""
+    global _known_tool
+    _known_tool = known
+
+
+def tool_label(tool_name: str) -> str:
+    if _known_tool is None or _known_tool(tool_name):
+        return tool_name
+    return OTHER_TOOL
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[Tuple[Any, ...], float] = {}
+
+    def inc(self, *labels: Any, value: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{_labels(self.labels, k)} {v}' for k, v in self.values.items()]
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {','.join(map(str, k)) or '_': v for k, v in self.values.items()}
+
+
+class Gauge(Counter):
+    def set(self, *labels: Any, value: float):
+        self.values[labels] = value
+
+    def dec(self, *labels: Any, value: float = 1.0):
+        self.inc(*labels, value=-value)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per bucket counts (+Inf last), sum, count]
+        self.values: Dict[Tuple[Any, ...], List[Any]] = {}
+
+    def observe(self, *labels: Any, value: float):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for k, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, c in zip((*self.buckets, '+Inf'), counts):
+                cumulative += c
+                le = _labels((*self.labels, 'le'), (*k, bound))
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, k)} {total}')
+            lines.append(f'{self.name}_count{_labels(self.labels, k)} {count}')
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {','.join(map(str, k)) or '_': {'count': count, 'sum': total} for k, (_, total, count) in self.values.items()}
+
+
+class Registry:
+    """Minimal in-process metrics registry, rendered in the Prometheus text format."""
+    metrics: Dict[str, Any]
+    _collectors: List[Tuple[str, Callable[[], Dict[str, Any]]]]
+
+    def __init__(self):
+        self.metrics = {}
+        self._collectors = []
+
+    def add(self, metric: Any) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def watch(self, gitlabMCP: Any):
+        """Export the stats() of every layer (cache, coalescing, pool, ...) of a wrapped GitlabMCP."""
+        layer = gitlabMCP
+        while layer is not None:
+            stats = getattr(type(layer), 'stats', None)
+            if stats is not None:
+                self._collectors.append((type(layer).__name__, layer.stats))
+            layer = layer.__dict__.get('upstream')
+
+    def _collected(self) -> List[Tuple[str, str, float]]:
+        out = []
+        for layer, stats in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    out.append((layer, key, value))
+        return out
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        collected = self._collected()
+        if collected:
+            lines += ['# HELP gitlab_mcp_layer_stat Stats of the wrapper layers (cache, coalescing, pool)', '# TYPE gitlab_mcp_layer_stat gauge']
+            lines += [f'gitlab_mcp_layer_stat{_labels(("layer", "stat"), (layer, key))} {value}' for layer, key, value in collected]
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain dict of every metric, the in-process API (eg: for the stdio server)."""
+        out: Dict[str, Any] = {name: metric.snapshot() for name, metric in self.metrics.items()}
+        for layer, key, value in self._collected():
+            out.setdefault('layers', {}).setdefault(layer, {})[key] = value
+        return out
+
+
+REGISTRY = Registry()
+TOOL_CALLS = REGISTRY.add(Counter('gitlab_mcp_tool_calls_total', 'Tool calls by outcome', ('tool', 'outcome')))
+TOOL_SECONDS = REGISTRY.add(Histogram('gitlab_mcp_tool_seconds', 'Total call_tool handler time', ('tool',)))
+UPSTREAM_SECONDS = REGISTRY.add(Histogram('gitlab_mcp_upstream_seconds', 'Time waiting on the upstream child', ('tool',)))
+OVERHEAD_SECONDS = REGISTRY.add(Histogram('gitlab_mcp_overhead_seconds', 'Wrapper time (schema, compaction, serialization) per call', ('tool',)))
+RESULT_BYTES = REGISTRY.add(Histogram('gitlab_mcp_result_bytes', 'Size of the text returned to the client', ('tool',), SIZE_BUCKETS))
+LIST_TOOLS_SECONDS = REGISTRY.add(Histogram('gitlab_mcp_list_tools_seconds', 'list_tools handler time'))
+INFLIGHT = REGISTRY.add(Gauge('gitlab_mcp_inflight_calls', 'Tool calls being served'))
+UPSTREAM_ERRORS = REGISTRY.add(Counter('gitlab_mcp_upstream_errors_total', 'Upstream call failures', ('tool', 'kind')))
+UPSTREAM_CONNECTS = REGISTRY.add(Counter('gitlab_mcp_upstream_connects_total', 'Upstream child (re)connections', ('outcome',)))
+UPSTREAM_RESTARTS = REGISTRY.add(Counter('gitlab_mcp_upstream_restarts_total', 'Dead upstream children replaced'))
+RATE_LIMITED = REGISTRY.add(Counter('gitlab_mcp_rate_limited_total', 'Calls answered with a rate_limited error, by limiting scope', ('scope',)))
+
+
+def observe_upstream(tool_name: str, seconds: float):
+    UPSTREAM_SECONDS.observe(tool_label(tool_name), value=seconds)
+    acc = _upstream_seconds.get()
+    if acc is not None:
+        acc[0] += seconds
+
+
+def instrument_call_tool(func: Callable) -> Callable:
+    """Wrap a server `call_tool(name, arguments)` handler with call/latency/size metrics."""
+    @functools.wraps(func)
+    async def wrapper(name: str, arguments: Dict[str, Any]) -> Any:
+        label = tool_label(name)
+        acc = [0.0]
+        token = _upstream_seconds.set(acc)
+        INFLIGHT.inc()
+        start = time.perf_counter()
+        outcome = 'exception'
+        try:
+            res = await func(name, arguments)
+            outcome = 'error' if getattr(res, 'isError', False) else 'ok'
+            size = sum(len(getattr(block, 'text', '') or '') for block in getattr(res, 'content', None) or [])
+            RESULT_BYTES.observe(label, value=size)
+            return res
+        finally:
+            elapsed = time.perf_counter() - start
+            INFLIGHT.dec()
+            _upstream_seconds.reset(token)
+            TOOL_CALLS.inc(label, outcome)
+            TOOL_SECONDS.observe(label, value=elapsed)
+            OVERHEAD_SECONDS.observe(label, value=max(0.0, elapsed - acc[0]))
+    return wrapper
+
+
+def instrument_list_tools(func: Callable) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            LIST_TOOLS_SECONDS.observe(value=time.perf_counter() - start)
+    return wrapper
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def snapshot() -> Dict[str, Any]:
+    return REGISTRY.snapshot()
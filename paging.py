@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, AsyncGenerator, Deque
+from mcp.types import Tool, TextContent, CallToolResult
+from results import as_result
+from server import upstream_progress
+
+logger = logging.getLogger(__name__)
+
+CONTINUE_TOOL_NAME = 'continue_list'
+
+CONTINUE_TOOL = Tool(
+    name=CONTINUE_TOOL_NAME,
+    description=(
+        'Get the next page of a list tool result (list_merge_requests, list_issues, ...). Pages that have more '
+        'results end with a continue token to use here, the following pages are already being fetched.'
+    ),
+    inputSchema={
+        'type': 'object',
+        'properties': {'continue': {'type': 'string', 'description': 'continue token given at the end of the previous page'}},
+        'required': ['continue'],
+    },
+)
+
+# GitLab default page size, used to tell a last (short) page when the total is unknown
+DEFAULT_PER_PAGE = 20
+# page size of the Python iterator (GitLab max)
+ITER_PER_PAGE = 100
+
+
+def is_paginated(tool_name: str) -> bool:
+    return tool_name.startswith('list_') or tool_name in ('search_repositories', 'my_issues')
+
+
+class PaginationError(Exception):
+    def __init__(self, tool_name: str, page: int, res: Any):
+        text = '\n'.join(getattr(b, 'text', '') for b in as_result(res).content)
+        super().__init__(f'{tool_name} page {page} failed: {text}')
+        self.tool_name = tool_name
+        self.page = page
+
+
+class Page:
+    """One fetched page: the raw result, its items (None on errors) & the total pages if known."""
+    number: int
+    result: Any
+    items: Optional[List[Any]]
+    size: int
+    total_pages: Optional[int]
+    last: bool
+
+    def __init__(self, number: int, result: Any, per_page: int):
+        self.number = number
+        self.result = result
+        self.items = None
+        self.size = 0
+        self.total_pages = None
+        self.last = True
+        if not isinstance(result, CallToolResult) or result.isError:
+            return
+        pagination = (result.meta or {}).get('pagination') or {}
+        self.total_pages = pagination.get('total_pages')
+        text = ''.join(b.text for b in result.content if isinstance(b, TextContent))
+        self.size = len(text)
+        try:
+            value = json.loads(text)
+        except ValueError:
+            self.items = [text]
+            return
+        if isinstance(value, dict) and isinstance(value.get('items'), list):
+            value = value['items']
+        if not isinstance(value, list):
+            # not a list endpoint after all
+            self.items = [value]
+            return
+        self.items = value
+        if self.total_pages is not None:
+            self.last = number >= self.total_pages
+        elif 'next_page' in pagination:
+            self.last = False
+        else:
+            self.last = len(value) < per_page
+
+
+class _Stream:
+    gitlabMCP: Any
+    tool_name: str
+    pages: AsyncGenerator[Page, None]
+    next_page: int
+    last: Optional[Page]
+    expires: float
+    lock: asyncio.Lock
+
+    def __init__(self, gitlabMCP: Any, tool_name: str, pages: AsyncGenerator[Page, None], ttl: float):
+        self.gitlabMCP = gitlabMCP
+        self.tool_name = tool_name
+        self.pages = pages
+        self.next_page = 0
+        self.last = None
+        self.expires = time.monotonic() + ttl
+        self.lock = asyncio.Lock()
+
+
+class Paginator:
+    """
+    Pagination engine for the list tools.
+    - Once a page shows there is more (X-Total-Pages from the REST backend, else a full page), the next page
+      & up to `prefetch` more are started before that page is handed out, so they load while it is consumed.
+    - Pages fetched ahead are bounded by `max_buffer_bytes` (over all streams), past it pages are only
+      fetched on demand.
+    - Python callers: `async for item in paginator.iterate(gitlabMCP, 'list_issues', args)`.
+    - MCP clients: `call` returns the first page with a continue token, `resume` the following pages
+      (the `continue_list` tool). Streams are kept (at most `max_streams`) for `ttl` seconds.
+    - With a `shared.SharedStore`, streams are recorded there too: a worker process given the continue token
+      of a list read on another worker picks the list up at that page.
+    """
+    prefetch: int
+    max_buffer_bytes: int
+    max_streams: int
+    ttl: float
+    buffered: int
+    prefetched: int
+    shared: Any
+    _streams: 'OrderedDict[str, _Stream]'
+
+    def __init__(self, prefetch: int = 2, max_buffer_bytes: int = 16 * 1024 * 1024, max_streams: int = 32, ttl: float = 600.0,
+                 shared: Any = None):
+        self.prefetch = max(0, prefetch)
+        self.max_buffer_bytes = max_buffer_bytes
+        self.max_streams = max_streams
+        self.ttl = ttl
+        self.buffered = 0
+        self.prefetched = 0
+        self.shared = shared
+        self._streams = OrderedDict()
+
+    async def _fetch(self, gitlabMCP: Any, tool_name: str, args: Dict[str, Any], number: int, per_page: int, ahead: bool) -> Page:
+        if ahead:
+            # runs past the request that started it, don't report progress to that request
+            upstream_progress.set(None)
+        page = Page(number, await gitlabMCP.call_tool(tool_name, {**args, 'page': number}), per_page)
+        if ahead:
+            self.buffered += page.size
+        return page
+
+    async def pages(self, gitlabMCP: Any, tool_name: str, args: Dict[str, Any]) -> AsyncGenerator[Page, None]:
+        """Every page of `tool_name` from args['page'] (default 1) on, later pages prefetched."""
+        per_page = int(args.get('per_page') or DEFAULT_PER_PAGE)
+        number = int(args.get('page') or 1)
+        page = await self._fetch(gitlabMCP, tool_name, args, number, per_page, False)
+        total_pages = page.total_pages
+        pending: Deque[Tuple[int, asyncio.Task]] = deque()
+        try:
+            while True:
+                if not page.last:
+                    ahead = page.number + 1 + len(pending)
+                    # before handing the page out: the next page always in flight, more while the buffer allows it
+                    while (not pending or (len(pending) <= self.prefetch and self.buffered < self.max_buffer_bytes)) \
+                            and (total_pages is None or ahead <= total_pages):
+                        pending.append((ahead, asyncio.create_task(self._fetch(gitlabMCP, tool_name, args, ahead, per_page, True))))
+                        self.prefetched += 1
+                        ahead += 1
+                yield page
+                if page.last:
+                    return
+                _, task = pending.popleft()
+                previous, page = page, await task
+                self.buffered -= page.size
+                if page.items and previous.items and page.items[0] == previous.items[0]:
+                    # the tool ignores `page`: same items again
+                    return
+        finally:
+            for _, task in pending:
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    self.buffered -= task.result().size
+                else:
+                    task.cancel()
+
+    async def iterate(self, gitlabMCP: Any, tool_name: str, args: Dict[str, Any]) -> AsyncIterator[Any]:
+        """Every item of every page, raises `PaginationError` if a page fails."""
+        pages = self.pages(gitlabMCP, tool_name, {'per_page': ITER_PER_PAGE, **args})
+        try:
+            async for page in pages:
+                if page.items is None:
+                    raise PaginationError(tool_name, page.number, page.result)
+                for item in page.items:
+                    yield item
+        finally:
+            await pages.aclose()
+
+    async def call(self, gitlabMCP: Any, tool_name: str, args: Dict[str, Any], owner: str = '') -> Tuple[Any, Optional[str]]:
+        """First page of a list tool call & its continue token (None if it was the last page).
+        `owner` (the tenant) is recorded with shared streams, only its requests may resume them on other workers."""
+        await self._expire()
+        stream_id = uuid.uuid4().hex[:12]
+        stream = _Stream(gitlabMCP, tool_name, self.pages(gitlabMCP, tool_name, args), self.ttl)
+        page = await stream.pages.__anext__()
+        if page.last:
+            await stream.pages.aclose()
+            return page.result, None
+        stream.last, stream.next_page = page, page.number + 1
+        await self._add(stream_id, stream)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.put_stream, stream_id, owner, tool_name, {k: v for k, v in args.items() if k != 'page'},
+                                    time.time() + self.ttl)
+        return page.result, f'{stream_id}.{stream.next_page}'
+
+    async def _add(self, stream_id: str, stream: _Stream):
+        self._streams[stream_id] = stream
+        while len(self._streams) > self.max_streams:
+            await self._streams.popitem(last=False)[1].pages.aclose()
+
+    async def _adopt(self, stream_id: str, number: int, gitlabMCP: Any, owner: str) -> Optional[_Stream]:
+        """Pick up at page `number` a shared stream (started, or read further, on another worker)."""
+        row = await asyncio.to_thread(self.shared.get_stream, stream_id)
+        if row is None or row[0] != owner:
+            return None
+        _, tool_name, args = row
+        old = self._streams.pop(stream_id, None)
+        if old is not None:
+            await old.pages.aclose()
+        stream = _Stream(gitlabMCP, tool_name, self.pages(gitlabMCP, tool_name, {**args, 'page': number}), self.ttl)
+        stream.next_page = number
+        await self._add(stream_id, stream)
+        logger.info(f'Resuming shared list {stream_id} ({tool_name}) at page {number}')
+        return stream
+
+    async def resume(self, token: str, gitlabMCP: Any = None, owner: str = '') -> Tuple[str, Any, Optional[str]]:
+        """The page a continue token points to: (tool name, result, next continue token).
+        With `gitlabMCP`, only tokens of lists read through that upstream (ie: the same tenant) are valid."""
+        await self._expire()
+        stream_id, _, number = token.partition('.')
+        if not number.isdigit():
+            return '', as_result(f'Unknown or expired continue token {token!r}, call the list tool again with page=1'), None
+        number = int(number)
+        stream = self._streams.get(stream_id)
+        if stream is not None and gitlabMCP is not None and stream.gitlabMCP is not gitlabMCP:
+            stream = None
+        if self.shared is not None and gitlabMCP is not None and \
+                (stream is None or number not in (stream.next_page, stream.last and stream.last.number)):
+            stream = await self._adopt(stream_id, number, gitlabMCP, owner) or stream
+        if stream is None:
+            return '', as_result(f'Unknown or expired continue token {token!r}, call the list tool again with page={number}'), None
+        async with stream.lock:
+            if stream.last is not None and number == stream.last.number:
+                # retried request, serve the same page again
+                page = stream.last
+            elif number == stream.next_page and (stream.last is None or not stream.last.last):
+                try:
+                    page = await stream.pages.__anext__()
+                except StopAsyncIteration:
+                    # the tool ignores `page` (the next page repeated this one): it was the last page
+                    self._streams.pop(stream_id, None)
+                    return stream.tool_name, CallToolResult(content=[TextContent(type='text', text='No more results')]), None
+                stream.last, stream.next_page = page, page.number + 1
+            else:
+                return stream.tool_name, as_result(f'Stale continue token {token!r}, the next page is {stream.next_page}'), None
+        self._streams.move_to_end(stream_id)
+        stream.expires = time.monotonic() + self.ttl
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.touch_stream, stream_id, time.time() + self.ttl)
+        if page.last:
+            return stream.tool_name, page.result, None
+        return stream.tool_name, page.result, f'{stream_id}.{page.number + 1}'
+
+    async def _expire(self):
+        now = time.monotonic()
+        for stream_id in [k for k, s in self._streams.items() if s.expires < now]:
+            await self._streams.pop(stream_id).pages.aclose()
+
+    async def close(self):
+        streams, self._streams = self._streams, OrderedDict()
+        for stream in streams.values():
+            await stream.pages.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'streams': len(self._streams), 'buffered_bytes': self.buffered, 'prefetched_pages': self.prefetched}
+
+
+def with_continue(res: Any, token: Optional[str]) -> CallToolResult:
+    """`res` with a last text block telling how to get the next page."""
+    res = as_result(res)
+    if token is None:
+        return res
+    hint = TextContent(type='text', text=f'More results: call {CONTINUE_TOOL_NAME} with continue="{token}" for the next page')
+    return CallToolResult(content=[*res.content, hint], isError=res.isError)
+
+
+def paginator_from_env(shared: Any = None) -> Optional[Paginator]:
+    """A `Paginator` (sharing its streams through `shared`, a `shared.SharedStore`, if given), None if PAGINATION is 'false'."""
+    if os.environ.get('PAGINATION', 'true').lower() == 'false':
+        return None
+    return Paginator(
+        prefetch=int(os.environ.get('PAGINATION_PREFETCH', '2')),
+        max_buffer_bytes=int(os.environ.get('PAGINATION_MAX_BUFFER_BYTES', str(16 * 1024 * 1024))),
+        shared=shared,
+    )
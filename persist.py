@@ -0,0 +1,426 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+from mcp.types import Tool, CallToolResult
+from cache import READ_ONLY_TOOLS, cache_key, scope_of, is_stale, is_error, result_size, project_filter
+from results import as_result
+from rest import if_none_match
+
+logger = logging.getLogger(__name__)
+
+CACHE, RECORD, REPLAY = 'cache', 'record', 'replay'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT, seq INTEGER, tool TEXT, project TEXT, branches TEXT, mrs TEXT,
+    validator TEXT, etag TEXT, value TEXT, size INTEGER, stored REAL, used REAL,
+    PRIMARY KEY (key, seq)
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+CREATE INDEX IF NOT EXISTS responses_project ON responses (project);
+CREATE TABLE IF NOT EXISTS tools (id INTEGER PRIMARY KEY, tools TEXT, stored REAL);
+'''
+
+# a read moves a result up the LRU order (a write) only once it was last marked used this many seconds ago
+USED_RESOLUTION = 30.0
+# `put` checks the store size (a full table sum, & compacts past `max_bytes`) each time this share of `max_bytes` was written
+COMPACT_EVERY = 0.05
+
+# fields of a GitLab object that change whenever its content does, most specific first
+VALIDATOR_FIELDS = ('blob_id', 'last_commit_id', 'commit_id', 'sha', 'updated_at', 'last_activity_at')
+
+
+def validator_of(res: Any) -> Optional[str]:
+    """Content validator of a tool result: the commit SHA / blob id / update time of the object it returns, else a content hash."""
+    texts = [getattr(block, 'text', '') or '' for block in getattr(res, 'content', None) or []]
+    text = '\n'.join(texts)
+    if not text:
+        return None
+    if text[:1] == '{':
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            for field in VALIDATOR_FIELDS:
+                if data.get(field):
+                    return f'{field}:{data[field]}'
+    return 'sha256:' + hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+def etag_of(res: Any) -> Optional[str]:
+    meta = getattr(res, 'meta', None) or {}
+    return meta.get('etag')
+
+
+def not_modified(res: Any) -> bool:
+    meta = getattr(res, 'meta', None) or {}
+    return bool(meta.get('not_modified'))
+
+
+class Stored:
+    __slots__ = ('value', 'validator', 'etag', 'stored')
+
+    def __init__(self, value: str, validator: Optional[str], etag: Optional[str], stored: float):
+        self.value = value
+        self.validator = validator
+        self.etag = etag
+        self.stored = stored
+
+
+class ResponseStore:
+    """
+    On-disk (SQLite) store of tool results that outlives the process.
+    - Results are keyed by tool & canonical args, with their content validator & ETag (when the REST backend gave one).
+    - Several results per key (`seq`) in record mode: an append-only log of the traffic, replayed in order.
+    - Bounded by `max_bytes`: the least recently used results are dropped & the file compacted (incremental vacuum),
+      checked every COMPACT_EVERY of `max_bytes` written rather than on every put.
+    - Reads are reads: the LRU `used` time is only rewritten when older than USED_RESOLUTION.
+    - Like `shared.SharedStore`: WAL mode, one connection per thread (`PersistentGitlabMCP` calls it from worker
+      threads, off the event loop), wall clock times.
+    """
+    path: str
+    max_bytes: int
+    _written: int
+    _local: threading.local
+    _lock: threading.Lock
+    _conns: List[sqlite3.Connection]
+    _pid: int
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._written = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns = []
+        self._pid = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            # only takes effect on a new file, before any table is created
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._conns, self._pid = [], os.getpid()
+                self._conns.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                for conn in self._conns:
+                    conn.close()
+            self._conns = []
+        self._local = threading.local()
+
+    def get(self, key: str, seq: Optional[int] = None) -> Optional[Stored]:
+        """The latest result of `key`, or its `seq`th recorded one (the last one past the end of the log)."""
+        if seq is None:
+            row = self.conn.execute('SELECT value, validator, etag, stored, used FROM responses WHERE key = ? ORDER BY seq DESC LIMIT 1',
+                                    (key,)).fetchone()
+        else:
+            row = self.conn.execute('SELECT value, validator, etag, stored, used FROM responses WHERE key = ? AND seq <= ? ORDER BY seq DESC LIMIT 1',
+                                    (key, seq)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[4] < now - USED_RESOLUTION:
+            self.conn.execute('UPDATE responses SET used = ? WHERE key = ?', (now, key))
+        return Stored(*row[:4])
+
+    def put(self, key: str, tool: str, scope: Tuple[Optional[str], frozenset, frozenset], value: str, size: int,
+            validator: Optional[str], etag: Optional[str], append: bool = False) -> int:
+        """Store a result (replacing the key's previous ones unless `append`). Returns the evicted results."""
+        project, branches, mrs = scope
+        now = time.time()
+        with self._transaction() as conn:
+            if append:
+                seq = conn.execute('SELECT COALESCE(MAX(seq) + 1, 0) FROM responses WHERE key = ?', (key,)).fetchone()[0]
+            else:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                seq = 0
+            conn.execute('INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (key, seq, tool, project, json.dumps(sorted(branches)), json.dumps(sorted(mrs)), validator, etag, value, size, now, now))
+        if append:
+            # a recording is never evicted from
+            return 0
+        self._written += size
+        if self._written < self.max_bytes * COMPACT_EVERY:
+            return 0
+        self._written = 0
+        return self.compact()
+
+    def revalidated(self, key: str):
+        """The stored result of `key` was confirmed unchanged upstream: it is fresh again."""
+        now = time.time()
+        self.conn.execute('UPDATE responses SET stored = ?, used = ? WHERE key = ?', (now, now, key))
+
+    def scopes(self, project: Optional[str]) -> List[Tuple[str, Tuple[Optional[str], frozenset, frozenset]]]:
+        """(key, scope) of the stored results a mutation in `project` may touch."""
+        if project is None:
+            rows = self.conn.execute('SELECT DISTINCT key, project, branches, mrs FROM responses')
+        else:
+            rows = self.conn.execute(f'SELECT DISTINCT key, project, branches, mrs FROM responses WHERE {project_filter(project)}', (project,))
+        return [(key, (p, frozenset(json.loads(b)), frozenset(json.loads(m)))) for key, p, b, m in rows.fetchall()]
+
+    def drop(self, keys: Iterable[str]):
+        with self._transaction() as conn:
+            conn.executemany('DELETE FROM responses WHERE key = ?', [(key,) for key in keys])
+
+    def expire(self, max_age: float) -> int:
+        """Drop the results stored more than `max_age` seconds ago."""
+        with self._transaction() as conn:
+            dropped = conn.execute('DELETE FROM responses WHERE stored < ?', (time.time() - max_age,)).rowcount
+        if dropped:
+            self.conn.execute('PRAGMA incremental_vacuum')
+        return dropped
+
+    def compact(self) -> int:
+        """Past `max_bytes`: drop the least recently used results down to 90% of it & give the pages back to the OS."""
+        total = self.stats()[1]
+        if total <= self.max_bytes:
+            return 0
+        target = self.max_bytes * 0.9
+        evicted = 0
+        with self._transaction() as conn:
+            while total > target:
+                rows = conn.execute('SELECT key, seq, size FROM responses ORDER BY used LIMIT 64').fetchall()
+                if not rows:
+                    break
+                for key, seq, size in rows:
+                    if total <= target:
+                        break
+                    conn.execute('DELETE FROM responses WHERE key = ? AND seq = ?', (key, seq))
+                    total -= size
+                    evicted += 1
+        if evicted:
+            self.conn.execute('PRAGMA incremental_vacuum')
+        logger.debug(f'response store compacted: {evicted} results evicted, {total} bytes kept')
+        return evicted
+
+    def get_tools(self) -> Optional[List[Dict[str, Any]]]:
+        row = self.conn.execute('SELECT tools FROM tools WHERE id = 0').fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_tools(self, tools: List[Dict[str, Any]]):
+        self.conn.execute('INSERT OR REPLACE INTO tools VALUES (0, ?, ?)', (json.dumps(tools), time.time()))
+
+    def stats(self) -> Tuple[int, int]:
+        """(results, bytes) stored."""
+        return self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+
+class PersistentGitlabMCP:
+    """
+    `ResponseStore` layer under the in-memory response cache, in one of three modes:
+    - cache: read only tools are answered from the store while younger than `fresh` seconds (warm restarts),
+      older results are revalidated with their ETag (REST backend: a 304 costs no payload) or refetched,
+      & served as is, up to `max_age`, when the upstream is down. Mutations drop the results in their scope.
+    - record: every call goes upstream & its result (errors included) is appended to the store, with tools/list.
+    - replay: the upstream is never started, tools/list & results come from a recording, in recorded order:
+      benchmarks & CI runs without network or npx.
+    The store I/O runs in worker threads (`asyncio.to_thread`), results are decoded / encoded on the event loop.
+    """
+    upstream: Any
+    store: ResponseStore
+    mode: str
+    fresh: float
+    max_age: float
+    namespace: str
+    read_only: frozenset
+    hits: int
+    revalidated: int
+    unchanged: int
+    stale_served: int
+    misses: int
+    invalidations: int
+    evictions: int
+    recorded: int
+    replayed: int
+    replay_misses: int
+    _cursors: Dict[str, int]
+
+    def __init__(self, upstream: Any, store: ResponseStore, mode: str = CACHE, fresh: float = 300.0, max_age: float = 86400.0,
+                 namespace: str = '', read_only: Optional[Iterable[str]] = None):
+        if mode not in (CACHE, RECORD, REPLAY):
+            raise ValueError(f'response store mode must be {CACHE}, {RECORD} or {REPLAY}, got {mode!r}')
+        self.upstream = upstream
+        self.store = store
+        self.mode = mode
+        self.fresh = fresh
+        self.max_age = max_age
+        self.namespace = namespace
+        self.read_only = frozenset(read_only) if read_only is not None else READ_ONLY_TOOLS
+        self.hits = self.revalidated = self.unchanged = self.stale_served = self.misses = 0
+        self.invalidations = self.evictions = self.recorded = self.replayed = self.replay_misses = 0
+        self._cursors = {}
+        if mode == REPLAY:
+            # shadow the upstream's state: it is never started
+            self.is_conn = True
+            self.alive = True
+            self.ready = asyncio.Event()
+            self.ready.set()
+            self.tools = [Tool(**tool) for tool in store.get_tools() or []]
+            logger.info(f'replaying {store.path}: {len(self.tools)} tools, {store.stats()[0]} results')
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.upstream, name)
+
+    def start(self) -> Any:
+        if self.mode != REPLAY:
+            return self.upstream.start()
+
+    async def close(self):
+        if self.mode != REPLAY:
+            await self.upstream.close()
+
+    async def wait_ready(self):
+        if self.mode != REPLAY:
+            await self.upstream.wait_ready()
+
+    async def get_tools(self) -> List[Any]:
+        if self.mode == REPLAY:
+            return self.tools
+        tools = await self.upstream.get_tools()
+        if self.mode == RECORD and tools:
+            await asyncio.to_thread(self.store.put_tools, [t.model_dump(by_alias=True, exclude_none=True) for t in tools])
+        return tools
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        key = self.namespace + cache_key(tool_name, args)
+        if self.mode == REPLAY:
+            return await self._replay(tool_name, key)
+        if self.mode == RECORD:
+            res = await self.upstream.call_tool(tool_name, args)
+            await self._put(key, tool_name, args, as_result(res), append=True)
+            self.recorded += 1
+            return res
+        if tool_name not in self.read_only:
+            res = await self.upstream.call_tool(tool_name, args)
+            if not is_error(res):
+                self.invalidations += await asyncio.to_thread(self._drop_stale, args)
+            return res
+        return await self._cached(tool_name, key, args)
+
+    async def _cached(self, tool_name: str, key: str, args: Dict[str, Any]) -> Any:
+        stored = await asyncio.to_thread(self.store.get, key)
+        age = time.time() - stored.stored if stored is not None else None
+        if stored is not None and age < self.fresh:
+            self.hits += 1
+            return CallToolResult.model_validate_json(stored.value)
+        usable = stored is not None and age < self.max_age
+        token = if_none_match.set(stored.etag) if usable and stored.etag else None
+        try:
+            res = await self.upstream.call_tool(tool_name, args)
+        finally:
+            if token is not None:
+                if_none_match.reset(token)
+        if usable and not_modified(res):
+            self.revalidated += 1
+            await asyncio.to_thread(self.store.revalidated, key)
+            return CallToolResult.model_validate_json(stored.value)
+        if is_error(res):
+            # upstream down / failing (not a tool error like a 404): better an old result than none
+            if usable and not isinstance(res, CallToolResult):
+                self.stale_served += 1
+                return CallToolResult.model_validate_json(stored.value)
+            return res
+        self.misses += 1
+        validator = await self._put(key, tool_name, args, res)
+        if usable and validator == stored.validator:
+            self.unchanged += 1
+        return res
+
+    async def _put(self, key: str, tool_name: str, args: Dict[str, Any], res: CallToolResult, append: bool = False) -> Optional[str]:
+        validator = validator_of(res)
+        self.evictions += await asyncio.to_thread(self.store.put, key, tool_name, scope_of(args), res.model_dump_json(by_alias=True, exclude_none=True),
+                                                  result_size(res), validator, etag_of(res), append)
+        return validator
+
+    def _drop_stale(self, args: Dict[str, Any]) -> int:
+        scope = scope_of(args)
+        stale = [key for key, entry_scope in self.store.scopes(scope[0]) if key.startswith(self.namespace) and is_stale(entry_scope, scope)]
+        if stale:
+            self.store.drop(stale)
+        return len(stale)
+
+    async def _replay(self, tool_name: str, key: str) -> CallToolResult:
+        seq = self._cursors.get(key, 0)
+        # the cursor moves before the store is read: concurrent calls of one key get consecutive results
+        self._cursors[key] = seq + 1
+        stored = await asyncio.to_thread(self.store.get, key, seq)
+        if stored is None:
+            self.replay_misses += 1
+            return as_result(f'No recorded result for {tool_name} with these arguments (replay mode)')
+        self.replayed += 1
+        return CallToolResult.model_validate_json(stored.value)
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = self.store.stats()
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'unchanged': self.unchanged,
+            'stale_served': self.stale_served,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+            'recorded': self.recorded,
+            'replayed': self.replayed,
+            'replay_misses': self.replay_misses,
+            'entries': entries,
+            'bytes': size,
+        }
+
+
+def response_store_from_env() -> Optional[ResponseStore]:
+    """A `ResponseStore` at RESPONSE_STORE_PATH, None if unset."""
+    path = os.environ.get('RESPONSE_STORE_PATH')
+    if not path:
+        return None
+    store = ResponseStore(path, max_bytes=int(os.environ.get('RESPONSE_STORE_MAX_BYTES', str(256 * 1024 * 1024))))
+    if os.environ.get('RESPONSE_STORE_MODE', CACHE) == CACHE:
+        store.expire(float(os.environ.get('RESPONSE_STORE_MAX_AGE', '86400')))
+    return store
+
+
+def persist_from_env(upstream: Any, store: Optional[ResponseStore] = None, namespace: str = '') -> Any:
+    """Wrap `upstream` in a `PersistentGitlabMCP` (on `store` if given) if RESPONSE_STORE_PATH is set."""
+    store = store or response_store_from_env()
+    if store is None:
+        return upstream
+    tools = os.environ.get('RESPONSE_CACHE_TOOLS')
+    return PersistentGitlabMCP(
+        upstream, store,
+        mode=os.environ.get('RESPONSE_STORE_MODE', CACHE),
+        fresh=float(os.environ.get('RESPONSE_STORE_FRESH', '300')),
+        max_age=float(os.environ.get('RESPONSE_STORE_MAX_AGE', '86400')),
+        namespace=namespace,
+        read_only=[t.strip() for t in tools.split(',') if t.strip()] if tools else None,
+    )
@@ -0,0 +1,199 @@
+import os
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Callable
+import metrics
+from server import GitlabMCP
+from rest import rest_from_env
+from cache import READ_ONLY_TOOLS
+
+logger = logging.getLogger(__name__)
+
+
+class _Member:
+    gitlabMCP: GitlabMCP
+    inflight: int
+    limit: asyncio.Semaphore
+    started_at: float
+
+    def __init__(self, gitlabMCP: GitlabMCP, max_inflight: int):
+        self.gitlabMCP = gitlabMCP
+        self.inflight = 0
+        self.limit = asyncio.Semaphore(max_inflight)
+        self.started_at = time.monotonic()
+
+    @property
+    def dead(self) -> bool:
+        # a live supervisor restarts its own child, only a stopped one needs replacing
+        return not self.gitlabMCP.alive
+
+
+class GitlabMCPPool:
+    """
+    N upstream @zereight/mcp-gitlab children behind the same interface as `GitlabMCP`.
+    - call_tool is routed to the least-loaded live child.
+    - Each child has at most `max_inflight` concurrent calls, extra calls wait for a slot.
+    - Each child restarts itself (see `GitlabMCP._run`), a child whose supervisor stopped is
+      replaced (at most once per `restart_interval` seconds).
+    - A read only call (`cache.READ_ONLY_TOOLS`) that hit a dying child, or one that did not reconnect in time, is retried once
+      on another one, mutations return the error.
+    """
+    size: int
+    max_inflight: int
+    restart_interval: float
+    members: List[_Member]
+    ready: asyncio.Event
+    replaced: int
+    _factory: Callable[[], GitlabMCP]
+    _ready_task: Optional[asyncio.Task]
+    _closing: List[asyncio.Task]
+    _tools_listeners: List[Callable[[List[Any]], Any]]
+
+    def __init__(self, factory: Callable[[], GitlabMCP], size: int = 2, max_inflight: int = 8, restart_interval: float = 1.0):
+        self._factory = factory
+        self.size = max(1, size)
+        self.max_inflight = max(1, max_inflight)
+        self.restart_interval = restart_interval
+        self.members = []
+        self.ready = asyncio.Event()
+        self.replaced = 0
+        self._ready_task = None
+        self._closing = []
+        self._tools_listeners = []
+
+    @property
+    def is_conn(self) -> bool:
+        return any(m.gitlabMCP.is_conn for m in self.members)
+
+    @property
+    def alive(self) -> bool:
+        return any(not m.dead for m in self.members)
+
+    @property
+    def tools(self) -> List[Any]:
+        for m in self.members:
+            if m.gitlabMCP.tools:
+                return m.gitlabMCP.tools
+        return []
+
+    def on_tools_changed(self, listener: Callable[[List[Any]], Any]):
+        """See `GitlabMCP.on_tools_changed`, for every child (current & replacements)."""
+        self._tools_listeners.append(listener)
+        for m in self.members:
+            m.gitlabMCP.on_tools_changed(listener)
+
+    def _new_member(self) -> _Member:
+        gitlabMCP = self._factory()
+        for listener in self._tools_listeners:
+            gitlabMCP.on_tools_changed(listener)
+        gitlabMCP.start()
+        return _Member(gitlabMCP, self.max_inflight)
+
+    async def _wait_first_ready(self):
+        waits = [asyncio.create_task(m.gitlabMCP.ready.wait()) for m in self.members]
+        try:
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for w in waits:
+                w.cancel()
+        self.ready.set()
+
+    def start(self):
+        if not self.members:
+            self.members = [self._new_member() for _ in range(self.size)]
+            self._ready_task = asyncio.create_task(self._wait_first_ready())
+        return self._ready_task
+
+    async def close(self):
+        if self._ready_task:
+            self._ready_task.cancel()
+        members, self.members = self.members, []
+        await asyncio.gather(*(m.gitlabMCP.close() for m in members), *self._closing, return_exceptions=True)
+        self._closing = []
+        logger.info(f'Pool closed ({len(members)} upstreams, {self.replaced} replaced)')
+
+    async def wait_ready(self):
+        if self.ready.is_set() or not self.members:
+            return
+        waits = [asyncio.create_task(m.gitlabMCP.wait_ready()) for m in self.members]
+        try:
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for w in waits:
+                w.cancel()
+
+    def _replace_dead(self):
+        now = time.monotonic()
+        for i, m in enumerate(self.members):
+            if m.dead and now - m.started_at >= self.restart_interval:
+                logger.warning(f'Upstream {i} is dead, replacing it')
+                self.members[i] = self._new_member()
+                self.replaced += 1
+                self._closing = [t for t in self._closing if not t.done()]
+                m.gitlabMCP.rest = None  # shared with the other members, keep it open
+                self._closing.append(asyncio.create_task(m.gitlabMCP.close()))
+
+    def _pick(self, exclude: Optional[_Member] = None) -> Optional[_Member]:
+        self._replace_dead()
+        members = [m for m in self.members if m is not exclude]
+        live = [m for m in members if m.gitlabMCP.is_conn]
+        if not live:
+            # nothing connected -> queue on children that are (re)starting
+            live = [m for m in members if not m.dead]
+        if not live:
+            return None
+        return min(live, key=lambda m: m.inflight)
+
+    async def get_tools(self) -> List[Any]:
+        await self.wait_ready()
+        member = self._pick()
+        if member is None:
+            logger.info(f'No upstream connected !')
+            return []
+        return await member.gitlabMCP.get_tools()
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        await self.wait_ready()
+        member = self._pick()
+        if member is None:
+            logger.error(f'No live upstream for tool {tool_name}')
+            return 'Error! Try Again'
+        res = await self._call(member, tool_name, args)
+        if (res is None or isinstance(res, str)) and not member.gitlabMCP.is_conn and tool_name in READ_ONLY_TOOLS:
+            # the child died under this call (error string) or never came back (None) -> retry once on a replacement / another child
+            # (reads only: a mutation may already have reached GitLab, retrying it could apply it twice)
+            member = self._pick(exclude=member)
+            if member is not None:
+                res = await self._call(member, tool_name, args)
+        return res
+
+    async def _call(self, member: _Member, tool_name: str, args: Dict[str, Any]) -> Any:
+        member.inflight += 1
+        try:
+            async with member.limit:
+                return await member.gitlabMCP.call_tool(tool_name, args)
+        finally:
+            member.inflight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self.members),
+            'live': sum(m.gitlabMCP.is_conn for m in self.members),
+            'inflight': sum(m.inflight for m in self.members),
+            'replaced': self.replaced,
+        }
+
+
+def pool_from_env(GITLAB_ACCESS_TOKEN: str, GITLAB_PROJECT_ID: str):
+    """A `GitlabMCPPool` if GITLAB_MCP_POOL_SIZE > 1, else a plain `GitlabMCP`."""
+    size = int(os.environ.get('GITLAB_MCP_POOL_SIZE', '1'))
+    # one REST client (and its connection pool) shared by every member
+    rest = rest_from_env(GITLAB_ACCESS_TOKEN, GITLAB_PROJECT_ID)
+    if size <= 1:
+        return GitlabMCP(GITLAB_ACCESS_TOKEN, GITLAB_PROJECT_ID, rest=rest)
+    return GitlabMCPPool(
+        lambda: GitlabMCP(GITLAB_ACCESS_TOKEN, GITLAB_PROJECT_ID, rest=rest),
+        size=size,
+        max_inflight=int(os.environ.get('GITLAB_MCP_MAX_INFLIGHT', '8')),
+    )
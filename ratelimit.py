@@ -0,0 +1,365 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple, Deque
+from mcp.types import TextContent, CallToolResult
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# how the upstream (and GitlabREST) report GitLab API failures
+STATUS_RE = re.compile(r'GitLab API error: (\d{3})')
+
+# backoff used after a 429 without Retry-After (doubles while 429s keep coming)
+THROTTLE_MIN_BACKOFF = 1.0
+THROTTLE_MAX_BACKOFF = 60.0
+# learned per token rate: cut to this share of the rate that got a 429, never below MIN_RATE
+LEARNED_DECREASE = 0.7
+MIN_RATE = 0.5
+LEARN_MIN_SUCCESSES = 5
+
+
+def upstream_status(res: Any) -> Optional[int]:
+    """HTTP status of a failed GitLab API call behind an upstream error result, if any."""
+    if not isinstance(res, CallToolResult) or not res.isError:
+        return None
+    status = (res.meta or {}).get('status')
+    if status:
+        return int(status)
+    for block in res.content:
+        match = STATUS_RE.search(getattr(block, 'text', '') or '')
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def rate_limited(scope: str, retry_after: float) -> CallToolResult:
+    """Structured error telling the client to retry after `retry_after` seconds (not right away)."""
+    retry_after = round(max(retry_after, 0.1), 2)
+    payload = {
+        'error': 'rate_limited',
+        'scope': scope,
+        'retry_after': retry_after,
+        'message': f'Rate limited ({scope}), retry this call in {retry_after}s',
+    }
+    metrics.RATE_LIMITED.inc(scope)
+    return CallToolResult(content=[TextContent(type='text', text=json.dumps(payload))], isError=True, _meta={'retry_after': retry_after})
+
+
+def parse_rate(value: str) -> Optional[Tuple[float, float]]:
+    """'rate[:burst]' (requests per second) -> (rate, burst), None if empty / 0."""
+    if not value:
+        return None
+    rate, _, burst = value.partition(':')
+    rate = float(rate)
+    if rate <= 0:
+        return None
+    return rate, float(burst) if burst else max(1.0, rate)
+
+
+class TokenBucket:
+    """Token bucket of `rate` tokens per second, holding at most `burst`. Reservations may go negative (= queued)."""
+    rate: float
+    burst: float
+    tokens: float
+    updated: float
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Take a token, returns how long to wait before using it."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class RateLimiter:
+    """
+    Token buckets shared by every upstream of the process: one global, one per GitLab token,
+    one per (token, tool) for the tools in `per_tool`.
+    A token that got a 429 is blocked until its Retry-After (or an exponential backoff) is over, and
+    gets a learned bucket (AIMD): started at 70% of the rate that was throttled, +1 req/s per `rate`
+    successful calls, cut by 30% on the next 429. This keeps it just under GitLab's actual limit.
+    """
+    global_limit: Optional[Tuple[float, float]]
+    per_token: Optional[Tuple[float, float]]
+    per_tool: Dict[str, Tuple[float, float]]
+    max_wait: float
+    buckets: Dict[Tuple[str, str], TokenBucket]
+    blocked: Dict[str, float]
+    backoff: Dict[str, float]
+    learned: Dict[str, TokenBucket]
+    throttled: int
+    rejected: int
+    _recent: Dict[str, Deque[float]]
+    _last_decrease: Dict[str, float]
+    _since: Dict[str, float]
+
+    def __init__(self, global_limit: Optional[Tuple[float, float]] = None, per_token: Optional[Tuple[float, float]] = None,
+                 per_tool: Optional[Dict[str, Tuple[float, float]]] = None, max_wait: float = 5.0):
+        self.global_limit = global_limit
+        self.per_token = per_token
+        self.per_tool = per_tool or {}
+        self.max_wait = max_wait
+        self.buckets = {}
+        self.blocked = {}
+        self.backoff = {}
+        self.learned = {}
+        self.throttled = 0
+        self.rejected = 0
+        self._recent = {}
+        self._last_decrease = {}
+        self._since = {}
+
+    def _bucket(self, key: Tuple[str, str], limit: Tuple[float, float]) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(*limit)
+        return bucket
+
+    def _scopes(self, token: str, tool_name: str) -> List[Tuple[str, TokenBucket]]:
+        scopes = []
+        if self.global_limit:
+            scopes.append(('global', self._bucket(('', ''), self.global_limit)))
+        if self.per_token:
+            scopes.append(('token', self._bucket((token, ''), self.per_token)))
+        if tool_name in self.per_tool:
+            scopes.append(('tool', self._bucket((token, tool_name), self.per_tool[tool_name])))
+        if token in self.learned:
+            scopes.append(('gitlab', self.learned[token]))
+        return scopes
+
+    def reserve(self, token: str, tool_name: str) -> Tuple[float, str]:
+        """(seconds to wait, limiting scope) for one call. Over `max_wait` nothing is reserved: the call should be rejected."""
+        now = time.monotonic()
+        self._since.setdefault(token, now)
+        wait, scope = max(0.0, self.blocked.get(token, 0.0) - now), 'gitlab'
+        taken = []
+        for name, bucket in self._scopes(token, tool_name):
+            taken.append(bucket)
+            bucket_wait = bucket.reserve(now)
+            if bucket_wait > wait:
+                wait, scope = bucket_wait, name
+        if wait > self.max_wait:
+            for bucket in taken:
+                bucket.refund()
+            self.rejected += 1
+        elif wait > 0:
+            self.throttled += 1
+        return wait, scope
+
+    def block(self, token: str, retry_after: Optional[float]) -> float:
+        """The token got a 429: hold its calls for `retry_after` (or a growing backoff), returns the delay."""
+        now = time.monotonic()
+        if retry_after is None:
+            retry_after = self.backoff.get(token, THROTTLE_MIN_BACKOFF)
+            self.backoff[token] = min(retry_after * 2, THROTTLE_MAX_BACKOFF)
+        # rate that got throttled: successes of the last second the token wasn't blocked for
+        start = max(now - 1.0, self.blocked.get(token, 0.0), self._since.get(token, now))
+        successes = sum(1 for t in self._recent.get(token, ()) if t >= start)
+        self.blocked[token] = max(self.blocked.get(token, 0.0), now + retry_after)
+        # calls in flight when the limit was hit come back throttled together, count them once
+        if now - self._last_decrease.get(token, 0.0) >= 1.0:
+            bucket = self.learned.get(token)
+            if bucket is None:
+                # the 429s of a cold burst come back before its successes: nothing to learn from yet
+                if successes < LEARN_MIN_SUCCESSES:
+                    return retry_after
+                rate = max(MIN_RATE, successes / max(now - start, 0.1) * LEARNED_DECREASE)
+                self.learned[token] = TokenBucket(rate, 1 + rate / 10)
+            else:
+                bucket.rate = max(MIN_RATE, bucket.rate * LEARNED_DECREASE)
+                bucket.burst = 1 + bucket.rate / 10
+            self._last_decrease[token] = now
+            logger.info(f'Learned rate of token {token}: {self.learned[token].rate:.1f} req/s')
+        return retry_after
+
+    def ok(self, token: str):
+        """A call of `token` went through."""
+        self.backoff.pop(token, None)
+        now = time.monotonic()
+        recent = self._recent.get(token)
+        if recent is None:
+            recent = self._recent[token] = deque()
+        recent.append(now)
+        while recent and recent[0] < now - 1.0:
+            recent.popleft()
+        bucket = self.learned.get(token)
+        if bucket is not None:
+            bucket.rate += 1 / bucket.rate
+            bucket.burst = 1 + bucket.rate / 10
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            'throttled': self.throttled,
+            'rejected': self.rejected,
+            'blocked_tokens': sum(1 for until in self.blocked.values() if until > now),
+            'learned_rate_min': min((b.rate for b in self.learned.values()), default=0.0),
+        }
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the calls in flight to one upstream.
+    - Additive increase: +1 per `limit` successful calls.
+    - Multiplicative decrease: halved on 429 / 5xx, cut by 10% when a call is `tolerance` times slower
+      than the fastest recent calls of its tool (queueing upstream). At most one decrease per `cooldown`.
+    """
+    limit: float
+    min_limit: float
+    max_limit: float
+    tolerance: float
+    cooldown: float
+    inflight: int
+    decreases: int
+    _baseline: Dict[str, float]
+    _last_decrease: float
+    _changed: asyncio.Condition
+
+    def __init__(self, initial: float = 16, min_limit: float = 1, max_limit: float = 64, tolerance: float = 3.0, cooldown: float = 1.0):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.decreases = 0
+        self._baseline = {}
+        self._last_decrease = 0.0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.inflight < max(1, int(self.limit)))
+            self.inflight += 1
+
+    async def release(self):
+        async with self._changed:
+            self.inflight -= 1
+            self._changed.notify_all()
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+        self.decreases += 1
+
+    def on_success(self, tool_name: str, seconds: float):
+        baseline = self._baseline.get(tool_name)
+        # fastest recent latency, drifting up slowly so it follows the upstream
+        self._baseline[tool_name] = seconds if baseline is None else min(seconds, baseline * 1.01 + 0.0001)
+        if baseline is not None and seconds > baseline * self.tolerance and seconds > 0.05:
+            self._decrease(0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_overload(self):
+        self._decrease(0.5)
+
+
+class RateLimitedGitlabMCP:
+    """
+    Rate limits & adapts the concurrency of the calls to a `GitlabMCP` (or pool); everything else is delegated.
+    Calls over the limits wait up to `limiter.max_wait`, past it (or on a 429 from GitLab) they return a
+    structured `rate_limited` error with a `retry_after` instead of a generic failure.
+    """
+    upstream: Any
+    limiter: RateLimiter
+    token: str
+    concurrency: AdaptiveConcurrency
+    throttled: int
+
+    def __init__(self, upstream: Any, limiter: RateLimiter, token: str = '', concurrency: Optional[AdaptiveConcurrency] = None):
+        self.upstream = upstream
+        self.limiter = limiter
+        self.token = hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.throttled = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.upstream, name)
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        start = time.monotonic()
+        wait, scope = self.limiter.reserve(self.token, tool_name)
+        if wait > self.limiter.max_wait:
+            return rate_limited(scope, wait)
+        if wait:
+            await asyncio.sleep(wait)
+        try:
+            await asyncio.wait_for(self.concurrency.acquire(), timeout=max(0.1, self.limiter.max_wait - (time.monotonic() - start)))
+        except asyncio.TimeoutError:
+            return rate_limited('concurrency', 1.0)
+        call_start = time.monotonic()
+        try:
+            res = await self.upstream.call_tool(tool_name, args)
+        finally:
+            await self.concurrency.release()
+        status = upstream_status(res)
+        if status == 429:
+            self.throttled += 1
+            self.concurrency.on_overload()
+            retry_after = self.limiter.block(self.token, (res.meta or {}).get('retry_after'))
+            logger.warning(f'GitLab rate limited {tool_name}, holding calls for {retry_after:.1f}s (limit {self.concurrency.limit:.1f})')
+            return rate_limited('gitlab', retry_after)
+        if status is not None and status >= 500:
+            self.concurrency.on_overload()
+        elif not isinstance(res, str) and res is not None:
+            self.limiter.ok(self.token)
+            self.concurrency.on_success(tool_name, time.monotonic() - call_start)
+        return res
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'concurrency_limit': self.concurrency.limit,
+            'inflight': self.concurrency.inflight,
+            'decreases': self.concurrency.decreases,
+            'gitlab_429': self.throttled,
+            **self.limiter.stats(),
+        }
+
+
+def rate_limiter_from_env() -> RateLimiter:
+    """
+    RATE_LIMIT_GLOBAL / RATE_LIMIT_PER_TOKEN: 'rate[:burst]' in requests per second (default: no limit).
+    RATE_LIMIT_TOOLS: 'tool=rate[:burst],...' per token & tool.
+    """
+    per_tool = {}
+    for item in os.environ.get('RATE_LIMIT_TOOLS', '').split(','):
+        name, _, value = item.partition('=')
+        limit = parse_rate(value.strip())
+        if name.strip() and limit:
+            per_tool[name.strip()] = limit
+    return RateLimiter(
+        global_limit=parse_rate(os.environ.get('RATE_LIMIT_GLOBAL', '')),
+        per_token=parse_rate(os.environ.get('RATE_LIMIT_PER_TOKEN', '')),
+        per_tool=per_tool,
+        max_wait=float(os.environ.get('RATE_LIMIT_MAX_WAIT', '5')),
+    )
+
+
+def ratelimit_from_env(upstream: Any, token: str, limiter: Optional[RateLimiter] = None) -> Any:
+    """Wrap `upstream` in a `RateLimitedGitlabMCP` (on the shared `limiter` if given) unless RATE_LIMIT is 'false'."""
+    if os.environ.get('RATE_LIMIT', 'true').lower() == 'false':
+        return upstream
+    concurrency = AdaptiveConcurrency(
+        initial=float(os.environ.get('ADAPTIVE_CONCURRENCY_INITIAL', '16')),
+        max_limit=float(os.environ.get('ADAPTIVE_CONCURRENCY_MAX', '64')),
+    )
+    return RateLimitedGitlabMCP(upstream, limiter or rate_limiter_from_env(), token, concurrency)
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import base64
+import logging
+from urllib.parse import quote
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+import httpx
+from mcp.types import TextContent, CallToolResult
+import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (optional, enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+GITLAB_API_URL = os.environ.get('GITLAB_API_URL', 'https://gitlab.com/api/v4')
+
+# query args the upstream tools forward to the GitLab API as-is
+MR_LIST_ARGS = ('state', 'scope', 'order_by', 'sort', 'milestone', 'labels', 'created_after', 'created_before',
+                'updated_after', 'updated_before', 'author_id', 'author_username', 'assignee_id', 'assignee_username',
+                'reviewer_id', 'reviewer_username', 'my_reaction_emoji', 'source_branch', 'target_branch', 'search',
+                'wip', 'with_labels_details', 'page', 'per_page')
+ISSUE_LIST_ARGS = ('assignee_id', 'assignee_username', 'author_id', 'author_username', 'confidential', 'created_after',
+                   'created_before', 'due_date', 'labels', 'milestone', 'issue_type', 'iteration_id', 'scope', 'search',
+                   'state', 'updated_after', 'updated_before', 'with_labels_details', 'page', 'per_page')
+PIPELINE_LIST_ARGS = ('scope', 'status', 'ref', 'sha', 'yaml_errors', 'username', 'updated_after', 'updated_before',
+                      'order_by', 'sort', 'source', 'name', 'page', 'per_page')
+
+# conditional requests: ETag of the stored result being revalidated (set by persist.py), sent as If-None-Match
+if_none_match: ContextVar[Optional[str]] = ContextVar('if_none_match', default=None)
+# ETag of the last GitLab response of the tool call being served, returned in the result `_meta`
+_response_etag: ContextVar[Optional[str]] = ContextVar('_response_etag', default=None)
+
+
+def _text(data: Any, pagination: Optional[Dict[str, int]] = None, etag: Optional[str] = None) -> CallToolResult:
+    # same shape as the upstream: one text block with JSON.stringify(data, null, 2)
+    content = [TextContent(type='text', text=json.dumps(data, indent=2, ensure_ascii=False))]
+    meta: Dict[str, Any] = {}
+    if pagination:
+        meta['pagination'] = pagination
+    if etag:
+        meta['etag'] = etag
+    if meta:
+        return CallToolResult(content=content, _meta=meta)
+    return CallToolResult(content=content)
+
+
+def _pagination(headers: httpx.Headers) -> Dict[str, int]:
+    # X-Total / X-Total-Pages are left out by GitLab for very large collections
+    names = {'page': 'x-page', 'per_page': 'x-per-page', 'next_page': 'x-next-page', 'total': 'x-total', 'total_pages': 'x-total-pages'}
+    return {k: int(headers[h]) for k, h in names.items() if headers.get(h, '').isdigit()}
+
+
+def _query(args: Dict[str, Any], names: tuple) -> Dict[str, Any]:
+    query = {}
+    for name in names:
+        value = args.get(name)
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        elif isinstance(value, list):
+            value = ','.join(map(str, value))
+        query[name] = value
+    return query
+
+
+class GitlabAPIError(Exception):
+    def __init__(self, status: int, reason: str, body: str, retry_after: Optional[float] = None):
+        super().__init__(f'GitLab API error: {status} {reason}\n{body}')
+        self.status = status
+        self.retry_after = retry_after
+
+
+class NotModified(Exception):
+    """304: the result revalidated with `if_none_match` is still current."""
+
+
+class GitlabREST:
+    """
+    In-process backend for the hottest read tools, talking to the GitLab REST API directly
+    over a pooled keep-alive httpx client (HTTP/2 if `h2` is installed).
+    Results have the same shape as the @zereight/mcp-gitlab tools they replace.
+    """
+    api_url: str
+    token: str
+    project_id: str
+    allowed: Tuple[str, ...]
+    client: Optional[httpx.AsyncClient]
+    handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]]
+
+    def __init__(self, token: str, project_id: str = '', api_url: str = GITLAB_API_URL, max_connections: int = 20):
+        self.api_url = api_url.rstrip('/')
+        self.token = token
+        # GITLAB_PROJECT_ID is the upstream's GITLAB_ALLOWED_PROJECT_IDS: a comma separated allowlist,
+        # a single project is also the default one
+        self.allowed = tuple(p.strip() for p in str(project_id or '').split(',') if p.strip())
+        self.project_id = self.allowed[0] if len(self.allowed) == 1 else ''
+        self.max_connections = max_connections
+        self.client = None
+        self.handlers = {
+            'get_project': self.get_project,
+            'get_file_contents': self.get_file_contents,
+            'list_merge_requests': self.list_merge_requests,
+            'get_merge_request': self.get_merge_request,
+            'list_issues': self.list_issues,
+            'list_pipelines': self.list_pipelines,
+        }
+
+    @property
+    def tools(self) -> frozenset:
+        return frozenset(self.handlers)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.api_url,
+                headers={'PRIVATE-TOKEN': self.token, 'Accept': 'application/json'},
+                http2=HTTP2,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(30.0, connect=10.0),
+            )
+        return self.client
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _project(self, args: Dict[str, Any]) -> str:
+        project_id = args.get('project_id') or self.project_id
+        # the upstream child runs with GITLAB_ALLOWED_PROJECT_IDS=<project_id>: same allowlist, same errors
+        if not project_id and self.allowed:
+            raise ValueError(f'Multiple projects allowed. Please specify a project ID. Allowed projects: {", ".join(self.allowed)}')
+        if self.allowed and str(project_id) not in self.allowed:
+            raise PermissionError(f'Access denied: Project {project_id} is not in the allowed project list: {", ".join(self.allowed)}')
+        if not project_id:
+            raise ValueError('project_id is required')
+        return quote(str(project_id), safe='')
+
+    async def _request(self, path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        etag = if_none_match.get()
+        resp = await self._client().get(path, params=params, headers={'If-None-Match': etag} if etag else None)
+        if resp.status_code == 304:
+            raise NotModified()
+        _response_etag.set(resp.headers.get('etag'))
+        if resp.status_code >= 400:
+            retry_after = resp.headers.get('retry-after', '')
+            raise GitlabAPIError(resp.status_code, resp.reason_phrase, resp.text, float(retry_after) if retry_after.isdigit() else None)
+        return resp
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return (await self._request(path, params)).json()
+
+    async def _list(self, path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, int]]:
+        """A list endpoint: the page & its pagination headers (returned in the result `_meta`)."""
+        resp = await self._request(path, params)
+        return resp.json(), _pagination(resp.headers)
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> CallToolResult:
+        start = time.perf_counter()
+        _response_etag.set(None)
+        try:
+            res = await self.handlers[tool_name](args or {})
+            pagination = None
+            if isinstance(res, tuple):
+                res, pagination = res
+            return _text(res, pagination, _response_etag.get())
+        except NotModified:
+            return CallToolResult(content=[], _meta={'not_modified': True})
+        except Exception as e:
+            kind = 'api_error' if isinstance(e, GitlabAPIError) else 'exception'
+            metrics.UPSTREAM_ERRORS.inc(metrics.tool_label(tool_name), kind)
+            logger.warning(f'REST {tool_name} failed: {e}')
+            content = [TextContent(type='text', text=f'Error: {e}')]
+            if isinstance(e, GitlabAPIError):
+                return CallToolResult(content=content, isError=True, _meta={'status': e.status, 'retry_after': e.retry_after})
+            return CallToolResult(content=content, isError=True)
+        finally:
+            metrics.observe_upstream(tool_name, time.perf_counter() - start)
+
+    async def get_project(self, args: Dict[str, Any]) -> Any:
+        return await self._get(f'/projects/{self._project(args)}')
+
+    async def get_file_contents(self, args: Dict[str, Any]) -> Any:
+        path = quote(str(args['file_path']), safe='')
+        try:
+            data = await self._get(f'/projects/{self._project(args)}/repository/files/{path}', {'ref': args.get('ref') or 'HEAD'})
+        except GitlabAPIError as e:
+            if e.status == 404:
+                raise ValueError(f"File not found: {args['file_path']}") from e
+            raise
+        if isinstance(data, dict) and data.get('content') and data.get('encoding') == 'base64':
+            data['content'] = base64.b64decode(data['content']).decode('utf-8', errors='replace')
+            data['encoding'] = 'utf8'
+        return data
+
+    async def list_merge_requests(self, args: Dict[str, Any]) -> Any:
+        return await self._list(f'/projects/{self._project(args)}/merge_requests', _query(args, MR_LIST_ARGS))
+
+    async def get_merge_request(self, args: Dict[str, Any]) -> Any:
+        project = self._project(args)
+        iid = args.get('merge_request_iid') or args.get('mergeRequestIid')
+        if iid:
+            return await self._get(f'/projects/{project}/merge_requests/{iid}')
+        branch = args.get('source_branch') or args.get('branchName')
+        if not branch:
+            raise ValueError('Either mergeRequestIid or branchName must be provided')
+        found = await self._get(f'/projects/{project}/merge_requests', {'source_branch': branch})
+        if not found:
+            raise ValueError(f'No merge request found for branch: {branch}')
+        return found[0]
+
+    async def list_issues(self, args: Dict[str, Any]) -> Any:
+        # with an allowlist, no listing across every project
+        path = f'/projects/{self._project(args)}/issues' if (args.get('project_id') or self.allowed) else '/issues'
+        return await self._list(path, _query(args, ISSUE_LIST_ARGS))
+
+    async def list_pipelines(self, args: Dict[str, Any]) -> Any:
+        return await self._list(f'/projects/{self._project(args)}/pipelines', _query(args, PIPELINE_LIST_ARGS))
+
+
+def rest_from_env(GITLAB_ACCESS_TOKEN: str, GITLAB_PROJECT_ID: str) -> Optional[GitlabREST]:
+    """A shared `GitlabREST` backend if GITLAB_REST_BACKEND is 'true', else None."""
+    if os.environ.get('GITLAB_REST_BACKEND', 'false').lower() != 'true':
+        return None
+    return GitlabREST(GITLAB_ACCESS_TOKEN, GITLAB_PROJECT_ID, max_connections=int(os.environ.get('GITLAB_REST_MAX_CONNECTIONS', '20')))
@@ -0,0 +1,168 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from mcp.types import Tool, TextContent, CallToolResult
+from server import upstream_progress
+
+logger = logging.getLogger(__name__)
+
+PAGE_TOOL_NAME = 'read_result_page'
+
+PAGE_TOOL = Tool(
+    name=PAGE_TOOL_NAME,
+    description=(
+        'Read another page of a large tool result. Results over the size budget are split into pages, '
+        'the first page ends with the result_id & page count to use here.'
+    ),
+    inputSchema={
+        'type': 'object',
+        'properties': {
+            'result_id': {'type': 'string', 'description': 'result_id given at the end of the first page'},
+            'page': {'type': 'integer', 'description': 'Page number, starting at 1', 'minimum': 1},
+        },
+        'required': ['result_id', 'page'],
+    },
+)
+
+
+def as_result(res: Any) -> CallToolResult:
+    """Normalize what `GitlabMCP.call_tool` returns ('Error! Try Again' / None / CallToolResult)."""
+    if isinstance(res, CallToolResult):
+        return res
+    if res is None:
+        return CallToolResult(content=[TextContent(type='text', text='Not connected to the Gitlab server !')], isError=True)
+    return CallToolResult(content=[TextContent(type='text', text=str(res))], isError=True)
+
+
+def summarize(res: Any) -> str:
+    """Short description of a result for the logs (never the payload itself)."""
+    if not isinstance(res, CallToolResult):
+        return repr(res)
+    size = sum(len(getattr(block, 'text', '') or '') for block in res.content)
+    return f'{len(res.content)} blocks, {size} chars, isError={res.isError}'
+
+
+def forward_progress(ctx: Any):
+    """Forward upstream progress notifications to the client of request `ctx`, if it asked for progress."""
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return
+
+    async def forward(progress: float, total: Optional[float], message: Optional[str]):
+        await ctx.session.send_progress_notification(token, progress, total, message, related_request_id=str(ctx.request_id))
+
+    upstream_progress.set(forward)
+
+
+class ResultPager:
+    """
+    Passes upstream content blocks through untouched, unless their text exceeds `page_chars`.
+    Oversized results are split into pages: the first page is returned right away, the rest is
+    kept (bounded by `max_results`, for `ttl` seconds) and served by the `read_result_page` tool.
+    """
+    page_chars: int
+    max_results: int
+    ttl: float
+    _pages: 'OrderedDict[str, Tuple[float, List[str]]]'
+
+    def __init__(self, page_chars: int = 256 * 1024, max_results: int = 32, ttl: float = 600.0):
+        self.page_chars = page_chars
+        self.max_results = max_results
+        self.ttl = ttl
+        self._pages = OrderedDict()
+
+    async def paginate(self, res: Any) -> CallToolResult:
+        res = as_result(res)
+        texts = [block.text for block in res.content if isinstance(block, TextContent)]
+        if self.page_chars <= 0 or self.max_results <= 0 or sum(len(t) for t in texts) <= self.page_chars:
+            # small enough, or nowhere to keep the other pages
+            return res
+        text = '\n'.join(texts)
+        pages = self.split(text)
+        result_id = await self.keep(pages)
+        others = [block for block in res.content if not isinstance(block, TextContent)]
+        logger.info(f'result {result_id}: {len(text)} chars split into {len(pages)} pages')
+        return CallToolResult(content=[*others, *self._page_content(result_id, pages, 1)], isError=res.isError)
+
+    async def page(self, result_id: str, page: int) -> CallToolResult:
+        pages = await self._load(result_id)
+        if pages is None:
+            return as_result(f'Unknown or expired result_id {result_id!r}, call the original tool again')
+        if not 1 <= page <= len(pages):
+            return as_result(f'Page {page} out of range, result {result_id} has {len(pages)} pages')
+        return CallToolResult(content=self._page_content(result_id, pages, page))
+
+    def _page_content(self, result_id: str, pages: List[str], page: int) -> List[TextContent]:
+        content = [TextContent(type='text', text=pages[page - 1])]
+        if page < len(pages):
+            content.append(TextContent(type='text', text=(
+                f'[page {page}/{len(pages)} of result_id {result_id}: '
+                f'call {PAGE_TOOL_NAME} with result_id="{result_id}", page={page + 1} for more]'
+            )))
+        return content
+
+    def split(self, text: str) -> List[str]:
+        size = self.page_chars if self.page_chars > 0 else max(1, len(text))
+        return [text[i:i + size] for i in range(0, len(text), size)] or ['']
+
+    async def keep(self, pages: List[str]) -> str:
+        """Keep `pages` for `read_result_page`, returns their result_id."""
+        result_id = uuid.uuid4().hex[:12]
+        await self._store(result_id, pages)
+        return result_id
+
+    async def store(self, text: str) -> Optional[str]:
+        """Keep `text` (split into pages) for `read_result_page`, returns its result_id (None if no result is kept)."""
+        if self.max_results <= 0:
+            return None
+        return await self.keep(self.split(text))
+
+    async def _store(self, result_id: str, pages: List[str]):
+        self._expire()
+        self._pages[result_id] = (time.monotonic() + self.ttl, pages)
+        while len(self._pages) > self.max_results:
+            self._pages.popitem(last=False)
+
+    async def _load(self, result_id: str) -> Optional[List[str]]:
+        self._expire()
+        entry = self._pages.get(result_id)
+        if entry is None:
+            return None
+        self._pages.move_to_end(result_id)
+        return entry[1]
+
+    def _expire(self):
+        now = time.monotonic()
+        for result_id in [k for k, (expires, _) in self._pages.items() if expires < now]:
+            del self._pages[result_id]
+
+
+class SharedResultPager(ResultPager):
+    """
+    `ResultPager` keeping the pages in a `shared.SharedStore`, so any HTTP worker can serve `read_result_page`.
+    The store I/O (multi-MB JSON) runs in a worker thread, off the event loop.
+    """
+    shared: Any
+
+    def __init__(self, store: Any, page_chars: int = 256 * 1024, max_results: int = 32, ttl: float = 600.0):
+        super().__init__(page_chars, max_results, ttl)
+        self.shared = store
+
+    async def _store(self, result_id: str, pages: List[str]):
+        await asyncio.to_thread(self.shared.put_pages, result_id, pages, time.time() + self.ttl, self.max_results)
+
+    async def _load(self, result_id: str) -> Optional[List[str]]:
+        return await asyncio.to_thread(self.shared.get_pages, result_id)
+
+
+def pager_from_env(store: Any = None) -> ResultPager:
+    """A `ResultPager` (keeping pages in `store`, a `shared.SharedStore`, if given)."""
+    settings = dict(
+        page_chars=int(os.environ.get('RESULT_PAGE_CHARS', str(256 * 1024))),
+        max_results=int(os.environ.get('RESULT_PAGE_MAX_RESULTS', '32')),
+    )
+    return SharedResultPager(store, **settings) if store is not None else ResultPager(**settings)
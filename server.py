@@ -2,20 +2,61 @@ import os
 import sys
 import mcp 
 import json
+import shlex
+import anyio
 import asyncio
+import inspect
 from contextlib import AsyncExitStack
-from typing import List, Dict, Any, Optional, Annotated
-from dotenv import load_dotenv
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Annotated, Callable
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, CallToolResult, TextContent, ServerNotification, ToolListChangedNotification
 # from mcp.types import Tool, TextContent
+import time
 import logging
+import metrics
 
-load_dotenv('./.env')
+
+def load_env(path: str = './.env'):
+    """Load `path` into the environment, importing python-dotenv only when there is such a file (startup time)."""
+    if os.path.exists(path):
+        from dotenv import load_dotenv
+        load_dotenv(path)
+
+
+load_env()
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PING_INTERVAL = float(os.environ.get('UPSTREAM_PING_INTERVAL', '15'))
+PING_TIMEOUT = float(os.environ.get('UPSTREAM_PING_TIMEOUT', '5'))
+RESTART_MIN_BACKOFF = 0.5
+RESTART_MAX_BACKOFF = 30.0
+# how long calls queue for a (re)starting child; with UPSTREAM_FAIL_FAST calls fail at once during restarts
+RESTART_WAIT = float(os.environ.get('UPSTREAM_RESTART_WAIT', '30'))
+FAIL_FAST = os.environ.get('UPSTREAM_FAIL_FAST', 'false').lower() == 'true'
+# upstream child command, overridable (eg: a pinned install, or bench/fake_gitlab_mcp.py for load tests)
+UPSTREAM_COMMAND = os.environ.get('GITLAB_MCP_COMMAND', 'npx')
+UPSTREAM_ARGS = shlex.split(os.environ['GITLAB_MCP_ARGS']) if 'GITLAB_MCP_ARGS' in os.environ else ["-y", "@zereight/mcp-gitlab"]
+
+# progress callback of the downstream request being served, upstream progress is forwarded to it
+upstream_progress: ContextVar[Optional[Callable[..., Any]]] = ContextVar('upstream_progress', default=None)
+
+def is_disconnect(e: BaseException) -> bool:
+    """True if `e` means the upstream child / its stdio pipes are gone."""
+    if isinstance(e, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)):
+        return True
+    return isinstance(e, McpError) and e.error.code == CONNECTION_CLOSED
+
+def tools_signature(tools: List[Any]) -> List[Any]:
+    """Comparable form of a tools/list result (names, descriptions & schemas)."""
+    return [(t.name, t.description, t.inputSchema) for t in tools]
+
 class GitlabMCP:
     GITLAB_ACCESS_TOKEN: str 
     GITLAB_PROJECT_ID: str 
+    command: str
+    args: List[str]
     tools: List[Any]
     is_conn: bool
     session: Optional[mcp.ClientSession]
@@ -23,10 +64,22 @@ class GitlabMCP:
     exit_stack: AsyncExitStack
     stdio: List[Any]
     _stdio_ctx: Any
+    ready: asyncio.Event
+    restarts: int
+    _closing: asyncio.Event
+    _wake: asyncio.Event
+    _task: Optional[asyncio.Task]
+    rest: Optional[Any]
+    tools_version: int
+    _tools_listeners: List[Callable[[List[Any]], Any]]
+    _tools_stale: bool
+    _refresh_task: Optional[asyncio.Task]
 
-    def __init__(self, GITLAB_ACCESS_TOKEN='', GITLAB_PROJECT_ID=''):
+    def __init__(self, GITLAB_ACCESS_TOKEN='', GITLAB_PROJECT_ID='', command=None, args=None, rest=None):
         self.GITLAB_ACCESS_TOKEN = GITLAB_ACCESS_TOKEN
         self.GITLAB_PROJECT_ID = GITLAB_PROJECT_ID
+        self.command = command or UPSTREAM_COMMAND
+        self.args = args if args is not None else list(UPSTREAM_ARGS)
         self.tools = []
         self.is_conn = False
         self.session = None
@@ -34,16 +87,153 @@ class GitlabMCP:
         self.exit_stack = AsyncExitStack()
         self.stdio = [None, None]
         self._stdio_ctx = None
+        self.ready = asyncio.Event()
+        self.restarts = 0
+        self._closing = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._task = None
+        # optional in-process backend (rest.GitlabREST) serving its tools without the child
+        self.rest = rest
+        self.tools_version = 0
+        self._tools_listeners = []
+        self._tools_stale = False
+        self._refresh_task = None
+
+    async def _run(self):
+        """
+        Supervisor: connect (& pre-warm), ping the child periodically, restart it with
+        exponential backoff when it breaks. connect & disconnect must happen in the same
+        task (anyio cancel scopes), so the child is only ever (re)started from here.
+        """
+        backoff = RESTART_MIN_BACKOFF
+        while not self._closing.is_set():
+            await self._connect()
+            if self.is_conn:
+                backoff = RESTART_MIN_BACKOFF
+                await self._prewarm()
+                self.ready.set()
+                await self._watch()
+            self.ready.clear()
+            await self.disconnect()
+            if self._closing.is_set():
+                break
+            self.restarts += 1
+            metrics.UPSTREAM_RESTARTS.inc()
+            logger.warning(f'Upstream down, restarting in {backoff:.1f}s (restart #{self.restarts})')
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, RESTART_MAX_BACKOFF)
+
+    async def _prewarm(self):
+        # listed on every (re)connect: a restarted child may run an upgraded package
+        try:
+            await self._set_tools((await self.session.list_tools()).tools)
+        except Exception as e:
+            logger.warning(f'Pre-warming tools failed: {e}')
+
+    def on_tools_changed(self, listener: Callable[[List[Any]], Any]):
+        """Call `listener(tools)` (sync or async) whenever the upstream's tool list changes."""
+        self._tools_listeners.append(listener)
+
+    async def _on_message(self, message: Any):
+        """Session message handler: the upstream's notifications/tools/list_changed triggers a refresh."""
+        if isinstance(message, ServerNotification) and isinstance(message.root, ToolListChangedNotification):
+            logger.info('Upstream tool list changed, refreshing')
+            self._tools_stale = True
+            # not awaited here: list_tools' response is read by the loop running this handler
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_tools())
+
+    async def _refresh_tools(self):
+        """Re-list the tools until no other list_changed came in meanwhile."""
+        while self._tools_stale and self.is_conn:
+            self._tools_stale = False
+            try:
+                tools = (await self.session.list_tools()).tools
+            except Exception as e:
+                logger.warning(f'Refreshing tools failed: {e}')
+                return
+            await self._set_tools(tools)
+
+    async def _set_tools(self, tools: List[Any]):
+        if tools_signature(tools) == tools_signature(self.tools):
+            # keep the same list, consumers memoize on it
+            return
+        self.tools = tools
+        self.tools_version += 1
+        logger.info(f'Upstream tools updated: {len(tools)} tools (version {self.tools_version})')
+        for listener in self._tools_listeners:
+            try:
+                res = listener(tools)
+                if inspect.isawaitable(res):
+                    await res
+            except Exception as e:
+                logger.exception(f'Tools listener failed: {e}')
+
+    async def _watch(self):
+        """Return once the child looks dead (broken pipe seen by a call, failed ping) or on close."""
+        while not self._closing.is_set() and self.is_conn:
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=PING_INTERVAL)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(self.session.send_ping(), timeout=PING_TIMEOUT)
+            except Exception as e:
+                logger.warning(f'Upstream ping failed: {e!r}')
+                self.is_conn = False
+
+    def _broken(self):
+        self.is_conn = False
+        self.ready.clear()
+        self._wake.set()
+
+    def start(self) -> asyncio.Task:
+        """Connect in the background so the server can start serving before npx is up."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+        if self.rest is not None:
+            await self.rest.close()
+        if self._task is None:
+            await self.disconnect()
+            return
+        self._closing.set()
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    @property
+    def alive(self) -> bool:
+        """The supervisor is running (the child itself may be restarting)."""
+        return self._task is not None and not self._task.done()
+
+    async def wait_ready(self):
+        """Queue until the child is connected (at most RESTART_WAIT seconds), or fail fast while restarting."""
+        if self._task is None or self.ready.is_set():
+            return
+        if FAIL_FAST and self.restarts:
+            return
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=RESTART_WAIT)
+        except asyncio.TimeoutError:
+            logger.warning(f'Upstream not ready after {RESTART_WAIT}s')
 
     async def _connect(self):
         try: 
             if not self.is_conn:
                 server_params = mcp.StdioServerParameters(
-                    command='npx',
-                    args=[
-                        "-y", 
-                        "@zereight/mcp-gitlab"
-                    ],
+                    command=self.command,
+                    args=self.args,
                     env={
                         'GITLAB_PERSONAL_ACCESS_TOKEN': self.GITLAB_ACCESS_TOKEN,
                         'GITLAB_ALLOWED_PROJECT_IDS': self.GITLAB_PROJECT_ID 
@@ -51,33 +241,40 @@ class GitlabMCP:
                 )
                 self._stdio_ctx = mcp.client.stdio.stdio_client(server_params)
                 self.stdio = await self._stdio_ctx.__aenter__()
-                self._session_ctx = mcp.ClientSession(*self.stdio)
+                self._session_ctx = mcp.ClientSession(*self.stdio, message_handler=self._on_message)
                 self.session= await self._session_ctx.__aenter__()
 
                 await self.session.initialize()
                 self.is_conn = True
+                metrics.UPSTREAM_CONNECTS.inc('ok')
                 logger.info(f'Connected successfully !')
             else:
                 logger.info(f'Connection already exists !')
 
         except Exception as e:
+            metrics.UPSTREAM_CONNECTS.inc('error')
             logger.exception(f'Error connecting to unoff gitlab server: {e}')
 
     async def disconnect(self):
         try:
             if self._session_ctx:
-                await self._session_ctx.__aexit__(None, None, None)
-                self._session_ctx = None
+                self._session_ctx, ctx = None, self._session_ctx
+                await ctx.__aexit__(None, None, None)
+        except Exception as e:
+            logger.exception(f'Error closing session with unoff gitlab server: {e}')
+        try:
             if self._stdio_ctx:
-                await self._stdio_ctx.__aexit__(None, None, None)
-                self.is_conn = False
+                self._stdio_ctx, ctx = None, self._stdio_ctx
+                await ctx.__aexit__(None, None, None)
                 logger.info(f'Connection closed !')
-            self.stdio = None
-            self.session = None 
         except Exception as e:
-            logger.exception(f'Error disconnecting from unoff gitlab server: {e}')            
+            logger.exception(f'Error disconnecting from unoff gitlab server: {e}')
+        self.is_conn = False
+        self.stdio = None
+        self.session = None
 
     async def get_tools(self) -> List[Any]:
+        await self.wait_ready()
         if self.is_conn:
             if self.tools:
                 return self.tools
@@ -89,13 +286,28 @@ class GitlabMCP:
         return []
 
     async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        if self.rest is not None and tool_name in self.rest.tools:
+            return await self.rest.call_tool(tool_name, args)
+        start = time.perf_counter()
+        await self.wait_ready()
         if self.is_conn:
             try:
-                res = await self.session.call_tool(tool_name, arguments=args)
+                res = await self.session.call_tool(tool_name, arguments=args, progress_callback=upstream_progress.get())
+                if res.isError:
+                    metrics.UPSTREAM_ERRORS.inc(metrics.tool_label(tool_name), 'tool_error')
                 return res
             except Exception as e:
+                metrics.UPSTREAM_ERRORS.inc(metrics.tool_label(tool_name), 'disconnect' if is_disconnect(e) else 'exception')
+                if is_disconnect(e):
+                    self._broken()
+                elif isinstance(e, McpError):
+                    # the tool threw (eg: GitLab API error: 429 ...), keep its message for the client & rate limiter
+                    logger.warning(f'Tool {tool_name} failed: {e.error.message}')
+                    return CallToolResult(content=[TextContent(type='text', text=e.error.message)], isError=True)
                 logger.exception(f'Error calling tool {tool_name}: {e}')      
-                return 'Error! Try Again'       
+                return 'Error! Try Again'
+            finally:
+                metrics.observe_upstream(tool_name, time.perf_counter() - start)
 
 async def main():
     gitlabMCP = GitlabMCP(os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJECT_ID'])
@@ -1,83 +1,172 @@
-from pydantic_ai.mcp import MCPServerStdio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from dotenv import load_dotenv
 import asyncio
 import uvicorn
 import contextlib
 from typing import List, Dict, Any, Optional, Annotated
 from starlette.applications import Starlette
 from starlette.routing import Route
-from starlette.responses import StreamingResponse
+from starlette.responses import StreamingResponse, PlainTextResponse
+from starlette.datastructures import Headers
 from mcp.types import Tool, TextContent, CallToolResult
 from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
-from starlette.middleware.cors import CORSMidlleware
 from starlette.routing import Mount
 from starlette.types import Receive, Scope, Send
 from server import GitlabMCP
+from pool import pool_from_env
+from cache import cache_from_env, response_cache_from_env
+from coalesce import coalesce_from_env
+from persist import persist_from_env, response_store_from_env
+from ratelimit import rate_limiter_from_env, ratelimit_from_env
 import os 
 import sys
 import mcp
+import json
 import logging
-from utils2 import jsonConv
-from google import genai
+import tempfile
+from catalog import default_catalog
+from shared import store_from_env
+from batch import BATCH_TOOL, BATCH_TOOL_NAME, batch_call
+from results import PAGE_TOOL, PAGE_TOOL_NAME, forward_progress, pager_from_env, summarize
+from compact import compactor_from_env
+from paging import CONTINUE_TOOL, CONTINUE_TOOL_NAME, is_paginated, paginator_from_env, with_continue
+from surface import DESCRIBE_TOOL, DESCRIBE_TOOL_NAME, requested_profile, surface_from_env
+from tenants import current_tenant, tenants_from_env
+from validate import validate_from_env, validator_from_env
+import metrics
 
-def main():
-  port=3000
-  json_response=True
+def build_app() -> Starlette:
+  """The Starlette app of one server process (each HTTP worker builds its own, with its own upstreams)."""
+  json_response=os.environ.get('MCP_JSON_RESPONSE', 'true').lower() != 'false'
 
   logging.basicConfig(stream=sys.stderr, level=logging.INFO)
   logger = logging.getLogger(__name__)
   state: Dict[str, Any] = {}
+  # with several workers: response cache, catalog, result pages & list streams shared through SQLite
+  store = store_from_env()
+  catalog = default_catalog(store)
+  catalog.load_snapshot()
+  pager = pager_from_env(store)
+  compactor = compactor_from_env()
+  paginator = paginator_from_env(store)
+  surface = surface_from_env()
+  metrics.REGISTRY.watch(surface)
+  # per tool series only for the tools served, anything else a client sends is labelled 'other'
+  metrics.known_tools(lambda name: name in (BATCH_TOOL_NAME, PAGE_TOOL_NAME, CONTINUE_TOOL_NAME, DESCRIBE_TOOL_NAME) or catalog.knows(name))
+  # calls are checked against the upstream schemas the catalog keeps, before the cache (coerced arguments share its keys)
+  validator = validator_from_env(catalog, [BATCH_TOOL, PAGE_TOOL, CONTINUE_TOOL, DESCRIBE_TOOL])
+  if validator:
+      metrics.REGISTRY.watch(validator)
   
   mcp_server = mcp.server.Server('gitlab-agent-server')
+
+  def owner() -> str:
+      """Key of the current request's tenant ('' for the process-wide upstream)."""
+      tenant = current_tenant.get()
+      return tenant.key if tenant is not None else ''
+
+  @asynccontextmanager
+  async def upstream() -> AsyncIterator[Any]:
+      """The upstream serving the current request: its tenant's one, or the process-wide one."""
+      router = state.get('router')
+      if router is None:
+          yield state.get('gitlabMCP')
+          return
+      async with router.use(current_tenant.get()) as gitlabMCP:
+          yield gitlabMCP
   
+  async def catalog_tools(gitlabMCP: Any) -> List[Tool]:
+      # the catalog is shared by every tenant, build it from any connected upstream
+      router = state.get('router')
+      source = router.any_ready() if router else None
+      return await catalog.list_tools(source or gitlabMCP)
+
   @mcp_server.list_tools()
+  @metrics.instrument_list_tools
   async def list_tools() -> List[Optional[Tool]]:
       """List all available Gitlab tools"""
-      gitlabMCP = state.get('gitlabMCP')
-      tools = await gitlabMCP.get_tools()
-      res = []
-      for i, tool in enumerate(tools[:]):
-          # if i not in [47, 48, 49, 50]: #not 16, 22, 23, 29, 47, 48
-              try:
-                  name = tool.name
-                  if not name:
-                      continue
-                  description = tool.description
-                  ipS = jsonConv(tool.inputSchema) if tool.inputSchema else {'type': 'object', 'properties': {}, 'required': []}
-                  # logger.info(f'Tool {i}: \nOg:{tool.inputSchema} \nfixed:{ipS}')
-                  temp = Tool(name=name, description=description, inputSchema=ipS)
-              except Exception as e:
-                  async def dummy_callable(**kwargs): 
-                      return None
-                  temp = Tool(name=name, description=description, inputSchema=ipS, callable=dummy_callable)
-                  logger.warning(f'Oops {i} \n{tool}\n{"_"*40}: {e}')
-              res.append(temp)
+      async with upstream() as gitlabMCP:
+          res = surface.list_tools(await catalog_tools(gitlabMCP)) + [BATCH_TOOL, PAGE_TOOL] + ([CONTINUE_TOOL] if paginator else [])
       logger.info(f'list_tools: {len(res)}')
       return res
   
-  @mcp_server.call_tool()
-  async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+  # the upstream schemas (& the own tools' schemas, below) are checked instead of the flattened ones listed (see validate.py)
+  @mcp_server.call_tool(validate_input=validator is None)
+  @metrics.instrument_call_tool
+  async def call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResult:
       """Execute a tool and return results"""
-      gitlabMCP = state.get('gitlabMCP')
       logger.info(f'call_tool (name: {name}, arguments: \n {arguments})')    
-      res = await gitlabMCP.call_tool(name, arguments)
-      logger.info(f'call_tool res: \n{res}')
-      return [TextContent(type='text', text=res)] if isinstance(res, str) else [TextContent(type='text', text=str(res.content))]
+      if validator and name in validator.local_schemas:
+          arguments, refusal = validator.check_local(name, arguments)
+          if refusal is not None:
+              return refusal
+      if name == PAGE_TOOL_NAME:
+          return await pager.page(arguments['result_id'], int(arguments['page']))
+      if name not in (BATCH_TOOL_NAME, CONTINUE_TOOL_NAME, DESCRIBE_TOOL_NAME) and not surface.allows(name):
+          return surface.refuse(name)
+      forward_progress(mcp_server.request_context)
+      token = None
+      async with upstream() as gitlabMCP:
+          if name == DESCRIBE_TOOL_NAME:
+              return surface.describe(arguments['name'], await catalog_tools(gitlabMCP))
+          if name == BATCH_TOOL_NAME:
+              res = CallToolResult(content=[TextContent(type='text', text=json.dumps(await batch_call(gitlabMCP, arguments, surface.allows)))])
+          else:
+              if name == CONTINUE_TOOL_NAME and paginator:
+                  name, res, token = await paginator.resume(arguments['continue'], gitlabMCP, owner())
+              elif paginator and is_paginated(name):
+                  res, token = await paginator.call(gitlabMCP, name, arguments, owner())
+              else:
+                  res = await gitlabMCP.call_tool(name, arguments)
+              if compactor:
+                  res = await compactor.compact(name, res, pager)
+              res = with_continue(res, token)
+      logger.info(f'call_tool res: {summarize(res)}')
+      return await pager.paginate(res)
 
   @asynccontextmanager
   async def server_lifespan(_server: mcp.server.Server) -> AsyncIterator[Dict[str, GitlabMCP]]:
       async with session_manager.run():
         logger.info('Streamable HTTP server started !')
-        gitlabMCP = GitlabMCP(os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJECT_ID'])
-        await gitlabMCP._connect()
-        logger.info('Original Gitlab MCP connected !')
-        state['gitlabMCP'] = gitlabMCP
+        # multi tenant: one upstream per tenant, created on first use, sharing one response cache
+        shared_cache = response_cache_from_env(store)
+        limiter = rate_limiter_from_env()
+        # warm restarts / record & replay: results kept on disk (RESPONSE_STORE_PATH), under the in-memory cache
+        response_store = response_store_from_env()
+        router = tenants_from_env(lambda tenant: validate_from_env(cache_from_env(coalesce_from_env(persist_from_env(ratelimit_from_env(
+            pool_from_env(tenant.token, tenant.project_id), tenant.token, limiter), response_store, tenant.key)), shared_cache, tenant.key), validator))
+        if router:
+            router.start()
+            state['router'] = router
+            metrics.REGISTRY.watch(router)
+            metrics.REGISTRY.watch(limiter)
+            if shared_cache:
+                metrics.REGISTRY.watch(shared_cache)
+            gitlabMCP = router
+        else:
+            gitlabMCP = validate_from_env(cache_from_env(coalesce_from_env(persist_from_env(ratelimit_from_env(
+                pool_from_env(os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJECT_ID']), os.environ['GITLAB_ACCESS_TOKEN'], limiter),
+                response_store)), shared_cache), validator)
+            gitlabMCP.start()
+            logger.info('Original Gitlab MCP connecting ...')
+            state['gitlabMCP'] = gitlabMCP
+            metrics.REGISTRY.watch(gitlabMCP)
+        # stateless HTTP keeps no stream open to push tools/list_changed on: the catalog is rebuilt
+        # (changed schemas only) so the next tools/list is up to date
+        gitlabMCP.on_tools_changed(catalog.refresh)
+        metrics.REGISTRY.watch(catalog)
+        if paginator:
+            metrics.REGISTRY.watch(paginator)
         try: 
             yield state
         finally: 
-            await gitlabMCP.disconnect()
+            if paginator:
+                await paginator.close()
+            await gitlabMCP.close()
+            if response_store is not None:
+                response_store.close()
+            if store is not None:
+                store.close()
             logger.info('Server shutting down ...')
 
   session_manager = StreamableHTTPSessionManager(
@@ -88,17 +177,60 @@ def main():
   )
 
   async def handle_streamable_http(scope: Scope, receive: Receive, send: Send) -> None:
+      router = state.get('router')
+      headers = Headers(scope=scope)
+      tenant = None
+      if router is not None:
+          tenant = router.authenticate(headers)
+          if tenant is None:
+              response = PlainTextResponse('Unauthorized', status_code=401, headers={'WWW-Authenticate': 'Bearer'})
+              await response(scope, receive, send)
+              return
+          current_tenant.set(tenant)
+      # a tenant's configured tool profile wins over the one the client asks for (selectable ones only)
+      requested_profile.set((tenant.profile if tenant is not None else '') or surface.select(headers.get('x-tool-profile')))
       await session_manager.handle_request(scope, receive, send)
 
+  async def handle_livez(request) -> PlainTextResponse:
+      gitlabMCP = state.get('router') or state.get('gitlabMCP')
+      alive = gitlabMCP is not None and gitlabMCP.alive
+      return PlainTextResponse('ok' if alive else 'upstream supervisor stopped', status_code=200 if alive else 503)
+
+  async def handle_readyz(request) -> PlainTextResponse:
+      if state.get('router') is not None:
+          # tenant upstreams are started on demand
+          return PlainTextResponse('ok')
+      gitlabMCP = state.get('gitlabMCP')
+      ready = gitlabMCP is not None and gitlabMCP.is_conn
+      return PlainTextResponse('ok' if ready else 'upstream not connected', status_code=200 if ready else 503)
+
+  async def handle_metrics(request) -> PlainTextResponse:
+      return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
   starlette_app = Starlette(
     debug=True,
     routes=[
       Mount("/mcp", app=handle_streamable_http),
+      Route("/metrics", endpoint=handle_metrics),
+      Route("/livez", endpoint=handle_livez),
+      Route("/readyz", endpoint=handle_readyz),
     ],
     lifespan=server_lifespan
   )
 
-  uvicorn.run(starlette_app, host="127.0.0.1", port=port)
-  
+  return starlette_app
+
+
+def main():
+  host = os.environ.get('HTTP_HOST', '127.0.0.1')
+  port = int(os.environ.get('HTTP_PORT', '3000'))
+  workers = int(os.environ.get('HTTP_WORKERS', '1'))
+  if workers > 1:
+      # worker processes import the app, their state is shared through SHARED_STATE_PATH
+      os.environ.setdefault('SHARED_STATE_PATH', os.path.join(tempfile.gettempdir(), f'gitlab-mcp-{port}.sqlite'))
+      uvicorn.run('server2_http:build_app', factory=True, host=host, port=port, workers=workers)
+  else:
+      uvicorn.run(build_app(), host=host, port=port)
+
 if __name__ == '__main__':
   main()
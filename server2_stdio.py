@@ -1,22 +1,53 @@
-from pydantic_ai.mcp import MCPServerStdio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from dotenv import load_dotenv
 import asyncio
 from typing import List, Dict, Any, Optional, Annotated
 from mcp.types import Tool, TextContent, CallToolResult
 from server import GitlabMCP
+from cache import cache_from_env
+from coalesce import coalesce_from_env
+from persist import persist_from_env
+from rest import rest_from_env
+from ratelimit import ratelimit_from_env
 import os 
 import sys
 import mcp
+import json
 import logging
-from utils2 import jsonConv
+import weakref
+from catalog import default_catalog
+from mcp.server.lowlevel import NotificationOptions
+from batch import BATCH_TOOL, BATCH_TOOL_NAME, batch_call
+from results import PAGE_TOOL, PAGE_TOOL_NAME, forward_progress, pager_from_env, summarize
+from compact import compactor_from_env
+from paging import CONTINUE_TOOL, CONTINUE_TOOL_NAME, is_paginated, paginator_from_env, with_continue
+from surface import DESCRIBE_TOOL, DESCRIBE_TOOL_NAME, surface_from_env
+from validate import validate_from_env, validator_from_env
+import metrics
 # from google import genai
 
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger(__name__)
 # mcp_server = mcp.server.FastMCP('gitlab-agent-server')
-gitlabMCP = GitlabMCP(os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJECT_ID'])
+catalog = default_catalog()
+# calls are checked against the upstream schemas the catalog keeps, before the cache (coerced arguments share its keys)
+validator = validator_from_env(catalog, [BATCH_TOOL, PAGE_TOOL, CONTINUE_TOOL, DESCRIBE_TOOL])
+gitlabMCP = validate_from_env(cache_from_env(coalesce_from_env(persist_from_env(ratelimit_from_env(GitlabMCP(
+    os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJECT_ID'],
+    rest=rest_from_env(os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJECT_ID']),
+), os.environ['GITLAB_ACCESS_TOKEN'])))), validator)
+pager = pager_from_env()
+compactor = compactor_from_env()
+paginator = paginator_from_env()
+surface = surface_from_env()
+metrics.REGISTRY.watch(gitlabMCP)
+metrics.REGISTRY.watch(surface)
+# per tool series only for the tools served, anything else a client sends is labelled 'other'
+metrics.known_tools(lambda name: name in (BATCH_TOOL_NAME, PAGE_TOOL_NAME, CONTINUE_TOOL_NAME, DESCRIBE_TOOL_NAME) or catalog.knows(name))
+if validator:
+    metrics.REGISTRY.watch(validator)
+if paginator:
+    metrics.REGISTRY.watch(paginator)
 
 # @asynccontextmanager
 # async def server_lifespan(_server: mcp.server.Server) -> AsyncIterator[Dict[str, GitlabMCP]]:
@@ -28,39 +59,64 @@ gitlabMCP = GitlabMCP(os.environ['GITLAB_ACCESS_TOKEN'], os.environ['GITLAB_PROJ
 #         await gitlabMCP.disconnect()
 
 mcp_server = mcp.server.Server('gitlab-agent-server') #lifespan=server_lifespan)
+# sessions of the connected clients, told when the upstream's tools change
+clients: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+
+async def tools_changed(tools: List[Any]):
+    """Upstream tools changed: rebuild the catalog (changed schemas only) & tell the clients to list tools again."""
+    if not catalog.refresh(tools):
+        return
+    logger.info(f'tools changed, notifying {len(clients)} clients')
+    for session in list(clients):
+        try:
+            await session.send_tool_list_changed()
+        except Exception as e:
+            logger.warning(f'Could not send tools/list_changed: {e}')
+
+gitlabMCP.on_tools_changed(tools_changed)
+metrics.REGISTRY.watch(catalog)
 
 @mcp_server.list_tools()
+@metrics.instrument_list_tools
 async def list_tools() -> List[Optional[Tool]]:
     """List all available Gitlab tools"""
-
-    tools = await gitlabMCP.get_tools()
-    res = []
-    for i, tool in enumerate(tools[:]):
-        # if i not in [47, 48, 49, 50]: #not 16, 22, 23, 29, 47, 48
-            try:
-                name = tool.name
-                if not name:
-                    continue
-                description = tool.description
-                ipS = jsonConv(tool.inputSchema) if tool.inputSchema else {'type': 'object', 'properties': {}, 'required': []}
-                # logger.info(f'Tool {i}: \nOg:{tool.inputSchema} \nfixed:{ipS}')
-                temp = Tool(name=name, description=description, inputSchema=ipS)
-            except Exception as e:
-                async def dummy_callable(**kwargs): 
-                    return None
-                temp = Tool(name=name, description=description, inputSchema=ipS, callable=dummy_callable)
-                logger.warning(f'Oops {i} \n{tool}\n{"_"*40}: {e}')
-            res.append(temp)
+    clients.add(mcp_server.request_context.session)
+    res = surface.list_tools(await catalog.list_tools(gitlabMCP)) + [BATCH_TOOL, PAGE_TOOL] + ([CONTINUE_TOOL] if paginator else [])
     logger.info(f'list_tools: {len(res)}')
     return res
 
-@mcp_server.call_tool()
-async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+# the upstream schemas (& the own tools' schemas, below) are checked instead of the flattened ones listed (see validate.py)
+@mcp_server.call_tool(validate_input=validator is None)
+@metrics.instrument_call_tool
+async def call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResult:
     """Execute a tool and return results"""
     logger.info(f'call_tool (name: {name}, arguments: \n {arguments})')    
-    res = await gitlabMCP.call_tool(name, arguments)
-    logger.info(f'call_tool res: \n{res}')
-    return [TextContent(type='text', text=res)] if isinstance(res, str) else [TextContent(type='text', text=str(res.content))]
+    if validator and name in validator.local_schemas:
+        arguments, refusal = validator.check_local(name, arguments)
+        if refusal is not None:
+            return refusal
+    if name == PAGE_TOOL_NAME:
+        return await pager.page(arguments['result_id'], int(arguments['page']))
+    if name == DESCRIBE_TOOL_NAME:
+        return surface.describe(arguments['name'], await catalog.list_tools(gitlabMCP))
+    if name not in (BATCH_TOOL_NAME, CONTINUE_TOOL_NAME) and not surface.allows(name):
+        return surface.refuse(name)
+    forward_progress(mcp_server.request_context)
+    token = None
+    if name == BATCH_TOOL_NAME:
+        res = CallToolResult(content=[TextContent(type='text', text=json.dumps(await batch_call(gitlabMCP, arguments, surface.allows)))])
+    else:
+        if name == CONTINUE_TOOL_NAME and paginator:
+            name, res, token = await paginator.resume(arguments['continue'], gitlabMCP)
+        elif paginator and is_paginated(name):
+            res, token = await paginator.call(gitlabMCP, name, arguments)
+        else:
+            res = await gitlabMCP.call_tool(name, arguments)
+        if compactor:
+            res = await compactor.compact(name, res, pager)
+        res = with_continue(res, token)
+    logger.info(f'call_tool res: {summarize(res)}')
+    return await pager.paginate(res)
 
 # @mcp_server.tool()
 # async def search_repositories(project_name: str) -> List[TextContent]:
@@ -75,15 +131,19 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
 
 async def main():
     try:
-        await gitlabMCP._connect()
+        catalog.load_snapshot()
+        gitlabMCP.start()
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
             await mcp_server.run(
                 read_stream,
                 write_stream,
-                mcp_server.create_initialization_options()
+                mcp_server.create_initialization_options(NotificationOptions(tools_changed=True))
             )
     finally: 
-        await gitlabMCP.disconnect()
+        if paginator:
+            await paginator.close()
+        await gitlabMCP.close()
+        logger.info(f'metrics: {json.dumps(metrics.snapshot())}')
 
 if __name__ == "__main__":
     asyncio.run(main())
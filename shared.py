@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+from cache import project_filter
+
+logger = logging.getLogger(__name__)
+
+# a hit moves a response up the LRU order (a write) only once it was last marked used this many seconds ago
+USED_RESOLUTION = 30.0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY, namespace TEXT, project TEXT, branches TEXT, mrs TEXT,
+    value TEXT, size INTEGER, expires REAL, used REAL
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+CREATE INDEX IF NOT EXISTS responses_namespace ON responses (namespace, project);
+CREATE TABLE IF NOT EXISTS schemas (hash TEXT PRIMARY KEY, schema TEXT);
+CREATE TABLE IF NOT EXISTS results (id TEXT PRIMARY KEY, pages TEXT, expires REAL);
+CREATE TABLE IF NOT EXISTS streams (id TEXT PRIMARY KEY, owner TEXT, tool TEXT, args TEXT, expires REAL);
+'''
+
+
+class SharedStore:
+    """
+    SQLite file holding the state the HTTP workers of one server share: response cache, converted
+    tool schemas, large result pages & list streams (continue tokens), so any worker can serve any request.
+    - WAL mode: readers don't block each other or the writer.
+    - One connection per thread (the servers call it from worker threads, off the event loop), reopened after a fork.
+    - Cache hits are reads: the LRU `used` time is only rewritten when older than USED_RESOLUTION.
+    - Times are wall clock (`time.time()`), comparable across processes.
+    """
+    path: str
+    _local: threading.local
+    _lock: threading.Lock
+    _conns: List[sqlite3.Connection]
+    _pid: int
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns = []
+        self._pid = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._conns, self._pid = [], os.getpid()
+                self._conns.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                for conn in self._conns:
+                    conn.close()
+            self._conns = []
+        self._local = threading.local()
+
+    def expire(self):
+        """Drop expired responses, result pages & streams."""
+        now = time.time()
+        with self._transaction() as conn:
+            for table in ('responses', 'results', 'streams'):
+                conn.execute(f'DELETE FROM {table} WHERE expires < ?', (now,))
+
+    # responses
+
+    def get_response(self, key: str) -> Optional[Tuple[str, float]]:
+        """(value, expires) of a live cached response, None if missing or expired."""
+        now = time.time()
+        row = self.conn.execute('SELECT value, expires, used FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            return None
+        if row[2] < now - USED_RESOLUTION:
+            self.conn.execute('UPDATE responses SET used = ? WHERE key = ?', (now, key))
+        return row[0], row[1]
+
+    def put_response(self, key: str, namespace: str, scope: Tuple[Optional[str], frozenset, frozenset], value: str,
+                     size: int, expires: float, max_bytes: int) -> int:
+        """Store a response, evicting the least recently used ones past `max_bytes`. Returns the evictions."""
+        project, branches, mrs = scope
+        now = time.time()
+        evicted = 0
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (key, namespace, project, json.dumps(sorted(branches)), json.dumps(sorted(mrs)), value, size, expires, now))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            while total > max_bytes:
+                rows = conn.execute('SELECT key, size FROM responses ORDER BY used LIMIT 64').fetchall()
+                for old_key, old_size in rows:
+                    if total <= max_bytes:
+                        break
+                    conn.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                    total -= old_size
+                    evicted += 1
+        return evicted
+
+    def response_scopes(self, namespace: str, project: Optional[str]) -> List[Tuple[str, Tuple[Optional[str], frozenset, frozenset]]]:
+        """(key, scope) of the cached responses of `namespace` that a mutation in `project` may touch."""
+        if project is None:
+            rows = self.conn.execute('SELECT key, project, branches, mrs FROM responses WHERE namespace = ?', (namespace,))
+        else:
+            rows = self.conn.execute(f'SELECT key, project, branches, mrs FROM responses WHERE namespace = ? AND {project_filter(project)}',
+                                     (namespace, project))
+        return [(key, (p, frozenset(json.loads(b)), frozenset(json.loads(m)))) for key, p, b, m in rows.fetchall()]
+
+    def drop_responses(self, keys: List[str]):
+        with self._transaction() as conn:
+            conn.executemany('DELETE FROM responses WHERE key = ?', [(key,) for key in keys])
+
+    def clear_responses(self):
+        self.conn.execute('DELETE FROM responses')
+
+    def response_stats(self) -> Tuple[int, int]:
+        """(entries, bytes) of the cached responses."""
+        return self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+    # converted tool schemas
+
+    def get_schema(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute('SELECT schema FROM schemas WHERE hash = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_schema(self, key: str, schema: Dict[str, Any]):
+        self.conn.execute('INSERT OR REPLACE INTO schemas VALUES (?, ?)', (key, json.dumps(schema)))
+
+    # result pages (read_result_page)
+
+    def get_pages(self, result_id: str) -> Optional[List[str]]:
+        row = self.conn.execute('SELECT pages FROM results WHERE id = ? AND expires >= ?', (result_id, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_pages(self, result_id: str, pages: List[str], expires: float, max_results: int):
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (result_id, json.dumps(pages), expires))
+            conn.execute('DELETE FROM results WHERE id NOT IN (SELECT id FROM results ORDER BY expires DESC LIMIT ?)', (max_results,))
+
+    # list streams (continue_list)
+
+    def get_stream(self, stream_id: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """(owner, tool name, args) of a live list stream."""
+        row = self.conn.execute('SELECT owner, tool, args FROM streams WHERE id = ? AND expires >= ?', (stream_id, time.time())).fetchone()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+    def put_stream(self, stream_id: str, owner: str, tool_name: str, args: Dict[str, Any], expires: float):
+        self.conn.execute('INSERT OR REPLACE INTO streams VALUES (?, ?, ?, ?, ?)', (stream_id, owner, tool_name, json.dumps(args, default=str), expires))
+
+    def touch_stream(self, stream_id: str, expires: float):
+        self.conn.execute('UPDATE streams SET expires = ? WHERE id = ?', (expires, stream_id))
+
+
+def store_from_env() -> Optional[SharedStore]:
+    """A `SharedStore` at SHARED_STATE_PATH, None if unset (single process, state kept in memory)."""
+    path = os.environ.get('SHARED_STATE_PATH')
+    if not path:
+        return None
+    store = SharedStore(path)
+    store.expire()
+    logger.info(f'Shared state store: {path}')
+    return store
@@ -0,0 +1,217 @@
+import os
+import json
+import fnmatch
+import logging
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from mcp.types import Tool, TextContent, CallToolResult
+from cache import READ_ONLY_TOOLS
+
+logger = logging.getLogger(__name__)
+
+DESCRIBE_TOOL_NAME = 'describe_tool'
+
+DESCRIBE_TOOL = Tool(
+    name=DESCRIBE_TOOL_NAME,
+    description=(
+        'Get the full description & input schema of a GitLab tool. Tools are listed with short descriptions '
+        '(and, in lazy listings, without their arguments): describe a tool before its first call.'
+    ),
+    inputSchema={
+        'type': 'object',
+        'properties': {'name': {'type': 'string', 'description': 'Name of the tool to describe'}},
+        'required': ['name'],
+    },
+)
+
+MODES = ('full', 'compact', 'lazy')
+
+# compact / lazy listings: tool descriptions cut to their first sentence, at most this many chars
+COMPACT_DESCRIPTION_CHARS = 80
+
+LAZY_SCHEMA = {'type': 'object', 'properties': {}}
+
+# tool profile of the HTTP request being served (the tenant's profile / a selectable X-Tool-Profile)
+requested_profile: ContextVar[Optional[str]] = ContextVar('requested_profile', default=None)
+
+
+def short_description(description: Optional[str], limit: int = COMPACT_DESCRIPTION_CHARS) -> Optional[str]:
+    """First sentence of `description`, cut at `limit` chars."""
+    if not description:
+        return description
+    text = description.split('. ', 1)[0].split('\n', 1)[0].strip().rstrip('.')
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+
+def strip_descriptions(schema: Any) -> Any:
+    """Copy of a (flat, jsonConv'd) schema without the per argument descriptions."""
+    if not isinstance(schema, dict):
+        return schema
+    out = {k: v for k, v in schema.items() if k != 'description'}
+    if isinstance(out.get('properties'), dict):
+        out['properties'] = {name: strip_descriptions(sub) for name, sub in out['properties'].items()}
+    if 'items' in out:
+        out['items'] = strip_descriptions(out['items'])
+    for key in ('anyOf', 'oneOf', 'allOf'):
+        if isinstance(out.get(key), list):
+            out[key] = [strip_descriptions(sub) for sub in out[key]]
+    return out
+
+
+def listed_bytes(tools: List[Tool]) -> int:
+    """Size of `tools` serialized like a tools/list result."""
+    return len(json.dumps([t.model_dump(by_alias=True, exclude_none=True) for t in tools], separators=(',', ':')))
+
+
+class ToolProfile:
+    """
+    Which upstream tools a client sees & how they are listed.
+    - include / exclude: tool name patterns (fnmatch, eg: 'list_*'), include None means every tool.
+    - read_only: only the idempotent tools (`cache.READ_ONLY_TOOLS`).
+    - mode: 'full' listing, 'compact' (short descriptions, no per argument descriptions) or 'lazy'
+      (short descriptions, no arguments): full schemas are then served by the `describe_tool` tool.
+    """
+    name: str
+    include: Optional[List[str]]
+    exclude: List[str]
+    read_only: bool
+    mode: str
+
+    def __init__(self, name: str, include: Optional[Iterable[str]] = None, exclude: Iterable[str] = (),
+                 read_only: bool = False, mode: str = 'full'):
+        if mode not in MODES:
+            raise ValueError(f'tool profile {name!r}: mode must be one of {MODES}, got {mode!r}')
+        self.name = name
+        self.include = list(include) if include is not None else None
+        self.exclude = list(exclude)
+        self.read_only = read_only
+        self.mode = mode
+
+    def allows(self, tool_name: str) -> bool:
+        if self.read_only and tool_name not in READ_ONLY_TOOLS:
+            return False
+        if self.include is not None and not any(fnmatch.fnmatchcase(tool_name, p) for p in self.include):
+            return False
+        return not any(fnmatch.fnmatchcase(tool_name, p) for p in self.exclude)
+
+    def shape(self, tool: Tool) -> Tool:
+        if self.mode == 'full':
+            return tool
+        if self.mode == 'compact':
+            return Tool(name=tool.name, description=short_description(tool.description), inputSchema=strip_descriptions(tool.inputSchema))
+        return Tool(name=tool.name, description=short_description(tool.description), inputSchema=LAZY_SCHEMA)
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any]) -> 'ToolProfile':
+        return cls(name, config.get('include'), config.get('exclude', ()), bool(config.get('read_only', False)), config.get('mode', 'full'))
+
+
+class ToolSurface:
+    """
+    Applies the tool profile of the request being served to the catalog's tools.
+    - The profile is the one named by `requested_profile` (the tenant's profile, else the X-Tool-Profile
+      header, for the HTTP server), else `default`.
+    - Clients can only pick the `selectable` profiles the operator declared (`select`): a header never widens
+      the server's default.
+    - Listings are memoized per profile until the catalog's tool list changes.
+    - Calls to tools a profile hides are refused without going upstream.
+    """
+    profiles: Dict[str, ToolProfile]
+    default: str
+    selectable: frozenset
+    hidden_calls: int
+    _views: Dict[str, Tuple[Any, List[Tool], int]]
+
+    def __init__(self, profiles: Optional[Dict[str, ToolProfile]] = None, default: str = 'default', selectable: Iterable[str] = ()):
+        self.profiles = profiles or {'default': ToolProfile('default')}
+        if default not in self.profiles:
+            raise ValueError(f'default tool profile {default!r} is not configured ({", ".join(self.profiles)})')
+        self.default = default
+        self.selectable = frozenset(selectable)
+        unknown = self.selectable - set(self.profiles)
+        if unknown:
+            raise ValueError(f'selectable tool profiles {sorted(unknown)} are not configured ({", ".join(self.profiles)})')
+        self.hidden_calls = 0
+        self._views = {}
+
+    def select(self, name: Optional[str]) -> Optional[str]:
+        """The profile a client asked for (X-Tool-Profile) if it is selectable, else None (the server default)."""
+        if not name:
+            return None
+        if name not in self.selectable:
+            logger.warning(f'tool profile {name!r} is not selectable by clients, using {self.default!r}')
+            return None
+        return name
+
+    def current(self) -> ToolProfile:
+        name = requested_profile.get()
+        if name and name not in self.profiles:
+            logger.warning(f'unknown tool profile {name!r}, using {self.default!r}')
+        return self.profiles.get(name or self.default) or self.profiles[self.default]
+
+    def list_tools(self, tools: List[Tool]) -> List[Tool]:
+        """The current profile's view of `tools` (the catalog's), with `describe_tool` when schemas are trimmed."""
+        profile = self.current()
+        view = self._views.get(profile.name)
+        if view is None or view[0] is not tools:
+            listed = [profile.shape(t) for t in tools if profile.allows(t.name)]
+            if profile.mode != 'full':
+                listed.append(DESCRIBE_TOOL)
+            view = (tools, listed, listed_bytes(listed))
+            self._views[profile.name] = view
+            logger.info(f'tool profile {profile.name}: {len(listed)}/{len(tools)} tools listed ({profile.mode}), {view[2]} bytes')
+        return view[1]
+
+    def allows(self, tool_name: str) -> bool:
+        return self.current().allows(tool_name)
+
+    def refuse(self, tool_name: str) -> CallToolResult:
+        self.hidden_calls += 1
+        return CallToolResult(content=[TextContent(type='text', text=f'Tool {tool_name!r} is not available to this client')], isError=True)
+
+    def describe(self, tool_name: str, tools: List[Tool]) -> CallToolResult:
+        """`describe_tool`: the full listing entry of `tool_name` among `tools` (the catalog's)."""
+        tool = next((t for t in tools if t.name == tool_name), None)
+        if tool is None or not self.allows(tool_name):
+            return CallToolResult(content=[TextContent(type='text', text=f'Unknown tool {tool_name!r}')], isError=True)
+        return CallToolResult(content=[TextContent(type='text', text=json.dumps(tool.model_dump(by_alias=True, exclude_none=True)))])
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {'hidden_calls': self.hidden_calls}
+        for name, (_, listed, size) in self._views.items():
+            out[f'{name}_listed_tools'] = len(listed)
+            out[f'{name}_tools_list_bytes'] = size
+        return out
+
+
+def split_patterns(value: Optional[str]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [p.strip() for p in value.split(',') if p.strip()]
+
+
+def surface_from_env() -> ToolSurface:
+    """
+    A `ToolSurface` with the profiles of the JSON file at TOOL_PROFILES_CONFIG, like:
+    {"default": "agent", "selectable": ["agent"], "profiles": {"agent": {"include": ["get_*", "list_*"], "exclude": [], "read_only": true, "mode": "compact"}}}
+    plus a 'default' profile from TOOL_INCLUDE / TOOL_EXCLUDE / TOOL_READ_ONLY / TOOL_LIST_MODE.
+    TOOL_PROFILE names the profile used when a request does not ask for one, clients may only ask for the
+    `selectable` profiles (& TOOL_SELECTABLE_PROFILES).
+    """
+    profiles = {'default': ToolProfile(
+        'default',
+        include=split_patterns(os.environ.get('TOOL_INCLUDE') or None),
+        exclude=split_patterns(os.environ.get('TOOL_EXCLUDE')) or (),
+        read_only=os.environ.get('TOOL_READ_ONLY', 'false').lower() == 'true',
+        mode=os.environ.get('TOOL_LIST_MODE', 'full'),
+    )}
+    default = 'default'
+    selectable = split_patterns(os.environ.get('TOOL_SELECTABLE_PROFILES')) or []
+    path = os.environ.get('TOOL_PROFILES_CONFIG')
+    if path:
+        with open(path, 'r') as f:
+            config = json.load(f)
+        profiles.update({name: ToolProfile.from_config(name, c) for name, c in config.get('profiles', {}).items()})
+        default = config.get('default', default)
+        selectable += config.get('selectable', [])
+    return ToolSurface(profiles, os.environ.get('TOOL_PROFILE', default), selectable)
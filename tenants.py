@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Callable, Mapping, AsyncIterator
+from pool import GitlabMCPPool
+
+logger = logging.getLogger(__name__)
+
+# tenant of the HTTP request being served, set by the server before the MCP request is handled
+current_tenant: ContextVar[Optional['Tenant']] = ContextVar('current_tenant', default=None)
+
+
+class Tenant:
+    """Who a request is served for: the GitLab token & default project its upstream runs with (& tool profile, see surface.py)."""
+    key: str
+    name: str
+    token: str
+    project_id: str
+    profile: str
+
+    def __init__(self, key: str, name: str, token: str, project_id: str = '', profile: str = ''):
+        self.key = key
+        self.name = name
+        self.token = token
+        self.project_id = project_id
+        self.profile = profile
+
+
+def bearer(headers: Mapping[str, str]) -> Optional[str]:
+    auth = headers.get('authorization', '')
+    if auth[:7].lower() == 'bearer ':
+        return auth[7:].strip() or None
+    return None
+
+
+def children_of(gitlabMCP: Any) -> int:
+    """Upstream children behind a (wrapped) GitlabMCP: the pool size, else 1."""
+    layer = gitlabMCP
+    while layer is not None:
+        if isinstance(layer, GitlabMCPPool):
+            return layer.size
+        layer = layer.__dict__.get('upstream')
+    return 1
+
+
+class _Upstream:
+    gitlabMCP: Any
+    tenant: Tenant
+    children: int
+    inflight: int
+    last_used: float
+
+    def __init__(self, gitlabMCP: Any, tenant: Tenant):
+        self.gitlabMCP = gitlabMCP
+        self.tenant = tenant
+        self.children = children_of(gitlabMCP)
+        self.inflight = 0
+        self.last_used = time.monotonic()
+
+
+class TenantRouter:
+    """
+    Routes requests to a per tenant upstream (GitlabMCP / pool, with its cache & coalescing layers).
+    - Tenants come from `tenants` (api key -> Tenant, from TENANTS_CONFIG), or, without it, the
+      request's own GitLab token (bearer / X-Gitlab-Token) & X-Gitlab-Project-Id header.
+    - Upstreams are created on first use, closed once idle for `idle_ttl` seconds.
+    - At most `max_children` upstream children live at once: the least recently used idle tenants
+      are evicted to make room, if every tenant is busy the request waits up to `wait` seconds.
+    """
+    max_children: int
+    idle_ttl: float
+    wait: float
+    tenants: Optional[Dict[str, Tenant]]
+    upstreams: 'OrderedDict[str, _Upstream]'
+    created: int
+    evicted: int
+    reaped: int
+    closing: int
+    _factory: Callable[[Tenant], Any]
+    _lock: asyncio.Lock
+    _idle: asyncio.Event
+    _closing: List[asyncio.Task]
+    _task: Optional[asyncio.Task]
+    _tools_listeners: List[Callable[[List[Any]], Any]]
+
+    def __init__(self, factory: Callable[[Tenant], Any], max_children: int = 32, idle_ttl: float = 600.0,
+                 tenants: Optional[Dict[str, Tenant]] = None, wait: float = 30.0):
+        self._factory = factory
+        self.max_children = max(1, max_children)
+        self.idle_ttl = idle_ttl
+        self.wait = wait
+        self.tenants = tenants
+        self.upstreams = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+        self.reaped = 0
+        # children of closed upstreams that are still shutting down, they count against the cap
+        self.closing = 0
+        self._lock = asyncio.Lock()
+        self._idle = asyncio.Event()
+        self._closing = []
+        self._task = None
+        self._tools_listeners = []
+
+    def on_tools_changed(self, listener: Callable[[List[Any]], Any]):
+        """See `GitlabMCP.on_tools_changed`, for the upstreams of every tenant."""
+        self._tools_listeners.append(listener)
+        for upstream in self.upstreams.values():
+            upstream.gitlabMCP.on_tools_changed(listener)
+
+    def authenticate(self, headers: Mapping[str, str]) -> Optional[Tenant]:
+        """The tenant of a request from its (lower-cased) headers, None if it can't be authenticated."""
+        if self.tenants is not None:
+            api_key = bearer(headers) or headers.get('x-tenant-key')
+            return self.tenants.get(api_key) if api_key else None
+        token = bearer(headers) or headers.get('x-gitlab-token') or headers.get('private-token')
+        if not token:
+            return None
+        project_id = headers.get('x-gitlab-project-id') or os.environ.get('GITLAB_PROJECT_ID', '')
+        key = hashlib.sha256(f'{token}\0{project_id}'.encode('utf-8')).hexdigest()[:16]
+        return Tenant(key, key, token, project_id)
+
+    @property
+    def children(self) -> int:
+        return sum(u.children for u in self.upstreams.values()) + self.closing
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self._reap())
+        return self._task
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        upstreams, self.upstreams = self.upstreams, OrderedDict()
+        await asyncio.gather(*(u.gitlabMCP.close() for u in upstreams.values()), *self._closing, return_exceptions=True)
+        self._closing = []
+        logger.info(f'Tenant router closed ({len(upstreams)} tenants, {self.evicted} evicted, {self.reaped} reaped)')
+
+    def _close(self, key: str, why: str):
+        upstream = self.upstreams.pop(key)
+        logger.info(f'Closing upstream of tenant {upstream.tenant.name} ({why})')
+        self.closing += upstream.children
+        task = asyncio.create_task(upstream.gitlabMCP.close())
+        task.add_done_callback(lambda t, n=upstream.children: self._closed(n))
+        self._closing = [t for t in self._closing if not t.done()]
+        self._closing.append(task)
+
+    def _closed(self, children: int):
+        self.closing -= children
+        self._idle.set()
+
+    def _evict_for(self, children: int) -> bool:
+        """Evict idle tenants, least recently used first, until `children` more fit under the cap."""
+        for key in [k for k, u in self.upstreams.items() if u.inflight == 0]:
+            if self.children + children <= self.max_children:
+                break
+            self._close(key, 'evicted')
+            self.evicted += 1
+        return self.children + children <= self.max_children
+
+    async def _get(self, tenant: Tenant) -> _Upstream:
+        upstream = self.upstreams.get(tenant.key)
+        if upstream is not None:
+            self.upstreams.move_to_end(tenant.key)
+            return upstream
+        async with self._lock:
+            upstream = self.upstreams.get(tenant.key)
+            if upstream is not None:
+                return upstream
+            gitlabMCP = self._factory(tenant)
+            deadline = time.monotonic() + self.wait
+            while not self._evict_for(children_of(gitlabMCP)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f'Too many busy tenants ({self.children} upstream children live), try again later')
+                self._idle.clear()
+                try:
+                    await asyncio.wait_for(self._idle.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+            upstream = self.upstreams[tenant.key] = _Upstream(gitlabMCP, tenant)
+            self.created += 1
+            for listener in self._tools_listeners:
+                gitlabMCP.on_tools_changed(listener)
+            gitlabMCP.start()
+            logger.info(f'Started upstream of tenant {tenant.name} ({len(self.upstreams)} tenants, {self.children} children)')
+            return upstream
+
+    @asynccontextmanager
+    async def use(self, tenant: Tenant) -> AsyncIterator[Any]:
+        """The tenant's upstream, kept from eviction while in use."""
+        upstream = await self._get(tenant)
+        upstream.inflight += 1
+        try:
+            yield upstream.gitlabMCP
+        finally:
+            upstream.inflight -= 1
+            upstream.last_used = time.monotonic()
+            if upstream.inflight == 0:
+                self._idle.set()
+
+    def any_ready(self) -> Optional[Any]:
+        """Some connected upstream (most recently used first), to serve tenant independent data like tools/list."""
+        for upstream in reversed(self.upstreams.values()):
+            if upstream.gitlabMCP.is_conn:
+                return upstream.gitlabMCP
+        return None
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl / 4))
+            now = time.monotonic()
+            for key in [k for k, u in self.upstreams.items() if u.inflight == 0 and now - u.last_used > self.idle_ttl]:
+                self._close(key, 'idle')
+                self.reaped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tenants': len(self.upstreams),
+            'children': self.children,
+            'closing': self.closing,
+            'inflight': sum(u.inflight for u in self.upstreams.values()),
+            'created': self.created,
+            'evicted': self.evicted,
+            'reaped': self.reaped,
+        }
+
+
+def load_tenants(path: str) -> Dict[str, Tenant]:
+    """
+    api key -> Tenant from a JSON file like:
+    {"tenants": [{"name": "team-a", "api_key": "...", "token": "glpat-...", "project_id": "123", "tool_profile": "read-only"}]}
+    `token_env` can name an environment variable holding the token instead of `token`.
+    """
+    with open(path, 'r') as f:
+        config = json.load(f)
+    tenants = {}
+    for entry in config.get('tenants', []):
+        token = entry.get('token') or os.environ.get(entry.get('token_env', ''), '')
+        tenants[entry['api_key']] = Tenant(entry['name'], entry['name'], token, str(entry.get('project_id', '')), entry.get('tool_profile', ''))
+    return tenants
+
+
+def tenants_from_env(factory: Callable[[Tenant], Any]) -> Optional[TenantRouter]:
+    """A `TenantRouter` if TENANTS_CONFIG is set or MULTI_TENANT is 'true', else None (single tenant)."""
+    path = os.environ.get('TENANTS_CONFIG')
+    if not path and os.environ.get('MULTI_TENANT', 'false').lower() != 'true':
+        return None
+    return TenantRouter(
+        factory,
+        max_children=int(os.environ.get('TENANT_MAX_CHILDREN', '32')),
+        idle_ttl=float(os.environ.get('TENANT_IDLE_TTL', '600')),
+        tenants=load_tenants(path) if path else None,
+    )
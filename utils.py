@@ -99,6 +99,104 @@ def fix_schema(schema: Dict[str, Any], allow_external: bool = False) -> Dict[str
 
     return _resolve(root)
 
+
+class SchemaResolver:
+    """
+    Copy-free $ref resolver, a drop-in for `fix_schema` on hot paths.
+    - Each pointer is resolved once and memoized; resolved subtrees are shared, never copied.
+    - Subtrees without any $ref are returned as-is, so the output shares objects with the
+      input schema -> treat both as immutable.
+    - $ref with sibling keys keeps the `deep_merge` override semantics (copy-on-write merge).
+    - Same cycle detection as `fix_schema` (ValueError), raised for every cycle reachable from a $ref that is
+      reached, even through parts left out of the output (only $defs no property refers to are not checked).
+    """
+    root: Dict[str, Any]
+
+    def __init__(self, root: Dict[str, Any]):
+        self.root = root
+        self._seen: Set[str] = set()
+        self._targets: Dict[str, Any] = {}  # pointer -> target with its top level $ref resolved
+        self._full: Dict[str, Any] = {}  # pointer -> fully resolved target
+        self._done: Dict[int, Any] = {}  # id -> node known to be fully resolved (kept alive here)
+
+    def _check_ref(self, ref: Any):
+        if not isinstance(ref, str):
+            raise TypeError("$ref value must be a string")
+        if not ref.startswith("#"):
+            raise NotImplementedError(f"External $ref '{ref}' not supported by this function.")
+        if ref in self._seen:
+            raise ValueError(f"Circular $ref detected for pointer '{ref}' (stack: {list(self._seen)})")
+
+    def _pointer(self, ref: str) -> Any:
+        try:
+            return resolve_json_pointer(self.root, ref)
+        except KeyError as e:
+            raise KeyError(f"Failed to resolve pointer '{ref}': {e}") from e
+
+    @staticmethod
+    def merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+        """`deep_merge` without the copies: only dicts on overridden paths are re-created."""
+        out = dict(base)
+        for k, v in override.items():
+            if k in out and isinstance(out[k], dict) and isinstance(v, dict):
+                out[k] = SchemaResolver.merge(out[k], v)
+            else:
+                out[k] = v
+        return out
+
+    def shallow(self, node: Any) -> Any:
+        """Resolve only the $ref of `node` itself; children may still contain $ref."""
+        if not (isinstance(node, dict) and "$ref" in node):
+            return node
+        ref = node["$ref"]
+        self._check_ref(ref)
+        if ref not in self._targets:
+            # the target's nested $ref are resolved lazily (if at all): check them for cycles now, like `fix_schema` (memoized)
+            self.resolve({"$ref": ref})
+            self._seen.add(ref)
+            try:
+                self._targets[ref] = self.shallow(self._pointer(ref))
+            finally:
+                self._seen.discard(ref)
+        target = self._targets[ref]
+        overrides = {k: v for k, v in node.items() if k != "$ref"}
+        if not overrides:
+            return target
+        return self.merge(target if isinstance(target, dict) else {}, overrides)
+
+    def resolve(self, node: Any) -> Any:
+        """Fully resolve `node` (equivalent to the `fix_schema` output for that subtree)."""
+        if id(node) in self._done:
+            return node
+        if isinstance(node, dict):
+            if "$ref" in node:
+                ref = node["$ref"]
+                self._check_ref(ref)
+                if ref not in self._full:
+                    self._seen.add(ref)
+                    try:
+                        self._full[ref] = self.resolve(self._pointer(ref))
+                    finally:
+                        self._seen.discard(ref)
+                target = self._full[ref]
+                overrides = {k: v for k, v in node.items() if k != "$ref"}
+                if not overrides:
+                    return target
+                return self.resolve(self.merge(target if isinstance(target, dict) else {}, overrides))
+            out = {}
+            changed = False
+            for k, v in node.items():
+                out[k] = self.resolve(v)
+                changed = changed or out[k] is not v
+            res = out if changed else node
+        elif isinstance(node, list):
+            out = [self.resolve(item) for item in node]
+            res = out if any(a is not b for a, b in zip(out, node)) else node
+        else:
+            return node
+        self._done[id(res)] = res
+        return res
+
 if __name__=='__main__':
     # print(fix_schema(test_json))
     pass
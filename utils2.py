@@ -1,25 +1,38 @@
 from copy import deepcopy
-from typing import Any, Dict, Set, List
+from typing import Any, Callable, Dict, Set, List
 import json
-from utils import fix_schema
+import logging
+from utils import fix_schema, SchemaResolver
 
-def jsonConv(schema :Dict[str, Any]) -> Dict[str, Any]:
-    schema = fix_schema(schema)
-    print(f'fix ed: {json.dumps(schema, indent=2)}\n\n')
-    val_prop_keys = ['type', 'description', 'enum', 'default', 'minimum', 'maximum', 'minLength', 'maxLength', 'pattern', 'items', 'format']
-    val_schema_keys = ['type', 'properties', 'required']
+logger = logging.getLogger(__name__)
+
+VAL_PROP_KEYS = ['type', 'description', 'enum', 'default', 'minimum', 'maximum', 'minLength', 'maxLength', 'pattern', 'items', 'format']
+VAL_SCHEMA_KEYS = ['type', 'properties', 'required']
+
+def _identity(node: Any) -> Any:
+    return node
+
+def filter_schema(schema: Dict[str, Any], shallow: Callable[[Any], Any] = _identity, full: Callable[[Any], Any] = _identity) -> Dict[str, Any]:
+    """
+    Keep only the flat, Gemini-compatible subset of `schema`.
+    `shallow`/`full` resolve $ref lazily, only for the parts that end up in the output.
+    With the defaults `schema` must already be resolved (eg: by `fix_schema`).
+    """
+    schema = shallow(schema)
     res = {}
     for key in schema:
         # print(f'Schema Key: {key}')
-        if key in val_schema_keys:
+        if key in VAL_SCHEMA_KEYS:
             if key == 'properties':
+                props = shallow(schema[key])
                 res2 = {} 
-                for prop in schema[key]:
+                for prop in props:
+                    prop_schema = shallow(props[prop])
                     res3 = {}
-                    for prop_key in schema[key][prop]:
+                    for prop_key in prop_schema:
                         # print(f'Prop key: {prop_key}')
-                        if prop_key in val_prop_keys:
-                            temp = schema[key][prop][prop_key]
+                        if prop_key in VAL_PROP_KEYS:
+                            temp = prop_schema[prop_key]
                             if isinstance(temp, List):
                                 # if all(isinstance(t, str) for t in temp):
                                 #     temp = {'anyOf':[{prop_key: ty} for ty in temp]}
@@ -32,20 +45,34 @@ def jsonConv(schema :Dict[str, Any]) -> Dict[str, Any]:
                                     if not isinstance(temp, str):
                                         temp = 'null'
                                 elif prop_key == 'enum':
-                                    pass
+                                    temp = full(temp)
                                 else:
-                                    temp = temp[0]
+                                    temp = full(temp[0])
                             elif isinstance(temp, Dict) and prop_key != "items":
                                 continue
+                            else:
+                                temp = full(temp)
                             res3[prop_key] = temp
                     if res3:
                         res2[prop] = res3
                 if res2:
                     res[key] = res2
             else:
-                res[key] = schema[key]
+                res[key] = full(schema[key])
     return res
 
+def jsonConv(schema :Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve $ref & flatten `schema` in a single copy-free pass (see `utils.SchemaResolver`)."""
+    resolver = SchemaResolver(schema)
+    res = filter_schema(schema, resolver.shallow, resolver.resolve)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f'conv ed: {json.dumps(res, indent=2)}')
+    return res
+
+def jsonConv_legacy(schema :Dict[str, Any]) -> Dict[str, Any]:
+    """Previous deepcopy based implementation: `fix_schema` the whole schema, then filter."""
+    return filter_schema(fix_schema(schema))
+
 if __name__=='__main__':
     with open('./test.json', 'r') as f:
         jason = json.load(f)
@@ -0,0 +1,299 @@
+import os
+import re
+import json
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import jsonschema
+from mcp.types import Tool, TextContent, CallToolResult
+from catalog import schema_hash
+from utils import resolve_json_pointer
+
+logger = logging.getLogger(__name__)
+
+MODES = ('reject', 'coerce', 'off')
+
+# violations listed in a local rejection
+MAX_ERRORS = 10
+
+INTEGER = re.compile(r'^\s*[-+]?\d+\s*$')
+
+_NO = object()
+
+
+def _types(schema: Dict[str, Any]) -> List[str]:
+    t = schema.get('type')
+    if t is None:
+        return []
+    return t if isinstance(t, list) else [t]
+
+
+def _matches(value: Any, t: str) -> bool:
+    if t == 'string':
+        return isinstance(value, str)
+    if t == 'integer':
+        return isinstance(value, int) and not isinstance(value, bool)
+    if t == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if t == 'boolean':
+        return isinstance(value, bool)
+    if t == 'array':
+        return isinstance(value, list)
+    if t == 'object':
+        return isinstance(value, dict)
+    if t == 'null':
+        return value is None
+    return True
+
+
+def _coerce_scalar(value: Any, t: str) -> Any:
+    """`value` as a `t`, or _NO if it can't be recovered."""
+    if t == 'integer':
+        if isinstance(value, str) and INTEGER.match(value):
+            return int(value)
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif t == 'number':
+        if isinstance(value, str):
+            try:
+                return int(value) if INTEGER.match(value) else float(value)
+            except ValueError:
+                return _NO
+    elif t == 'string':
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+    elif t == 'boolean':
+        if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+            return value.strip().lower() == 'true'
+    elif t == 'array':
+        if isinstance(value, str):
+            text = value.strip()
+            if text[:1] == '[':
+                try:
+                    parsed = json.loads(text)
+                except ValueError:
+                    return _NO
+                return parsed if isinstance(parsed, list) else _NO
+            return [part.strip() for part in text.split(',') if part.strip()]
+        if value is not None and not isinstance(value, (list, dict)):
+            return [value]
+    elif t == 'object':
+        if isinstance(value, str) and value.strip()[:1] == '{':
+            try:
+                parsed = json.loads(value)
+            except ValueError:
+                return _NO
+            return parsed if isinstance(parsed, dict) else _NO
+    return _NO
+
+
+def coerce(value: Any, schema: Any, root: Dict[str, Any], path: str, changes: List[str], depth: int = 0,
+           stripped: Optional[List[str]] = None) -> Any:
+    """
+    `value` reshaped to `schema` where the mismatch is recoverable (a copy, `value` is left as is), each change noted in `changes`:
+    - numbers / booleans sent as strings & the reverse, arrays / objects sent as JSON (or comma separated) strings,
+      a single value where an array is expected,
+    - enum values in the wrong case,
+    - null optional arguments & unknown arguments of closed objects dropped (what zod does with unknown keys), noted
+      in `stripped` if given: the upstream would not have failed on them.
+    """
+    if stripped is None:
+        stripped = changes
+    if not isinstance(schema, dict) or depth > 32:
+        return value
+    while '$ref' in schema and depth <= 32:
+        try:
+            schema = resolve_json_pointer(root, schema['$ref'])
+        except (KeyError, IndexError):
+            return value
+        depth += 1
+    for key in ('anyOf', 'oneOf'):
+        branches = [b for b in schema.get(key) or [] if isinstance(b, dict)]
+        if branches:
+            matching = [b for b in branches if not _types(b) or any(_matches(value, t) for t in _types(b))]
+            return coerce(value, (matching or branches)[0], root, path, changes, depth + 1, stripped)
+    types = _types(schema)
+    if types and not any(_matches(value, t) for t in types):
+        for t in types:
+            new = _coerce_scalar(value, t)
+            if new is not _NO:
+                changes.append(f'{path}: {type(value).__name__} -> {t}')
+                value = new
+                break
+    enum = schema.get('enum')
+    if isinstance(value, str) and isinstance(enum, list) and value not in enum:
+        folded = [e for e in enum if isinstance(e, str) and e.lower() == value.lower()]
+        if len(folded) == 1:
+            changes.append(f'{path}: {value!r} -> {folded[0]!r}')
+            value = folded[0]
+    if isinstance(value, dict):
+        properties = schema.get('properties') if isinstance(schema.get('properties'), dict) else {}
+        required = set(schema.get('required') or ())
+        out = {}
+        for name, item in value.items():
+            sub = properties.get(name)
+            if sub is None and properties and schema.get('additionalProperties') is False:
+                stripped.append(f'{path}/{name}: unknown, dropped')
+                continue
+            if item is None and name not in required and sub is not None and not _nullable(sub, root):
+                stripped.append(f'{path}/{name}: null, dropped')
+                continue
+            out[name] = coerce(item, sub, root, f'{path}/{name}', changes, depth + 1, stripped) if sub is not None else item
+        return out
+    if isinstance(value, list) and isinstance(schema.get('items'), dict):
+        return [coerce(item, schema['items'], root, f'{path}/{i}', changes, depth + 1, stripped) for i, item in enumerate(value)]
+    return value
+
+
+def _nullable(schema: Dict[str, Any], root: Dict[str, Any]) -> bool:
+    if '$ref' in schema:
+        try:
+            schema = resolve_json_pointer(root, schema['$ref'])
+        except (KeyError, IndexError):
+            return True
+    if 'null' in _types(schema) or None in (schema.get('enum') or ()):
+        return True
+    return any(_nullable(b, root) for key in ('anyOf', 'oneOf') for b in schema.get(key) or [] if isinstance(b, dict))
+
+
+class ArgumentValidator:
+    """
+    Checks tool calls against the tool's upstream input schema (kept by the catalog next to the flattened one
+    clients see) before they go out, instead of after a stdio round trip & a GitLab call.
+    - Recoverable mismatches are coerced back to the upstream shape (see `coerce`).
+    - In 'reject' mode calls still invalid are answered locally with every violation, 'coerce' mode sends them anyway.
+    - Validators are compiled once per schema (cached by schema hash, reused across tools/list refreshes).
+    - The server's own tools (batch_call, read_result_page, ...) are checked against their `local_tools` schemas
+      (see `check_local`), the mcp input validation being off when this one is on.
+    """
+    catalog: Any
+    mode: str
+    local_schemas: Dict[str, Dict[str, Any]]
+    checked: int
+    coerced: int
+    coercions: int
+    fixed: int
+    stripped: int
+    stripped_args: int
+    rejected: int
+    unchecked: int
+    _by_name: Dict[str, Tuple[Dict[str, Any], Any]]
+    _by_hash: Dict[str, Any]
+
+    def __init__(self, catalog: Any, mode: str = 'reject', local_tools: Iterable[Tool] = ()):
+        if mode not in MODES:
+            raise ValueError(f'argument validation must be one of {MODES}, got {mode!r}')
+        self.catalog = catalog
+        self.mode = mode
+        self.local_schemas = {t.name: t.inputSchema for t in local_tools if t.inputSchema}
+        self.checked = self.coerced = self.coercions = self.fixed = self.stripped = self.stripped_args = self.rejected = self.unchecked = 0
+        self._by_name = {}
+        self._by_hash = {}
+
+    def _compiled(self, tool_name: str, schema: Dict[str, Any]) -> Any:
+        cached = self._by_name.get(tool_name)
+        if cached is not None and cached[0] is schema:
+            return cached[1]
+        key = schema_hash(schema)
+        compiled = self._by_hash.get(key)
+        if compiled is None:
+            cls = jsonschema.validators.validator_for(schema, default=jsonschema.Draft7Validator)
+            compiled = self._by_hash[key] = cls(schema)
+        self._by_name[tool_name] = (schema, compiled)
+        return compiled
+
+    def check(self, tool_name: str, args: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[str]]:
+        """(arguments to send, None) or (arguments, why the upstream would refuse them)."""
+        args = args or {}
+        schema = self.local_schemas.get(tool_name) or self.catalog.upstream_schemas.get(tool_name)
+        if not schema:
+            # not listed yet (or no schema): the upstream decides
+            self.unchecked += 1
+            return args, None
+        self.checked += 1
+        changes: List[str] = []
+        stripped: List[str] = []
+        coerced = coerce(args, schema, schema, '', changes, stripped=stripped)
+        if changes:
+            self.coerced += 1
+            self.coercions += len(changes)
+            logger.info(f'{tool_name} arguments coerced: {", ".join(changes)}')
+        if stripped:
+            self.stripped += 1
+            self.stripped_args += len(stripped)
+            logger.info(f'{tool_name} arguments stripped: {", ".join(stripped)}')
+        try:
+            errors = sorted(self._compiled(tool_name, schema).iter_errors(coerced), key=lambda e: list(map(str, e.absolute_path)))
+        except Exception as e:
+            logger.warning(f'Could not validate {tool_name} arguments: {e}')
+            return coerced, None
+        if not errors:
+            if changes:
+                # sent as is, the upstream would have refused it
+                self.fixed += 1
+            return coerced, None
+        lines = [f'- {"/".join(map(str, e.absolute_path)) or "(arguments)"}: {e.message}' for e in errors[:MAX_ERRORS]]
+        if len(errors) > MAX_ERRORS:
+            lines.append(f'- ... {len(errors) - MAX_ERRORS} more')
+        return coerced, '\n'.join(lines)
+
+    def check_local(self, tool_name: str, args: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[CallToolResult]]:
+        """(arguments, None) or (arguments, refusal) for a call to one of the server's own tools.
+        Invalid calls are refused in every mode: there is no upstream to send them to."""
+        args, why = self.check(tool_name, args)
+        return args, (self.refuse(tool_name, why) if why is not None else None)
+
+    def refuse(self, tool_name: str, why: str) -> CallToolResult:
+        self.rejected += 1
+        text = f'Invalid arguments for {tool_name} (checked against its input schema, the call was not sent):\n{why}'
+        return CallToolResult(content=[TextContent(type='text', text=text)], isError=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'checked': self.checked,
+            'unchecked': self.unchecked,
+            'coerced': self.coerced,
+            'coercions': self.coercions,
+            # nulls & unknown arguments dropped: zod strips them too, not failures avoided
+            'stripped': self.stripped,
+            'stripped_args': self.stripped_args,
+            'rejected': self.rejected,
+            # calls the upstream would have failed: made valid by coercion, or not sent at all
+            'upstream_failures_avoided': self.fixed + self.rejected,
+            'compiled_schemas': len(self._by_hash),
+        }
+
+
+class ValidatingGitlabMCP:
+    """Checks (& coerces) every call's arguments with an `ArgumentValidator` before passing it to `upstream`."""
+    upstream: Any
+    validator: ArgumentValidator
+
+    def __init__(self, upstream: Any, validator: ArgumentValidator):
+        self.upstream = upstream
+        self.validator = validator
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.upstream, name)
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        args, why = self.validator.check(tool_name, args)
+        if why is not None:
+            if self.validator.mode == 'reject':
+                return self.validator.refuse(tool_name, why)
+            logger.info(f'{tool_name} arguments look invalid, sent anyway:\n{why}')
+        return await self.upstream.call_tool(tool_name, args)
+
+
+def validator_from_env(catalog: Any, local_tools: Iterable[Tool] = ()) -> Optional[ArgumentValidator]:
+    """An `ArgumentValidator` over `catalog` (& the server's `local_tools`) in ARGUMENT_VALIDATION mode ('reject' by default), None if 'off'."""
+    mode = os.environ.get('ARGUMENT_VALIDATION', 'reject').lower()
+    if mode == 'off':
+        return None
+    return ArgumentValidator(catalog, mode, local_tools)
+
+
+def validate_from_env(upstream: Any, validator: Optional[ArgumentValidator]) -> Any:
+    """Wrap `upstream` in a `ValidatingGitlabMCP` unless argument validation is off."""
+    if validator is None:
+        return upstream
+    return ValidatingGitlabMCP(upstream, validator)